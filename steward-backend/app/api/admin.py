@@ -0,0 +1,120 @@
+import os
+import hmac
+import shutil
+import tempfile
+
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+
+from app.core.rag_engine import _engine
+from app.core.sessions import (
+    SESSION_DISK_QUOTA_MB,
+    SESSION_TTL_DAYS,
+    compact_session,
+    evict_sessions,
+    list_sessions,
+    purge_session,
+    validate_session_id,
+)
+from app.core.snapshots import export_snapshot, import_snapshot, snapshot_path
+
+# Admin calls must send it as X-Admin-Token; without it the router is not mounted
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    # Also refuse here in case the router is mounted without a token
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/sessions")
+def get_sessions():
+    """
+    Lists sessions, most recently used first, with created / last ingested /
+    last queried timestamps, size on disk and chunk count.
+    """
+    sessions = list_sessions()
+    return {
+        "sessions": sessions,
+        "total_bytes": sum(s.get("size_bytes") or 0 for s in sessions),
+        "quota_bytes": int(SESSION_DISK_QUOTA_MB * 1024 * 1024) or None,
+        "ttl_days": SESSION_TTL_DAYS or None,
+    }
+
+
+@router.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    try:
+        return purge_session(session_id, on_release=_engine.release_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/compact")
+def compact(session_id: str):
+    """Rewrites the session's store without stale or duplicate rows."""
+    try:
+        return compact_session(session_id, on_release=_engine.release_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/snapshot")
+def create_snapshot(session_id: str, dtype: str | None = None):
+    """Exports the session to a checksummed snapshot under SNAPSHOT_DIR."""
+    if dtype not in (None, "float16", "int8"):
+        raise HTTPException(status_code=400, detail="dtype must be float16 or int8")
+    try:
+        return export_snapshot(session_id, snapshot_path(session_id), dtype=dtype)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/sessions/{session_id}/snapshot")
+def download_snapshot(session_id: str):
+    try:
+        validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    path = snapshot_path(session_id)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"No snapshot for session_id={session_id}")
+    return FileResponse(path, media_type="application/x-tar", filename=os.path.basename(path))
+
+
+@router.post("/snapshots/import")
+def upload_snapshot(
+    file: UploadFile = File(...),
+    session_id: str | None = Form(default=None),
+    force: bool = Form(default=False),
+):
+    """
+    Installs an uploaded snapshot as a session (replacing any existing
+    index) without re-embedding. The session id defaults to the one
+    recorded in the snapshot.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".tar")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out)
+        return import_snapshot(tmp_path, session_id=session_id, force=force, on_release=_engine.release_session)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(tmp_path)
+
+
+@router.post("/sessions/evict")
+def evict(dry_run: bool = False):
+    """Applies TTL and disk-quota eviction now (see SESSION_TTL_DAYS / SESSION_DISK_QUOTA_MB)."""
+    return evict_sessions(dry_run=dry_run, on_release=_engine.release_session)
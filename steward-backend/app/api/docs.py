@@ -1,15 +1,47 @@
-from fastapi import APIRouter
-from app.schemas import DocsGenerateRequest, DocsGenerateResponse
+from fastapi import APIRouter, HTTPException
+from app.schemas import DocsGenerateRequest, DocsGenerateResponse, DocsPrewarmRequest
 from app.core.rag_engine import run_generate_docs
+from app.core.tracing import with_debug
+from app.core.sessions import validate_session_id
+from app.core.docs_prewarm import schedule_prewarm, prewarm_status, parse_variants, DOCS_PREWARM_VARIANTS
 
 router = APIRouter()
 
 
+def _check_session_id(session_id: str):
+    try:
+        validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/generate", response_model=DocsGenerateResponse)
-async def generate_docs(payload: DocsGenerateRequest):
-    return run_generate_docs(
+def generate_docs(payload: DocsGenerateRequest):
+    _check_session_id(payload.session_id)
+    result = run_generate_docs(
         session_id=payload.session_id,
         doc_type=payload.doc_type,
         audience=payload.audience,
         business_context=payload.business_context,
     )
+    return with_debug(result, payload.debug)
+
+
+@router.post("/prewarm")
+async def prewarm_docs(payload: DocsPrewarmRequest):
+    """
+    Queues background generation of doc variants into the docs cache.
+    Variants default to DOCS_PREWARM_VARIANTS ("doc_type:audience" pairs).
+    """
+    _check_session_id(payload.session_id)
+    try:
+        variants = parse_variants(",".join(payload.variants or [DOCS_PREWARM_VARIANTS]))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schedule_prewarm(payload.session_id, variants)
+
+
+@router.get("/prewarm/{session_id}")
+async def get_prewarm_status(session_id: str):
+    _check_session_id(session_id)
+    return prewarm_status(session_id)
@@ -1,22 +1,51 @@
 import os
+import time
 from fastapi import APIRouter
-from openai import OpenAI
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
+from app.core.rag_engine import _engine
+
 load_dotenv()
 router = APIRouter()
 
+# The OpenAI key check is a network round-trip; probes reuse the last result
+HEALTH_CACHE_TTL = int(os.getenv("HEALTH_CACHE_TTL", "60"))
+_last_check: dict = {"ts": 0.0, "result": None}
+
+
 @router.get("/")
 async def health_check():
     """
     Checks whether the OpenAI API key is valid.
-    Returns API status and model test response.
+    Returns API status and model test response (cached for HEALTH_CACHE_TTL seconds).
     """
+    if _last_check["result"] and time.time() - _last_check["ts"] < HEALTH_CACHE_TTL:
+        return _last_check["result"]
+
+    result = _check_openai()
+    _last_check.update(ts=time.time(), result=result)
+    return result
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Readiness probe. No network calls: reports which engine components are
+    loaded and returns 503 while a startup warm-up is running or has failed.
+    """
+    status = _engine.readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+def _check_openai() -> dict:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return {"status": "error", "message": "❌ OPENAI_API_KEY not found in environment."}
 
     try:
+        from openai import OpenAI
+
         client = OpenAI(api_key=api_key)
         models = client.models.list()
         # Just fetch the first model name as a sanity check
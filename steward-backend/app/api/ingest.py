@@ -3,10 +3,20 @@
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 from app.ingestion.repo_ingestor import ingest_repository
+from app.core.docs_prewarm import DOCS_PREWARM, schedule_prewarm
+from app.core.sessions import validate_session_id
 from app.schemas import RepoIngestRequest, RepoIngestResponse
 
 router = APIRouter()
 
+
+def _ingest_and_prewarm(job_id: str, request: RepoIngestRequest):
+    result = ingest_repository(job_id=job_id, request=request)
+    if DOCS_PREWARM:
+        schedule_prewarm(request.repo_name)
+    return result
+
+
 @router.post("/ingest", response_model=RepoIngestResponse)
 async def ingest_repo(
     req: RepoIngestRequest,
@@ -14,11 +24,16 @@ async def ingest_repo(
 ):
     if req.source_type not in {"zip", "github", "file"}:
         raise HTTPException(status_code=400, detail="Invalid source_type")
+    # repo_name becomes the session id, i.e. a directory under the persist dir
+    try:
+        validate_session_id(req.repo_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     job_id = f"ingest-{req.repo_name}"
 
     background_tasks.add_task(
-        ingest_repository,
+        _ingest_and_prewarm,
         job_id=job_id,
         request=req
     )
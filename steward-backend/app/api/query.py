@@ -1,23 +1,73 @@
+import json
+
 from fastapi import APIRouter, HTTPException
-from app.core.rag_engine import run_query
-from app.schemas import QueryRequest
+from fastapi.responses import StreamingResponse
+from app.core.rag_engine import run_query, stream_query_batch, BATCH_QUERY_CONCURRENCY
+from app.core.tracing import with_debug
+from app.core.sessions import validate_session_id
+from app.schemas import QueryRequest, BatchQueryRequest
 
 router = APIRouter()
 
 
 @router.post("/")
-async def query(payload: QueryRequest):
+def query(payload: QueryRequest):
+    """
+    Declared sync so FastAPI runs it in the threadpool; the engine may
+    block waiting for an LLM slot.
+    """
     question = payload.question.strip()
-    session_id = payload.session_id.strip()
     filters = payload.filters
 
+    # A list of sessions turns this into a federated query
+    session_ids = [s.strip() for s in (payload.session_ids or []) if s.strip()]
+    if payload.session_id and payload.session_id.strip():
+        session_ids.insert(0, payload.session_id.strip())
+    session_id = session_ids[0] if len(set(session_ids)) == 1 else session_ids
+
     if not question:
         raise HTTPException(status_code=400, detail="Missing question")
-    if not session_id:
+    if not session_ids:
         raise HTTPException(status_code=400, detail="Missing session_id")
+    try:
+        for sid in session_ids:
+            validate_session_id(sid)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return run_query(
+    result = run_query(
         question=question,
         session_id=session_id,
         filters=filters,
     )
+    return with_debug(result, payload.debug)
+
+
+@router.post("/batch")
+async def query_batch(payload: BatchQueryRequest):
+    """
+    Answers many questions against one session.
+    Streams newline-delimited JSON, one object per question, as each completes.
+    """
+    questions = [q.strip() for q in payload.questions]
+    session_id = payload.session_id.strip()
+
+    if not all(questions):
+        raise HTTPException(status_code=400, detail="Empty question in batch")
+    if not session_id:
+        raise HTTPException(status_code=400, detail="Missing session_id")
+    try:
+        validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def _ndjson():
+        async for item in stream_query_batch(
+            questions=questions,
+            session_id=session_id,
+            filters=payload.filters,
+            max_concurrency=payload.max_concurrency or BATCH_QUERY_CONCURRENCY,
+        ):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
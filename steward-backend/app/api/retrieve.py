@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from app.core.rag_engine import run_retrieve
+from app.core.tracing import with_debug
+from app.core.sessions import validate_session_id
+from app.schemas import RetrieveRequest, RetrieveResponse
+
+router = APIRouter()
+
+
+@router.post("/", response_model=RetrieveResponse)
+def retrieve(payload: RetrieveRequest):
+    """
+    Retrieval only: ranked chunks with text, line ranges, scores and
+    metadata, plus per-stage timings. Never calls the LLM.
+    Declared sync so FastAPI runs it in the threadpool.
+    """
+    question = payload.question.strip()
+    session_id = payload.session_id.strip()
+
+    if not question:
+        raise HTTPException(status_code=400, detail="Missing question")
+    if not session_id:
+        raise HTTPException(status_code=400, detail="Missing session_id")
+    try:
+        validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = run_retrieve(
+            question=question,
+            session_id=session_id,
+            filters=payload.filters,
+            k=payload.k,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return with_debug(result, payload.debug)
+
@@ -1,20 +1,27 @@
 from fastapi import APIRouter, HTTPException
 from app.core.rag_engine import run_suggest
+from app.core.tracing import with_debug
+from app.core.sessions import validate_session_id
 from app.schemas import SuggestRequest
 
 router = APIRouter()
 
 @router.post("/")
-async def suggest(payload: SuggestRequest):
-    question = payload.get("question", "").strip()
-    session_id = payload.get("session_id")
+def suggest(payload: SuggestRequest):
+    question = payload.question.strip()
+    session_id = payload.session_id.strip()
 
     if not question:
         raise HTTPException(status_code=400, detail="Missing question")
     if not session_id:
         raise HTTPException(status_code=400, detail="Missing session_id")
+    try:
+        validate_session_id(session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return run_suggest(
+    result = run_suggest(
         question=question,
         session_id=session_id,
-    )
\ No newline at end of file
+    )
+    return with_debug(result, payload.debug)
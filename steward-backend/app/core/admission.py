@@ -0,0 +1,217 @@
+import os
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Condition
+from typing import Dict, Optional
+
+from app.core import tracing
+
+# ============================================================
+# Configuration
+# ============================================================
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_SESSION_MAX_CONCURRENCY = int(os.getenv("LLM_SESSION_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "16"))
+EMBED_SESSION_MAX_CONCURRENCY = int(os.getenv("EMBED_SESSION_MAX_CONCURRENCY", "8"))
+EMBED_MAX_QUEUE = int(os.getenv("EMBED_MAX_QUEUE", "256"))
+
+# Lower value = served first. Interactive traffic jumps ahead of docs and ingestion.
+PRIORITIES = {
+    "query": 0,
+    "retrieve": 0,
+    "suggest": 1,
+    "docs": 2,
+    "prewarm": 3,
+    "ingest": 3,
+}
+
+# How long a request may wait in the queue before it is shed (None = wait forever)
+QUEUE_DEADLINES_S: Dict[str, Optional[float]] = {
+    "query": float(os.getenv("QUERY_QUEUE_DEADLINE_S", "10")),
+    "retrieve": float(os.getenv("QUERY_QUEUE_DEADLINE_S", "10")),
+    "suggest": float(os.getenv("QUERY_QUEUE_DEADLINE_S", "10")),
+    "docs": float(os.getenv("DOCS_QUEUE_DEADLINE_S", "30")),
+    "prewarm": None,
+    "ingest": None,
+}
+
+WAIT_WINDOW = 1000
+
+# Set by background work (docs prewarm) so its calls queue behind live traffic
+_kind_override: ContextVar[Optional[str]] = ContextVar("steward_admission_kind", default=None)
+
+
+class Overloaded(Exception):
+    """Raised when a call cannot be admitted; maps to HTTP 503 + Retry-After."""
+
+    def __init__(self, resource: str, reason: str, retry_after_s: int):
+        super().__init__(f"{resource} is overloaded ({reason}), retry after {retry_after_s}s")
+        self.resource = resource
+        self.reason = reason
+        self.retry_after_s = retry_after_s
+
+
+# ============================================================
+# Admission controller
+# ============================================================
+
+class AdmissionController:
+    """
+    Global + per-session concurrency limit with a bounded priority queue.
+
+    Waiters are served by (priority, arrival); a waiter whose session is at
+    its limit is skipped so it cannot block other sessions. A full queue or
+    an expired deadline raises Overloaded immediately instead of piling up.
+    Background kinds (no deadline) always queue: their own worker pools
+    already bound them, and shedding them would just fail the job.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, session_max_concurrency: int, max_queue: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.session_max_concurrency = max(1, session_max_concurrency)
+        self.max_queue = max(0, max_queue)
+
+        self._cond = Condition()
+        self._seq = itertools.count()
+        self._waiters: list = []                 # heap of (priority, seq, session_id)
+        self._in_flight = 0
+        self._per_session: Dict[str, int] = {}
+
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {}
+        self._waits = deque(maxlen=WAIT_WINDOW)
+        self._holds = deque(maxlen=WAIT_WINDOW)
+
+    @contextmanager
+    def slot(self, session_id: Optional[str] = None, kind: str = "query", deadline_s: Optional[float] = None):
+        """
+        Holds one concurrency slot for the duration of the block.
+        `deadline_s` overrides the queue deadline configured for `kind`.
+        """
+        session_id = session_id or "-"
+        kind = _kind_override.get() or kind
+        priority = PRIORITIES.get(kind, 1)
+        if deadline_s is None:
+            deadline_s = QUEUE_DEADLINES_S.get(kind)
+
+        start = time.monotonic()
+        self._acquire(session_id, priority, start + deadline_s if deadline_s is not None else None)
+        waited = time.monotonic() - start
+        tracing.record(f"{self.name}_queue", waited * 1000)
+
+        held_from = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(session_id, time.monotonic() - held_from)
+
+    def _acquire(self, session_id: str, priority: int, deadline: Optional[float]):
+        with self._cond:
+            if not self._waiters and self._has_capacity(session_id):
+                self._grant(session_id, 0.0)
+                return
+
+            if deadline is not None and len(self._waiters) >= self.max_queue:
+                self._reject("queue_full")
+
+            entry = (priority, next(self._seq), session_id)
+            heapq.heappush(self._waiters, entry)
+            enqueued = time.monotonic()
+            try:
+                while self._next_eligible() is not entry:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._reject("deadline")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                # Whoever is next may now be eligible
+                self._cond.notify_all()
+
+            self._grant(session_id, time.monotonic() - enqueued)
+
+    def _release(self, session_id: str, held_s: float):
+        with self._cond:
+            self._in_flight -= 1
+            remaining = self._per_session.get(session_id, 1) - 1
+            if remaining:
+                self._per_session[session_id] = remaining
+            else:
+                self._per_session.pop(session_id, None)
+            self._holds.append(held_s)
+            self._cond.notify_all()
+
+    def _has_capacity(self, session_id: str) -> bool:
+        return (
+            self._in_flight < self.max_concurrency
+            and self._per_session.get(session_id, 0) < self.session_max_concurrency
+        )
+
+    def _next_eligible(self):
+        if self._in_flight >= self.max_concurrency:
+            return None
+        for entry in sorted(self._waiters):
+            if self._has_capacity(entry[2]):
+                return entry
+        return None
+
+    def _grant(self, session_id: str, waited_s: float):
+        self._in_flight += 1
+        self._per_session[session_id] = self._per_session.get(session_id, 0) + 1
+        self._admitted += 1
+        self._waits.append(waited_s)
+
+    def _reject(self, reason: str):
+        # Called with the condition held
+        self._rejected[reason] = self._rejected.get(reason, 0) + 1
+        raise Overloaded(self.name, reason, self._retry_after())
+
+    def _retry_after(self) -> int:
+        """Rough time for the current queue to drain, in whole seconds (>= 1)."""
+        avg_hold = sum(self._holds) / len(self._holds) if self._holds else 1.0
+        return max(1, math.ceil(avg_hold * (len(self._waiters) + 1) / self.max_concurrency))
+
+    def metrics(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "rejected": dict(self._rejected),
+                "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+                "wait_p95_ms": round(waits[max(0, int(len(waits) * 0.95) - 1)] * 1000, 1) if waits else None,
+            }
+
+
+@contextmanager
+def background(kind: str = "prewarm"):
+    """Admits every call made inside the block with the given (low) priority."""
+    token = _kind_override.set(kind)
+    try:
+        yield
+    finally:
+        _kind_override.reset(token)
+
+
+llm_admission = AdmissionController("llm", LLM_MAX_CONCURRENCY, LLM_SESSION_MAX_CONCURRENCY, LLM_MAX_QUEUE)
+embed_admission = AdmissionController("embed", EMBED_MAX_CONCURRENCY, EMBED_SESSION_MAX_CONCURRENCY, EMBED_MAX_QUEUE)
+
+
+def admission_metrics() -> dict:
+    return {
+        "llm": llm_admission.metrics(),
+        "embed": embed_admission.metrics(),
+    }
@@ -0,0 +1,123 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, get_args
+
+from app.core.admission import background
+from app.core.index_version import get_generation
+from app.core.rag_engine import _engine, CHROMA_PERSIST_DIR
+from app.schemas import DocsGenerateRequest
+
+logger = logging.getLogger("steward.docs_prewarm")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+# Pre-generate docs in the background after every successful ingest
+DOCS_PREWARM = os.getenv("DOCS_PREWARM", "false").lower() in {"1", "true", "yes"}
+# Comma-separated doc_type:audience pairs
+DOCS_PREWARM_VARIANTS = os.getenv(
+    "DOCS_PREWARM_VARIANTS",
+    "onboarding:engineer,overview:engineer,architecture:engineer,api:engineer",
+)
+DOCS_PREWARM_WORKERS = int(os.getenv("DOCS_PREWARM_WORKERS", "2"))
+
+DOC_TYPES = get_args(DocsGenerateRequest.model_fields["doc_type"].annotation)
+AUDIENCES = get_args(DocsGenerateRequest.model_fields["audience"].annotation)
+
+_pool = ThreadPoolExecutor(max_workers=DOCS_PREWARM_WORKERS, thread_name_prefix="steward-prewarm")
+_lock = Lock()
+# (session_id, generation, "doc_type:audience") -> pending | running | failed
+_inflight: Dict[Tuple[str, int, str], str] = {}
+
+
+def parse_variants(spec: str) -> List[Tuple[str, str]]:
+    variants = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        doc_type, _, audience = item.partition(":")
+        audience = audience or "engineer"
+        if doc_type not in DOC_TYPES or audience not in AUDIENCES:
+            raise ValueError(f"Invalid docs prewarm variant: {item}")
+        variants.append((doc_type, audience))
+    return variants
+
+
+def schedule_prewarm(session_id: str, variants: Optional[List[Tuple[str, str]]] = None) -> Dict:
+    """
+    Queues background generation of each (doc_type, audience) variant for
+    the session's current index generation. Results land in the docs
+    cache, so the first page load is a cache hit.
+    """
+    variants = variants or parse_variants(DOCS_PREWARM_VARIANTS)
+    generation = get_generation(session_id, CHROMA_PERSIST_DIR)
+
+    with _lock:
+        for stale in [k for k in _inflight if k[0] == session_id and k[1] != generation]:
+            del _inflight[stale]
+
+    for doc_type, audience in variants:
+        key = (session_id, generation, f"{doc_type}:{audience}")
+        with _lock:
+            if _inflight.get(key) in ("pending", "running"):
+                continue
+            if _engine.is_docs_cached(session_id, doc_type, audience):
+                continue
+            _inflight[key] = "pending"
+        _pool.submit(_generate, key, doc_type, audience)
+
+    return prewarm_status(session_id, variants)
+
+
+def prewarm_status(session_id: str, variants: Optional[List[Tuple[str, str]]] = None) -> Dict:
+    """
+    Reports each variant as warm (served from cache for the current
+    generation), pending, running, failed or cold.
+    """
+    variants = variants or parse_variants(DOCS_PREWARM_VARIANTS)
+    generation = get_generation(session_id, CHROMA_PERSIST_DIR)
+
+    status = {}
+    for doc_type, audience in variants:
+        name = f"{doc_type}:{audience}"
+        if _engine.is_docs_cached(session_id, doc_type, audience):
+            status[name] = "warm"
+        else:
+            status[name] = _inflight.get((session_id, generation, name), "cold")
+
+    return {
+        "session_id": session_id,
+        "generation": generation,
+        "variants": status,
+    }
+
+
+def _generate(key: Tuple[str, int, str], doc_type: str, audience: str):
+    session_id, generation, name = key
+    if get_generation(session_id, CHROMA_PERSIST_DIR) != generation:
+        # Superseded by a newer ingest before we got to it
+        with _lock:
+            _inflight.pop(key, None)
+        return
+
+    with _lock:
+        _inflight[key] = "running"
+    try:
+        with background("prewarm"):
+            _engine.generate_docs(
+                session_id=session_id,
+                doc_type=doc_type,
+                audience=audience,
+                business_context=None,
+            )
+        with _lock:
+            _inflight.pop(key, None)
+        logger.info("Prewarmed docs session=%s generation=%d variant=%s", session_id, generation, name)
+    except Exception:
+        logger.exception("Docs prewarm failed session=%s variant=%s", session_id, name)
+        with _lock:
+            _inflight[key] = "failed"
@@ -0,0 +1,299 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: pins are only visible in-process
+    fcntl = None
+
+logger = logging.getLogger("steward.index_version")
+
+# ============================================================
+# Index generations
+# ============================================================
+#
+# Every session carries a monotonically increasing generation number.
+# Ingestion bumps it once the new index is fully persisted, and every
+# cache key derived from a session's index includes it, so cached
+# answers become unreachable (rather than stale) after a re-ingest.
+
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "data/chroma")
+SESSION_META_DIR = ".sessions"
+VERSIONS_DIR = ".versions"
+# Retired versions are kept this long for readers in other processes
+INDEX_VERSION_GRACE_S = float(os.getenv("INDEX_VERSION_GRACE_S", "120"))
+
+_lock = Lock()
+# path -> ((st_ino, st_mtime_ns), generation)
+_memo: Dict[str, Tuple[Tuple[int, int], int]] = {}
+
+
+def session_meta_dir(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> str:
+    return os.path.join(persist_dir, SESSION_META_DIR, session_id)
+
+
+def _generation_path(session_id: str, persist_dir: str) -> str:
+    return os.path.join(session_meta_dir(session_id, persist_dir), "generation")
+
+
+def _read_generation(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def get_generation(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> int:
+    """
+    Returns the current index generation for a session (0 if never bumped).
+    Cheap enough to call on every request: the file is only re-read when
+    its inode or mtime changes.
+    """
+    path = _generation_path(session_id, persist_dir)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 0
+
+    stamp = (st.st_ino, st.st_mtime_ns)
+    cached = _memo.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    generation = _read_generation(path)
+    _memo[path] = (stamp, generation)
+    return generation
+
+
+def bump_generation(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> int:
+    """
+    Atomically increments and returns the session's generation.
+    Written via rename so readers never observe a partial file. Callers
+    hold session_lock, which makes the read-increment-write host-wide.
+    """
+    path = _generation_path(session_id, persist_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with _lock:
+        generation = _read_generation(path) + 1
+        # A unique temp file per bump: a shared name races between processes
+        fd, tmp_path = tempfile.mkstemp(prefix=".generation.", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(generation))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return generation
+
+
+# ============================================================
+# Versioned store directories
+# ============================================================
+#
+# <persist_dir>/<session_id> is a symlink to an immutable version under
+# <persist_dir>/.versions/<session_id>/. Writers build a new version next
+# to the live one and publish it by atomically replacing the symlink, so
+# readers only ever open a complete store. Readers open the resolved
+# version path and pin it with a shared flock on its .pin file, visible
+# to every worker on the host. A retired version is deleted once no
+# process pins it and it is older than INDEX_VERSION_GRACE_S.
+
+PIN_FILE = ".pin"
+
+# realpath -> [pin count, open .pin file holding the shared lock]
+_pins: Dict[str, list] = {}
+_pins_lock = Lock()
+
+
+def store_path(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> str:
+    return os.path.join(persist_dir, session_id)
+
+
+def _versions_root(session_id: str, persist_dir: str) -> str:
+    return os.path.join(persist_dir, VERSIONS_DIR, session_id)
+
+
+def _version_order(name: str) -> Optional[int]:
+    # Versions are named by creation time; a migrated pre-versioning
+    # directory predates all of them
+    if name.startswith("legacy-"):
+        return -1
+    try:
+        return int(name)
+    except ValueError:
+        return None
+
+
+def pin_version(path: str):
+    path = os.path.realpath(path)
+    with _pins_lock:
+        pin = _pins.get(path)
+        if pin is None:
+            handle = None
+            if fcntl is not None:
+                handle = open(os.path.join(path, PIN_FILE), "a")
+                fcntl.flock(handle, fcntl.LOCK_SH)
+                if not os.path.isdir(path):
+                    # Collected while we waited for the lock
+                    handle.close()
+                    raise FileNotFoundError(path)
+            pin = _pins[path] = [0, handle]
+        pin[0] += 1
+
+
+def unpin_version(path: str):
+    path = os.path.realpath(path)
+    with _pins_lock:
+        pin = _pins.get(path)
+        if pin is None:
+            return
+        pin[0] -= 1
+        if pin[0] <= 0:
+            del _pins[path]
+            if pin[1] is not None:
+                pin[1].close()   # releases the shared lock
+
+
+def _remove_unpinned(path: str) -> bool:
+    """
+    Deletes a version unless this or any other process on the host pins
+    it. The exclusive lock is held while deleting, so a reader can't pin
+    it halfway through.
+    """
+    with _pins_lock:
+        if path in _pins:
+            return False
+    if fcntl is None:
+        shutil.rmtree(path, ignore_errors=True)
+        return True
+    try:
+        handle = open(os.path.join(path, PIN_FILE), "a")
+    except OSError:
+        return False
+    with handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+    return True
+
+
+def stage_version(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR, copy_current: bool = False) -> str:
+    """
+    Creates a new, unpublished (and pinned) version directory, empty or
+    a copy of the live store for incremental writes. Callers serialize
+    writers with session_lock.
+    """
+    root = _versions_root(session_id, persist_dir)
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, str(time.time_ns()))
+
+    current = store_path(session_id, persist_dir)
+    if copy_current and os.path.isdir(current):
+        shutil.copytree(os.path.realpath(current), path, ignore=shutil.ignore_patterns(PIN_FILE))
+    else:
+        os.makedirs(path)
+    pin_version(path)
+    return path
+
+
+def discard_version(version_path: str):
+    """Drops a staged version that will not be published (failed write)."""
+    unpin_version(version_path)
+    shutil.rmtree(version_path, ignore_errors=True)
+
+
+def publish_version(session_id: str, version_path: str, persist_dir: str = CHROMA_PERSIST_DIR) -> Optional[str]:
+    """
+    Atomically points the session's store path at version_path and
+    returns the retired version's directory, if there was one. Callers
+    bump the generation afterwards so pooled readers switch over.
+    """
+    link = store_path(session_id, persist_dir)
+    tmp = os.path.join(persist_dir, f".{session_id}.link")
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        os.symlink(os.path.relpath(version_path, persist_dir), tmp, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        # No symlinks (e.g. unprivileged Windows): fall back to a rename swap
+        logger.warning("Symlinks unavailable; publishing session=%s by rename", session_id)
+        retired = link + ".retired"
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.isdir(link):
+            os.replace(link, retired)
+        os.replace(version_path, link)
+        unpin_version(version_path)
+        shutil.rmtree(retired, ignore_errors=True)
+        return None
+
+    previous = None
+    if os.path.islink(link):
+        previous = os.path.realpath(link)
+    elif os.path.isdir(link):
+        # Pre-versioning layout: move the live directory under .versions once
+        previous = os.path.join(_versions_root(session_id, persist_dir), f"legacy-{time.time_ns()}")
+        os.replace(link, previous)
+
+    os.replace(tmp, link)
+    unpin_version(version_path)
+    if previous:
+        # Start the retired version's grace period now
+        os.utime(previous)
+    return previous
+
+
+def gc_versions(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR, grace_s: float = INDEX_VERSION_GRACE_S) -> int:
+    """
+    Deletes versions older than the live one that no process on the host
+    pins and that are untouched for grace_s. Newer versions are staged
+    writes (or about to be published) and are never collected.
+    Returns how many were removed.
+    """
+    root = _versions_root(session_id, persist_dir)
+    link = store_path(session_id, persist_dir)
+    if not os.path.isdir(root) or not os.path.islink(link):
+        return 0
+
+    current = os.path.realpath(link)
+    current_order = _version_order(os.path.basename(current))
+    if current_order is None:
+        return 0
+    now = time.time()
+    removed = 0
+    for entry in os.scandir(root):
+        order = _version_order(entry.name)
+        path = os.path.realpath(entry.path)
+        if order is None or order >= current_order or path == current:
+            continue
+        try:
+            if now - entry.stat().st_mtime < grace_s:
+                continue
+        except FileNotFoundError:
+            continue
+        if _remove_unpinned(path):
+            removed += 1
+    return removed
+
+
+def remove_versions(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR):
+    """Unpublishes the session and deletes every version (purge)."""
+    link = store_path(session_id, persist_dir)
+    if os.path.islink(link):
+        os.remove(link)
+    elif os.path.isdir(link):
+        retired = link + ".retired"
+        os.replace(link, retired)
+        shutil.rmtree(retired, ignore_errors=True)
+    shutil.rmtree(_versions_root(session_id, persist_dir), ignore_errors=True)
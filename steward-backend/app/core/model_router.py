@@ -0,0 +1,142 @@
+import os
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core import tracing
+from app.core.admission import llm_admission
+from app.core.resilience import get_caller
+
+logger = logging.getLogger("steward.model_router")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+FAST_LLM_MODEL = os.getenv("FAST_LLM_MODEL", "gpt-3.5-turbo")
+STRONG_LLM_MODEL = os.getenv("STRONG_LLM_MODEL", "gpt-4o")
+
+# Requests with more context than this go to the strong tier
+ROUTE_CONTEXT_TOKENS = int(os.getenv("ROUTE_CONTEXT_TOKENS", "3000"))
+# Queries whose best hit is less relevant than this go to the strong tier
+ROUTE_MIN_CONFIDENCE = float(os.getenv("ROUTE_MIN_CONFIDENCE", "0.78"))
+# Endpoints that always use the strong tier
+STRONG_ENDPOINTS = {
+    e.strip()
+    for e in os.getenv("ROUTE_STRONG_ENDPOINTS", "docs").split(",")
+    if e.strip()
+}
+
+LATENCY_WINDOW = 1000
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    name: str
+    model: str
+    timeout_s: float
+    max_tokens: int
+
+
+MODEL_TIERS = {
+    "fast": ModelTier(
+        name="fast",
+        model=FAST_LLM_MODEL,
+        timeout_s=float(os.getenv("FAST_LLM_TIMEOUT", "20")),
+        max_tokens=int(os.getenv("FAST_LLM_MAX_TOKENS", "700")),
+    ),
+    "strong": ModelTier(
+        name="strong",
+        model=STRONG_LLM_MODEL,
+        timeout_s=float(os.getenv("STRONG_LLM_TIMEOUT", "90")),
+        max_tokens=int(os.getenv("STRONG_LLM_MAX_TOKENS", "2500")),
+    ),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# ============================================================
+# Router
+# ============================================================
+
+class ModelRouter:
+    """
+    Picks a model tier per request and records routing decisions and
+    per-tier latency. Each tier has its own client, timeout and max_tokens.
+    """
+
+    def __init__(self, client_factory: Callable[[ModelTier], object], tiers: Dict[str, ModelTier] = MODEL_TIERS):
+        self.tiers = tiers
+        self.clients = {name: client_factory(tier) for name, tier in tiers.items()}
+
+        self._lock = Lock()
+        self._decisions: Dict[str, Dict[str, int]] = {}
+        self._reasons: Dict[str, int] = {}
+        self._latencies = {name: deque(maxlen=LATENCY_WINDOW) for name in tiers}
+        self._errors = {name: 0 for name in tiers}
+
+    def route(self, endpoint: str, context_tokens: int, top_relevance: Optional[float] = None) -> Tuple[str, str]:
+        if endpoint in STRONG_ENDPOINTS:
+            return "strong", "endpoint"
+        if context_tokens > ROUTE_CONTEXT_TOKENS:
+            return "strong", "context_size"
+        if top_relevance is not None and top_relevance < ROUTE_MIN_CONFIDENCE:
+            return "strong", "low_confidence"
+        return "fast", "default"
+
+    def predict(self, prompt: str, endpoint: str, top_relevance: Optional[float] = None, session_id: Optional[str] = None) -> str:
+        tier, reason = self.route(endpoint, estimate_tokens(prompt), top_relevance)
+
+        with self._lock:
+            per_endpoint = self._decisions.setdefault(endpoint, {})
+            per_endpoint[tier] = per_endpoint.get(tier, 0) + 1
+            self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+        logger.debug("route endpoint=%s tier=%s reason=%s", endpoint, tier, reason)
+
+        prompt_tokens = estimate_tokens(prompt)
+        tracing.annotate(llm_tier=tier, route_reason=reason, prompt_tokens=prompt_tokens)
+
+        # Raises Overloaded before any provider call when the queue is full
+        with llm_admission.slot(session_id, kind=endpoint):
+            return self._call(tier, prompt)
+
+    def _call(self, tier: str, prompt: str) -> str:
+        start = time.time()
+        try:
+            with tracing.span("llm"):
+                # Timeouts, retries, hedging and the circuit breaker live in the call layer
+                answer = get_caller(f"llm_{tier}").call(self.clients[tier].predict, prompt)
+            tracing.annotate(completion_tokens=estimate_tokens(answer))
+            return answer
+        except Exception:
+            with self._lock:
+                self._errors[tier] += 1
+            raise
+        finally:
+            with self._lock:
+                self._latencies[tier].append(time.time() - start)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            latency = {}
+            for name, samples in self._latencies.items():
+                ordered = sorted(samples)
+                latency[name] = {
+                    "model": self.tiers[name].model,
+                    "count": len(ordered),
+                    "errors": self._errors[name],
+                    "p50_s": round(ordered[len(ordered) // 2], 3) if ordered else None,
+                    "p95_s": round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 3) if ordered else None,
+                }
+            return {
+                "decisions": {e: dict(t) for e, t in self._decisions.items()},
+                "reasons": dict(self._reasons),
+                "latency": latency,
+            }
@@ -1,23 +1,40 @@
+from __future__ import annotations
+
 import os
 import time
+import asyncio
 import json
 import logging
 import hashlib
+import sqlite3
+import threading
 from threading import Lock
-from typing import Any, Dict, Tuple
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
 from datetime import datetime
 
 
 from dotenv import load_dotenv
-from langchain.chat_models import ChatOpenAI
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.vectorstores import Chroma
-
-from sentence_transformers import CrossEncoder
 
-import redis
 import pickle
 
+from app.core import tracing
+from app.core.admission import embed_admission, admission_metrics
+from app.core.resilience import ResilientEmbeddings, resilience_metrics, CALL_POLICIES
+from app.core.reranker import RerankBatcher, load_cross_encoder
+from app.core.index_version import get_generation, pin_version, store_path, unpin_version
+from app.core.sessions import touch as touch_session, validate_session_id
+from app.ingestion.summaries import compose_docs_context, load_summaries, summaries_generation
+from app.ingestion.graph import load_graph
+from app.core.model_router import ModelRouter, ModelTier
+
+# Heavy dependencies (langchain, sentence-transformers, redis) are imported
+# lazily by the component factories below so that importing this module,
+# and therefore binding the server, stays fast.
+if TYPE_CHECKING:
+    from app.vectorstores.base import VectorStore
+
 load_dotenv()
 
 # ============================================================
@@ -25,22 +42,56 @@ load_dotenv()
 # ============================================================
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "data/chroma")
 
-FAST_LLM_MODEL = os.getenv("FAST_LLM_MODEL", "gpt-3.5-turbo")
 TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))
 
 RETRIEVE_K = int(os.getenv("RETRIEVE_K", "4"))
-CACHE_TTL_SECONDS = int(os.getenv("RAG_CACHE_TTL", "300"))
+DOCS_RETRIEVE_K = int(os.getenv("DOCS_RETRIEVE_K", "12"))
+
+# Adaptive retrieval: over-fetch max_k once, then cut per request at the
+# first large relevance gap (never below min_k) and drop hits under the
+# relevance floor. Nothing above the floor means no LLM call at all.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "fixed")   # fixed | adaptive
+ADAPTIVE_MIN_RELEVANCE = float(os.getenv("ADAPTIVE_MIN_RELEVANCE", "0.72"))
+ADAPTIVE_SCORE_GAP = float(os.getenv("ADAPTIVE_SCORE_GAP", "0.05"))
+QUERY_DEPTH = (
+    int(os.getenv("ADAPTIVE_MIN_K", "2")),
+    int(os.getenv("ADAPTIVE_MAX_K", "10")),
+)
+DOCS_DEPTH = (
+    int(os.getenv("DOCS_ADAPTIVE_MIN_K", "6")),
+    int(os.getenv("DOCS_ADAPTIVE_MAX_K", "24")),
+)
+# Graph expansion: add up to BUDGET import/call-graph neighbors of the top
+# SEEDS hits (0 disables). Neighbors inherit their seed's score.
+GRAPH_EXPAND_BUDGET = int(os.getenv("GRAPH_EXPAND_BUDGET", "0"))
+GRAPH_EXPAND_SEEDS = int(os.getenv("GRAPH_EXPAND_SEEDS", "3"))
+# auto: reduce over ingest-time file/package summaries when they exist
+# for the current generation, else fall back to retrieved chunks
+DOCS_MODE = os.getenv("DOCS_MODE", "auto")   # auto | chunks
+BATCH_QUERY_CONCURRENCY = int(os.getenv("BATCH_QUERY_CONCURRENCY", "8"))
+FEDERATED_MAX_WORKERS = int(os.getenv("FEDERATED_MAX_WORKERS", "8"))
+# Cache keys carry the session's index generation, so entries self-invalidate
+# on re-ingest and can safely live for hours.
+CACHE_TTL_SECONDS = int(os.getenv("RAG_CACHE_TTL", "21600"))
 
 REDIS_URL = os.getenv("REDIS_URL")
+# On-disk cache shared by all worker processes on a host (used unless REDIS_URL is set)
+RAG_CACHE_PATH = os.getenv("RAG_CACHE_PATH")
+SQLITE_CACHE_SWEEP_EVERY = int(os.getenv("SQLITE_CACHE_SWEEP_EVERY", "1000"))
 LOG_LEVEL = os.getenv("RAG_LOG_LEVEL", "INFO")
 
+# Rerank over-fetched vector hits with the cross-encoder (app/core/reranker.py)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in {"1", "true", "yes"}
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+# Load all components in a background thread at startup instead of on first use
+WARMUP_ON_STARTUP = os.getenv("RAG_WARMUP", "false").lower() in {"1", "true", "yes"}
+
 logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger("steward.rag_engine")
 
-print("CHROMA_PERSIST_DIR:", os.path.abspath(CHROMA_PERSIST_DIR))
-
 # ============================================================
 # Prompt Templates
 # ============================================================
@@ -153,6 +204,8 @@ Code Context:
 Output:
 Well-structured markdown documentation.""".strip()
 
+NO_BUSINESS_CONTEXT = "No business context provided by the user."
+
 # ============================================================
 # Cache
 # ============================================================
@@ -182,6 +235,8 @@ class RedisCache:
     def __init__(self, url: str, ttl_seconds: int):
         self.ttl = ttl_seconds
         try:
+            import redis
+
             self.client = redis.StrictRedis.from_url(url)
             self.client.ping()
         except Exception:
@@ -197,6 +252,145 @@ class RedisCache:
         if self.client:
             self.client.setex(key, self.ttl, pickle.dumps(value))
 
+class SqliteCache:
+    """
+    TTL cache in a local SQLite file (WAL mode), so every worker process
+    on the host shares one cache instead of keeping N disjoint ones.
+    Connections are per thread and per process: nothing opened before a
+    fork is reused after it. Expired rows are swept every
+    SQLITE_CACHE_SWEEP_EVERY writes. Errors degrade to cache misses.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _conn(self) -> sqlite3.Connection:
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL, value BLOB)")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get(self, key: str):
+        try:
+            row = self._conn().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Cache read failed: %s", e)
+            return None
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any):
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl, pickle.dumps(value)),
+            )
+            self._writes += 1
+            if self._writes % SQLITE_CACHE_SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning("Cache write failed: %s", e)
+
+# ============================================================
+# Lazy components
+# ============================================================
+
+def _build_embeddings():
+    from langchain.embeddings import OpenAIEmbeddings
+
+    # Retries are owned by the call layer, not the client
+    return ResilientEmbeddings(
+        OpenAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            api_key=OPENAI_API_KEY,
+            request_timeout=CALL_POLICIES["embed_batch"].timeout_s,
+            max_retries=0,
+        )
+    )
+
+
+def _build_chat_client(tier: ModelTier):
+    from langchain.chat_models import ChatOpenAI
+
+    return ChatOpenAI(
+        model=tier.model,
+        temperature=TEMPERATURE,
+        api_key=OPENAI_API_KEY,
+        request_timeout=tier.timeout_s,
+        max_tokens=tier.max_tokens,
+        max_retries=0,
+    )
+
+
+def _build_llm():
+    # One client per model tier; the router picks a tier per request
+    return ModelRouter(_build_chat_client)
+
+
+def _build_reranker():
+    try:
+        return RerankBatcher(load_cross_encoder())
+    except Exception as e:
+        logger.warning("Reranker unavailable: %s", e)
+        return None
+
+
+def _build_vectorstore_opener():
+    from app.vectorstores.registry import open_store
+
+    return open_store
+
+
+# Warm-up loads components in this order
+COMPONENT_FACTORIES = {
+    "vectorstore": _build_vectorstore_opener,
+    "embeddings": _build_embeddings,
+    "llm": _build_llm,
+    "reranker": _build_reranker,
+}
+
+# ============================================================
+# Federation helpers
+# ============================================================
+
+_federation_pool = ThreadPoolExecutor(max_workers=FEDERATED_MAX_WORKERS, thread_name_prefix="steward-federated")
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def _distance_to_relevance(distance: float) -> float:
+    # Squared L2 between unit vectors is 2 - 2*cos
+    return max(0.0, min(1.0, 1.0 - distance / 2.0))
+
+
+class _PooledStore:
+    """
+    A store handle open on one immutable index version. `refs` counts
+    in-flight requests; a retired handle (a newer generation exists) is
+    closed (releasing the backend's per-path client) and its version
+    unpinned when the last of them finishes.
+    """
+    __slots__ = ("store", "path", "refs", "retired")
+
+    def __init__(self, store: VectorStore, path: str):
+        self.store = store
+        self.path = path
+        self.refs = 0
+        self.retired = False
+
 # ============================================================
 # RAG Engine
 # ============================================================
@@ -216,65 +410,492 @@ class RAGEngine:
             return
         self._initialized = True
 
-        self.embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
-
-        self.llm = ChatOpenAI(
-            model=FAST_LLM_MODEL,
-            temperature=TEMPERATURE,
-            api_key=OPENAI_API_KEY,
-        )
+        # Components are built on first use (or by warm_up)
+        self._components: Dict[str, Any] = {}
+        self._component_load_s: Dict[str, float] = {}
+        self._component_locks = {name: Lock() for name in COMPONENT_FACTORIES}
+        self._warmup_state = "idle"   # idle | running | done | failed
+        self._warmup_error: Optional[str] = None
+
+        if REDIS_URL:
+            self.cache = RedisCache(REDIS_URL, CACHE_TTL_SECONDS)
+        elif RAG_CACHE_PATH:
+            self.cache = SqliteCache(RAG_CACHE_PATH, CACHE_TTL_SECONDS)
+        else:
+            self.cache = TTLCache(CACHE_TTL_SECONDS)
+
+        self._stats_lock = Lock()
+        self._stats = {"queries": 0, "cache_hits": 0, "total_latency_s": 0.0}
+        self._chosen_k: Dict[int, int] = {}
+
+        # (session_id, generation) -> store handle, shared across requests
+        self._vectordbs: Dict[Tuple[str, int], _PooledStore] = {}
+        # version path -> open handles on it (pooled or retired but busy)
+        self._open_paths: Dict[str, int] = {}
+        self._vectordbs_lock = Lock()
+        # (session_id, generation) -> chunk id -> neighbor chunk ids
+        self._graphs: Dict[Tuple[str, int], dict] = {}
 
+    # ------------------
+    # Lazy components
+    # ------------------
+    def _component(self, name: str):
+        if name in self._components:
+            return self._components[name]
+        with self._component_locks[name]:
+            if name not in self._components:
+                start = time.time()
+                self._components[name] = COMPONENT_FACTORIES[name]()
+                self._component_load_s[name] = round(time.time() - start, 3)
+                logger.info("Loaded component %s in %.3fs", name, self._component_load_s[name])
+        return self._components[name]
+
+    @property
+    def embeddings(self):
+        return self._component("embeddings")
+
+    @property
+    def llm(self) -> ModelRouter:
+        return self._component("llm")
+
+    @property
+    def reranker(self):
+        return self._component("reranker")
+
+    def warm_up(self):
+        self._warmup_state = "running"
+        self._warmup_error = None
         try:
-            self.reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-        except Exception:
-            self.reranker = None
-
-        self.cache = RedisCache(REDIS_URL, CACHE_TTL_SECONDS) if REDIS_URL else TTLCache(CACHE_TTL_SECONDS)
+            for name in COMPONENT_FACTORIES:
+                self._component(name)
+            self._warmup_state = "done"
+        except Exception as e:
+            logger.exception("Warm-up failed")
+            self._warmup_error = f"{type(e).__name__}: {e}"
+            self._warmup_state = "failed"
+
+    def start_warmup(self):
+        if self._warmup_state in ("running", "done"):
+            return
+        self._warmup_state = "running"
+        threading.Thread(target=self.warm_up, name="steward-warmup", daemon=True).start()
+
+    def readiness(self) -> dict:
+        """
+        Cheap, side-effect free status for readiness probes.
+        Components load lazily, so the engine is ready unless a requested
+        warm-up is still running or has failed (the error is included).
+        """
+        return {
+            "ready": self._warmup_state not in ("running", "failed"),
+            "warmup": self._warmup_state,
+            "warmup_error": self._warmup_error,
+            "components": {
+                name: {
+                    "loaded": name in self._components,
+                    "load_s": self._component_load_s.get(name),
+                }
+                for name in COMPONENT_FACTORIES
+            },
+        }
 
     # ------------------
     # Vector DB helpers
     # ------------------
-    def _get_vectordb(self, session_id: str) -> Chroma:
-        path = os.path.join(CHROMA_PERSIST_DIR, session_id)
+    @contextmanager
+    def _vectordb(self, session_id: str):
+        """Yields the session's pooled store for the duration of one request."""
+        pooled = self._acquire_store(session_id)
+        try:
+            yield pooled.store
+        finally:
+            self._release_store(pooled)
+
+    def _acquire_store(self, session_id: str) -> _PooledStore:
+        # Reads touch session metadata and pin files; never outside the session's own paths
+        validate_session_id(session_id)
+        path = store_path(session_id, CHROMA_PERSIST_DIR)
         if not os.path.isdir(path):
             raise RuntimeError(f"No ingestion found for session_id={session_id}")
-        return Chroma(persist_directory=path, embedding_function=self.embeddings)
 
-    def _retrieve_docs(self,question: str,session_id: str,k: int = RETRIEVE_K,filters: dict | None = None,):
+        touch_session(session_id, CHROMA_PERSIST_DIR)
+
+        # Handles are pooled per index generation so a re-ingest
+        # transparently switches new requests to a fresh handle, while
+        # requests already running finish on the version they started with.
+        key = (session_id, get_generation(session_id, CHROMA_PERSIST_DIR))
+        with self._vectordbs_lock:
+            pooled = self._vectordbs.get(key)
+            if pooled is None:
+                for stale in self._retire_stores(session_id):
+                    self._close_store(stale)
+                # Open the resolved version, never the link, so a publish
+                # can't swap files under this handle
+                version = os.path.realpath(path)
+                pin_version(version)
+                open_store = self._component("vectorstore")
+                try:
+                    pooled = _PooledStore(open_store(version, embedding_model=EMBEDDING_MODEL), version)
+                except Exception:
+                    unpin_version(version)
+                    raise
+                self._open_paths[version] = self._open_paths.get(version, 0) + 1
+                self._vectordbs[key] = pooled
+            pooled.refs += 1
+        return pooled
+
+    def _release_store(self, pooled: _PooledStore):
+        with self._vectordbs_lock:
+            pooled.refs -= 1
+            if pooled.retired and pooled.refs == 0:
+                self._close_store(pooled)
+
+    def _retire_stores(self, session_id: str) -> list:
+        """Unpools a session's handles; returns the idle ones to close. Caller holds the lock."""
+        idle = []
+        for key in [k for k in self._vectordbs if k[0] == session_id]:
+            pooled = self._vectordbs.pop(key)
+            pooled.retired = True
+            if pooled.refs == 0:
+                idle.append(pooled)
+        return idle
+
+    def _close_store(self, pooled: _PooledStore):
+        """Caller holds the lock, so no handle can open the same version meanwhile."""
+        # Two generations can resolve to the same version (a read between
+        # publish and bump); chromadb shares one client system per path,
+        # so only the last handle on a path closes it
+        remaining = self._open_paths.get(pooled.path, 1) - 1
+        if remaining > 0:
+            self._open_paths[pooled.path] = remaining
+        else:
+            self._open_paths.pop(pooled.path, None)
+            try:
+                pooled.store.close()
+            except Exception as e:
+                logger.warning("Closing store %s failed: %s", pooled.path, e)
+        unpin_version(pooled.path)
+
+    def release_session(self, session_id: str):
+        """Retires pooled store handles for a session (after purge, compaction or import)."""
+        with self._vectordbs_lock:
+            for pooled in self._retire_stores(session_id):
+                self._close_store(pooled)
+            for key in [k for k in self._graphs if k[0] == session_id]:
+                del self._graphs[key]
+
+    def _get_graph(self, session_id: str) -> dict:
+        key = (session_id, get_generation(session_id, CHROMA_PERSIST_DIR))
+        with self._vectordbs_lock:
+            neighbors = self._graphs.get(key)
+        if neighbors is None:
+            # Ids are content hashes, so a graph from an earlier full ingest
+            # stays valid; neighbors missing from the store are skipped
+            neighbors = (load_graph(session_id, CHROMA_PERSIST_DIR) or {}).get("neighbors", {})
+            with self._vectordbs_lock:
+                for stale in [k for k in self._graphs if k[0] == session_id]:
+                    del self._graphs[stale]
+                self._graphs[key] = neighbors
+        return neighbors
+
+    def _expand_with_graph(self, docs: list[dict], session_id: str, vectordb: VectorStore, filters: dict | None) -> list[dict]:
+        """
+        Appends up to GRAPH_EXPAND_BUDGET direct graph neighbors (callees,
+        callers, class members) of the top hits, fetched by id.
+        """
+        if GRAPH_EXPAND_BUDGET <= 0 or not docs:
+            return docs
+        neighbors = self._get_graph(session_id)
+        if not neighbors:
+            return docs
+
+        seen = {d["chunk_id"] for d in docs}
+        picked: list[tuple[str, dict]] = []
+        for seed in docs[:GRAPH_EXPAND_SEEDS]:
+            for cid in neighbors.get(seed["chunk_id"], ()):
+                if cid not in seen:
+                    seen.add(cid)
+                    picked.append((cid, seed))
+        if not picked:
+            return docs
+
+        added = []
+        rows = {row["chunk_id"]: row for row in vectordb.get([cid for cid, _ in picked])}
+        for cid, seed in picked:
+            row = rows.get(cid)
+            if row is None or any(row["meta"].get(f) != v for f, v in (filters or {}).items()):
+                continue
+            added.append({**row, "score": seed["score"], "expanded_from": seed["chunk_id"]})
+            if len(added) >= GRAPH_EXPAND_BUDGET:
+                break
+        return docs + added
+
+    def _retrieve_docs(self,question: str,session_id: str,k: int = RETRIEVE_K,filters: dict | None = None,depth: tuple | None = QUERY_DEPTH,):
+        """
+        `depth` is the (min_k, max_k) window used in adaptive mode;
+        None forces a fixed top-k retrieval.
+        """
         #print("RETRIEVAL")
-        vectordb = self._get_vectordb(session_id)
-        docs = vectordb.similarity_search_with_score(
-            question,
-            k=k,
-            filter=filters or None,
+        timings: dict = {}
+        return self._retrieve_docs_timed(question, session_id, k, filters, depth, timings)
+
+    def _retrieve_docs_timed(self, question: str, session_id: str, k: int, filters: dict | None, depth: tuple | None, timings: dict):
+        """Same as _retrieve_docs, recording per-stage milliseconds into `timings`."""
+        start = time.perf_counter()
+        with self._vectordb(session_id) as vectordb:
+            timings["open_ms"] = _elapsed_ms(start)
+
+            start = time.perf_counter()
+            vector = self._embed_query(question, session_id)
+            timings["embed_ms"] = _elapsed_ms(start)
+
+            start = time.perf_counter()
+            fetch_k = self._fetch_k(k, depth)
+            docs = vectordb.search([vector], k=self._candidates_k(fetch_k), filters=filters)[0]
+            timings["search_ms"] = _elapsed_ms(start)
+
+            start = time.perf_counter()
+            docs = self._rerank(question, self._select_depth(docs, depth, session_id), fetch_k)
+            timings["rerank_ms"] = _elapsed_ms(start)
+
+            start = time.perf_counter()
+            found = len(docs)
+            docs = self._expand_with_graph(docs, session_id, vectordb, filters)
+            timings["graph_ms"] = _elapsed_ms(start)
+
+        tracing.record("open", timings["open_ms"])
+        tracing.record("embed", timings["embed_ms"])
+        tracing.record("search", timings["search_ms"])
+        tracing.record("rerank", timings["rerank_ms"])
+        tracing.record("graph", timings["graph_ms"])
+        tracing.annotate(k=found, graph_added=len(docs) - found)
+        return docs
+
+    @staticmethod
+    def _query_embedding_key(text: str) -> str:
+        # Query embeddings don't depend on the index, so no generation in the key
+        return json.dumps({
+            "kind": "embedding",
+            "model": EMBEDDING_MODEL,
+            "text": hashlib.sha256(text.strip().encode("utf-8")).hexdigest(),
+        })
+
+    def _embed_query(self, text: str, session_id: str | None = None) -> list:
+        cache_key = self._query_embedding_key(text)
+        vector = self.cache.get(cache_key)
+        if vector is None:
+            with embed_admission.slot(session_id, kind="query"):
+                vector = self.embeddings.embed_query(text)
+            self.cache.set(cache_key, vector)
+        return vector
+
+    def _embed_queries(self, texts: list[str], session_id: str | None = None) -> list:
+        """Batch counterpart of _embed_query: one upstream call for the cache misses only."""
+        keys = [self._query_embedding_key(t) for t in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            with embed_admission.slot(session_id, kind="query"):
+                embedded = self.embeddings.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+                self.cache.set(keys[i], vector)
+        return vectors
+
+    def _retrieve_docs_batch(self, questions: list[str], session_id: str, k: int = RETRIEVE_K, filters: dict | None = None, depth: tuple | None = QUERY_DEPTH):
+        """
+        Retrieves docs for many questions with a single batched embedding
+        call (cached questions are skipped) and a single multi-vector
+        search against one pooled handle.
+        """
+        with ExitStack() as stack:
+            with tracing.span("open"):
+                vectordb = stack.enter_context(self._vectordb(session_id))
+            with tracing.span("embed"):
+                vectors = self._embed_queries(questions, session_id)
+            fetch_k = self._fetch_k(k, depth)
+            with tracing.span("search"):
+                results = vectordb.search(vectors, k=self._candidates_k(fetch_k), filters=filters)
+            with tracing.span("rerank"):
+                results = [self._select_depth(docs, depth, session_id) for docs in results]
+                if RERANK_ENABLED:
+                    # Concurrent calls land in the same reranker micro-batch
+                    results = list(_federation_pool.map(lambda q, docs: self._rerank(q, docs, fetch_k), questions, results))
+                else:
+                    results = [docs[:fetch_k] for docs in results]
+            with tracing.span("graph"):
+                return [self._expand_with_graph(docs, session_id, vectordb, filters) for docs in results]
+
+    def _retrieve_docs_federated(self, question: str, session_ids: list[str], k: int = RETRIEVE_K, filters: dict | None = None, depth: tuple | None = QUERY_DEPTH):
+        """
+        Searches several session indexes concurrently with one shared query
+        embedding and merges the hits into a single global top-k.
+
+        All sessions share the same embedding model, so distances are
+        comparable; they are normalized to a [0, 1] relevance (cosine
+        similarity for unit vectors on the stores' squared-L2 scale) before
+        merging, and every hit is tagged with its session.
+        """
+        handles = {}
+        with ExitStack() as stack:
+            with tracing.span("open"):
+                for sid in session_ids:
+                    try:
+                        handles[sid] = stack.enter_context(self._vectordb(sid))
+                    except RuntimeError:
+                        logger.warning("Federated query skipping unknown session_id=%s", sid)
+            if not handles:
+                raise RuntimeError(f"No ingestion found for session_ids={session_ids}")
+
+            with tracing.span("embed"):
+                vector = self._embed_query(question, ",".join(handles))
+
+            fetch_k = self._fetch_k(k, depth)
+            with tracing.span("search"):
+                futures = {
+                    sid: _federation_pool.submit(vectordb.search, [vector], self._candidates_k(fetch_k), filters)
+                    for sid, vectordb in handles.items()
+                }
+
+                merged = []
+                for sid, future in futures.items():
+                    for d in future.result()[0]:
+                        d["session_id"] = sid
+                        d["relevance"] = _distance_to_relevance(d["score"])
+                        merged.append(d)
+
+        merged.sort(key=lambda d: d["relevance"], reverse=True)
+        docs = self._select_depth(merged[:self._candidates_k(fetch_k)], depth, ",".join(handles))
+        with tracing.span("rerank"):
+            docs = self._rerank(question, docs, fetch_k)
+        tracing.annotate(k=len(docs))
+        return docs
+
+    # ------------------
+    # Adaptive depth
+    # ------------------
+    def _fetch_k(self, k: int, depth: tuple | None) -> int:
+        if RETRIEVAL_MODE == "adaptive" and depth:
+            return depth[1]
+        return k
+
+    def _candidates_k(self, fetch_k: int) -> int:
+        return max(fetch_k, RERANK_CANDIDATES) if RERANK_ENABLED else fetch_k
+
+    def _rerank(self, question: str, docs: list[dict], keep: int) -> list[dict]:
+        """
+        Reorders over-fetched hits by cross-encoder score and keeps the best
+        `keep`. Falls back to vector order if the reranker is unavailable.
+        In adaptive mode it runs after the depth cut, which needs hits in
+        vector-relevance order, and only reorders the hits that were kept.
+        """
+        if not RERANK_ENABLED or len(docs) <= 1:
+            return docs[:keep]
+        reranker = self.reranker
+        if reranker is None:
+            return docs[:keep]
+
+        try:
+            scores = reranker.score([(question, d["text"]) for d in docs])
+        except Exception as e:
+            logger.warning("Rerank failed, keeping vector order: %s", e)
+            return docs[:keep]
+        for d, score in zip(docs, scores):
+            d["rerank_score"] = score
+        return sorted(docs, key=lambda d: d["rerank_score"], reverse=True)[:keep]
+
+    def _select_depth(self, docs: list[dict], depth: tuple | None, label: str) -> list[dict]:
+        """
+        Chooses how many of the over-fetched, best-first docs to keep:
+        everything above ADAPTIVE_MIN_RELEVANCE, cut at the first relevance
+        drop of at least ADAPTIVE_SCORE_GAP past min_k, capped at max_k.
+        """
+        if RETRIEVAL_MODE != "adaptive" or not depth:
+            return docs
+
+        min_k, max_k = depth
+        relevances = [_distance_to_relevance(d["score"]) for d in docs[:max_k]]
+
+        keep = 0
+        while keep < len(relevances) and relevances[keep] >= ADAPTIVE_MIN_RELEVANCE:
+            keep += 1
+
+        for i in range(max(min_k, 1), keep):
+            if relevances[i - 1] - relevances[i] >= ADAPTIVE_SCORE_GAP:
+                keep = i
+                break
+
+        logger.info(
+            "adaptive retrieval session=%s fetched=%d chosen_k=%d top_relevance=%.3f",
+            label, len(docs), keep, relevances[0] if relevances else 0.0,
         )
+        with self._stats_lock:
+            self._chosen_k[keep] = self._chosen_k.get(keep, 0) + 1
+
+        return docs[:keep]
 
-        return [
-            {
-            "chunk_id": d.metadata.get("chunk_id"),
-            "text": d.page_content,
-            "meta": d.metadata,
-            "score": float(score),
-            }
-            for d, score in docs
-        ]
-        
     def _build_context(self, docs):
         return "\n\n".join(
-            f"[CHUNK {d['chunk_id']} | {d['meta'].get('file_path')}]\n{d['text']}"
+            f"[CHUNK {d['chunk_id']} | {self._source_label(d)}]\n{d['text']}"
             for d in docs
         )
 
+    def _source_label(self, d: dict) -> str:
+        path = d["meta"].get("file_path")
+        return f"{d['session_id']}:{path}" if d.get("session_id") else path
+
     # ============================================================
     # QUERY (read-only)
     # ============================================================
-    def query(self, question: str, session_id: str, filters: dict | None = None):
+    def query(self, question: str, session_id: str | list[str], filters: dict | None = None):
+        """
+        Answers a question against one session, or against several
+        (federated) when given a list of session ids.
+        """
+        start = time.time()
+        filters = self._normalize_filters(filters)
+        session_ids = [session_id] if isinstance(session_id, str) else list(dict.fromkeys(session_id))
+        tracing.annotate(session_id=",".join(session_ids), question_hash=tracing.question_hash(question))
+
+        cache_key = self._query_cache_key(
+            session_id=session_ids,
+            question=question,
+            filters=filters,
+        )
+
+        with tracing.span("cache"):
+            cached = self.cache.get(cache_key)
+        tracing.annotate(cache_hit=bool(cached))
+        if cached:
+            self._record_query(start, cache_hit=True)
+            return cached
+
+        if len(session_ids) == 1:
+            result = self._answer_query(question, session_ids[0], filters)
+        else:
+            result = self._answer_federated(question, session_ids, filters)
+
+        self.cache.set(cache_key, result)
+        self._record_query(start, cache_hit=False)
+        return result
+
+    def _answer_query(self, question: str, session_id: str, filters: dict | None):
         docs = self._retrieve_docs(
             question=question,
             session_id=session_id,
             filters=filters,
         )
+        return self._answer_from_docs(question, docs, session_id)
 
+    def _answer_federated(self, question: str, session_ids: list[str], filters: dict | None):
+        docs = self._retrieve_docs_federated(
+            question=question,
+            session_ids=session_ids,
+            filters=filters,
+        )
+        return self._answer_from_docs(question, docs, ",".join(session_ids))
+
+    def _answer_from_docs(self, question: str, docs: list[dict], session_id: str | None = None):
         if not docs:
             return {
                 "answer": "This information is not present in the uploaded codebase.",
@@ -287,7 +908,10 @@ class RAGEngine:
             CITED_QUERY_PROMPT.format(
                 context=context,
                 question=question,
-            )
+            ),
+            endpoint="query",
+            top_relevance=max(_distance_to_relevance(d["score"]) for d in docs),
+            session_id=session_id,
         ).strip()
 
         # ENFORCEMENT
@@ -316,28 +940,147 @@ class RAGEngine:
             }
 
         sources = sorted({
-            d["meta"].get("file_path")
+            self._source_label(d)
             for d in docs
             if d["meta"].get("file_path")
         })
 
-        return {
+        result = {
             "answer": "\n".join(accepted_lines),
             "sources": sources,
         }
 
+        # Federated answers attribute sources to the repo they came from
+        if any(d.get("session_id") for d in docs):
+            by_session: dict[str, set] = {}
+            for d in docs:
+                if d["meta"].get("file_path"):
+                    by_session.setdefault(d["session_id"], set()).add(d["meta"]["file_path"])
+            result["sources_by_session"] = {sid: sorted(paths) for sid, paths in by_session.items()}
+
+        return result
+
+    # ============================================================
+    # QUERY BATCH
+    # ============================================================
+    def prepare_batch(self, questions: list[str], session_id: str, filters: dict | None = None):
+        """
+        Resolves cache hits and retrieves docs for the remaining questions
+        in one batched pass. Returns one entry per question:
+        ("cached", result) or ("docs", docs, cache_key).
+        """
+        filters = self._normalize_filters(filters)
+        prepared: list = [None] * len(questions)
+        pending: list[int] = []
+
+        for i, question in enumerate(questions):
+            cache_key = self._query_cache_key(session_id, question, filters)
+            cached = self.cache.get(cache_key)
+            if cached:
+                self._record_query(time.time(), cache_hit=True)
+                prepared[i] = ("cached", cached)
+            else:
+                prepared[i] = ("docs", None, cache_key)
+                pending.append(i)
+
+        if pending:
+            batch_docs = self._retrieve_docs_batch(
+                [questions[i] for i in pending],
+                session_id,
+                filters=filters,
+            )
+            for i, docs in zip(pending, batch_docs):
+                prepared[i] = ("docs", docs, prepared[i][2])
+
+        return prepared
+
+    def answer_prepared(self, question: str, docs: list[dict], cache_key: str, session_id: str | None = None):
+        start = time.time()
+        result = self._answer_from_docs(question, docs, session_id)
+        self.cache.set(cache_key, result)
+        self._record_query(start, cache_hit=False)
+        return result
+
+    # ============================================================
+    # RETRIEVE (no LLM)
+    # ============================================================
+    def retrieve(self, question: str, session_id: str, filters: dict | None = None, k: int | None = None):
+        """
+        Returns the ranked chunks for a question without calling the LLM,
+        with per-stage timings. An explicit k forces fixed-depth retrieval.
+        """
+        start = time.perf_counter()
+        filters = self._normalize_filters(filters)
+        timings: dict = {}
+        tracing.annotate(session_id=session_id, question_hash=tracing.question_hash(question))
+
+        cache_key = json.dumps(
+            {
+            "kind": "retrieve",
+            "session_id": session_id,
+            "generation": get_generation(session_id, CHROMA_PERSIST_DIR),
+            "question": hashlib.sha256(question.strip().encode("utf-8")).hexdigest(),
+            "filters": filters or {},
+            "k": k,
+            },
+            sort_keys=True,
+        )
+
+        with tracing.span("cache"):
+            chunks = self.cache.get(cache_key)
+        cached = chunks is not None
+        tracing.annotate(cache_hit=cached)
+        if not cached:
+            docs = self._retrieve_docs_timed(
+                question,
+                session_id,
+                k or RETRIEVE_K,
+                filters,
+                None if k else QUERY_DEPTH,
+                timings,
+            )
+            chunks = [
+                {
+                "chunk_id": d["chunk_id"],
+                "text": d["text"],
+                "file_path": d["meta"].get("file_path"),
+                "symbol": d["meta"].get("symbol"),
+                "start_line": d["meta"].get("start_line"),
+                "end_line": d["meta"].get("end_line"),
+                "score": d["score"],
+                "relevance": round(_distance_to_relevance(d["score"]), 4),
+                "rerank_score": d.get("rerank_score"),
+                "expanded_from": d.get("expanded_from"),
+                "meta": d["meta"],
+                }
+                for d in docs
+            ]
+            self.cache.set(cache_key, chunks)
+
+        timings["total_ms"] = _elapsed_ms(start)
+        return {
+            "session_id": session_id,
+            "chunks": chunks,
+            "cached": cached,
+            "timings": timings,
+        }
+
     # ============================================================
     # SUGGEST (propositional)
     # ============================================================
     def suggest(self, question: str, session_id: str):
-        docs = self._retrieve_docs(question, session_id)
+        tracing.annotate(session_id=session_id, question_hash=tracing.question_hash(question))
+        # Feature requests are by definition not in the code: keep a fixed k
+        docs = self._retrieve_docs(question, session_id, depth=None)
         context = self._build_context(docs)
 
         proposal = self.llm.predict(
             SUGGEST_PROMPT.format(
                 context=context,
                 question=question,
-            )
+            ),
+            endpoint="suggest",
+            session_id=session_id,
         ).strip()
 
         return {
@@ -349,12 +1092,12 @@ class RAGEngine:
     # ============================================================
     # GENERATE DOCS
     # ============================================================
-    def generate_docs(self,session_id: str,doc_type: str,audience: str,business_context: str | None,k: int = 12,):
+    def generate_docs(self,session_id: str,doc_type: str,audience: str,business_context: str | None,k: int = DOCS_RETRIEVE_K,):
         # Normalize empty business context
         if business_context is not None and not business_context.strip():
             business_context = None
         
-        prompt_business_context = (business_context if business_context is not None else "No business context provided by the user.")
+        prompt_business_context = (business_context if business_context is not None else NO_BUSINESS_CONTEXT)
 
         cache_key = self._docs_cache_key(
             session_id=session_id,
@@ -363,7 +1106,10 @@ class RAGEngine:
             business_context=prompt_business_context,
         )
 
-        cached = self.cache.get(cache_key)
+        tracing.annotate(session_id=session_id, doc_type=doc_type, audience=audience)
+        with tracing.span("cache"):
+            cached = self.cache.get(cache_key)
+        tracing.annotate(cache_hit=bool(cached))
         if cached:
             return cached
 
@@ -371,12 +1117,7 @@ class RAGEngine:
         query_hint = doc_type.replace("_", " ")
         if doc_type == "onboarding":
             query_hint = "entrypoint overview main app config routing"
-        vectordb = self._get_vectordb(session_id)
-
-        docs = vectordb.similarity_search_with_score(
-            query_hint,
-            k=k,
-        )
+        docs = self._retrieve_docs(query_hint, session_id, k=k, depth=DOCS_DEPTH)
 
         if not docs:
             result = {
@@ -389,15 +1130,23 @@ class RAGEngine:
             self.cache.set(cache_key, result)
             return result
 
-        normalized = [
-            {"text": d.page_content, "meta": d.metadata, "score": float(s)}
-            for d, s in docs
-        ]
-
         context = "\n\n".join(
             f"[{d['meta'].get('file_path', 'unknown')}]\n{d['text']}"
-            for d in normalized
+            for d in docs
         )
+        sources = list({
+            d["meta"].get("file_path")
+            for d in docs
+            if d["meta"].get("file_path")
+        })
+
+        # Reduce step: the package tree plus summaries of the most relevant
+        # files cover far more of the repo than k raw chunks, in bounded tokens
+        summaries = load_summaries(session_id, CHROMA_PERSIST_DIR) if self._docs_mode(session_id) == "summaries" else None
+        if summaries and summaries.get("packages"):
+            focus = list(dict.fromkeys(d["meta"].get("file_path") for d in docs if d["meta"].get("file_path")))
+            context, sources = compose_docs_context(summaries, focus)
+            tracing.annotate(docs_mode="summaries")
 
         # DEFINE content BEFORE using it
         content = self.llm.predict(
@@ -406,15 +1155,11 @@ class RAGEngine:
                 audience=audience,
                 business_context=business_context or "None provided",
                 context=context,
-            )
+            ),
+            endpoint="docs",
+            session_id=session_id,
         ).strip()
 
-        sources = list({
-            d["meta"].get("file_path")
-            for d in normalized
-            if d["meta"].get("file_path")
-        })
-
         result = {
             "doc_type": doc_type,
             "audience": audience,
@@ -427,6 +1172,17 @@ class RAGEngine:
         return result
 
 
+    def is_docs_cached(self, session_id: str, doc_type: str, audience: str, business_context: str | None = None) -> bool:
+        if business_context is not None and not business_context.strip():
+            business_context = None
+        cache_key = self._docs_cache_key(
+            session_id=session_id,
+            doc_type=doc_type,
+            audience=audience,
+            business_context=business_context if business_context is not None else NO_BUSINESS_CONTEXT,
+        )
+        return self.cache.get(cache_key) is not None
+
     # ============================================================
     # HASH BUSINESS CONTEXT 
     # ============================================================
@@ -438,10 +1194,24 @@ class RAGEngine:
     # ============================================================
     # CACHE KEY
     # ============================================================
+    def _docs_mode(self, session_id: str) -> str:
+        """
+        "summaries" once summaries for the current index generation are
+        saved, else "chunks" (DOCS_MODE=chunks, or still being built).
+        """
+        if DOCS_MODE == "auto" and summaries_generation(session_id, CHROMA_PERSIST_DIR) == get_generation(session_id, CHROMA_PERSIST_DIR):
+            return "summaries"
+        return "chunks"
+
     def _docs_cache_key(self,session_id: str,doc_type: str,audience: str,business_context: str | None,) -> str:
         return json.dumps(
             {
+            "kind": "docs",
             "session_id": session_id,
+            "generation": get_generation(session_id, CHROMA_PERSIST_DIR),
+            # Chunk-context docs cached while summaries were pending must
+            # not be served (or skipped by prewarm) once they land
+            "mode": self._docs_mode(session_id),
             "doc_type": doc_type,
             "audience": audience,
             "business_ctx": self._hash_business_context(business_context),
@@ -449,21 +1219,111 @@ class RAGEngine:
             sort_keys=True,
         )
 
+    def _query_cache_key(self, session_id: str | list[str], question: str, filters: dict | None) -> str:
+        session_ids = [session_id] if isinstance(session_id, str) else sorted(session_id)
+        return json.dumps(
+            {
+            "kind": "query",
+            "sessions": {
+                sid: get_generation(sid, CHROMA_PERSIST_DIR)
+                for sid in session_ids
+            },
+            "question": hashlib.sha256(question.strip().encode("utf-8")).hexdigest(),
+            "filters": filters or {},
+            },
+            sort_keys=True,
+        )
+
+    # ============================================================
+    # FILTERS
+    # ============================================================
+    def _normalize_filters(self, filters) -> dict | None:
+        """
+        Accepts a QueryFilters model or a plain dict and returns a plain
+        dict without empty values (None if nothing is set).
+        """
+        if filters is None:
+            return None
+        if hasattr(filters, "model_dump"):
+            filters = filters.model_dump()
+        filters = {k: v for k, v in filters.items() if v is not None}
+        return filters or None
+
+    # ============================================================
+    # METRICS
+    # ============================================================
+    def _record_query(self, start: float, cache_hit: bool):
+        with self._stats_lock:
+            self._stats["queries"] += 1
+            self._stats["total_latency_s"] += time.time() - start
+            if cache_hit:
+                self._stats["cache_hits"] += 1
+
+    def get_metrics(self) -> dict:
+        with self._stats_lock:
+            queries = self._stats["queries"]
+            return {
+                "queries": queries,
+                "cache_hits": self._stats["cache_hits"],
+                "avg_latency_s": round(self._stats["total_latency_s"] / queries, 3) if queries else 0.0,
+                "retrieval_mode": RETRIEVAL_MODE,
+                "adaptive_chosen_k": dict(sorted(self._chosen_k.items())),
+                # Only reported once the LLM clients exist; never loads them
+                "routing": self._components["llm"].metrics() if "llm" in self._components else None,
+                "admission": admission_metrics(),
+                "upstream": resilience_metrics(),
+                # Micro-batching stats, once the reranker has been loaded
+                "reranker": self._components["reranker"].metrics() if self._components.get("reranker") else None,
+            }
+
 
 # ============================================================
 # Public API wrappers (NO shadowing)
 # ============================================================
 
+# Cheap: components are loaded lazily or by warm-up
 _engine = RAGEngine()
 
 
-def run_query(question: str, session_id: str, filters: dict | None = None):
+def run_query(question: str, session_id: str | list[str], filters: dict | None = None):
     return _engine.query(
         question=question,
         session_id=session_id,
         filters=filters,
     )
 
+async def stream_query_batch(questions: list[str], session_id: str, filters: dict | None = None, max_concurrency: int = BATCH_QUERY_CONCURRENCY):
+    """
+    Yields one result dict per question, in completion order.
+    Failures are reported per item instead of aborting the batch.
+    """
+    try:
+        prepared = await asyncio.to_thread(_engine.prepare_batch, questions, session_id, filters)
+    except Exception as e:
+        for i, question in enumerate(questions):
+            yield {"index": i, "question": question, "error": str(e)}
+        return
+
+    semaphore = asyncio.Semaphore(max(1, min(max_concurrency, BATCH_QUERY_CONCURRENCY)))
+
+    async def _run(i: int):
+        question = questions[i]
+        entry = prepared[i]
+        if entry[0] == "cached":
+            return {"index": i, "question": question, **entry[1]}
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(_engine.answer_prepared, question, entry[1], entry[2], session_id)
+                return {"index": i, "question": question, **result}
+            except Exception as e:
+                return {"index": i, "question": question, "error": str(e)}
+
+    for task in asyncio.as_completed([_run(i) for i in range(len(questions))]):
+        yield await task
+
+def run_retrieve(question: str, session_id: str, filters: dict | None = None, k: int | None = None):
+    return _engine.retrieve(question=question, session_id=session_id, filters=filters, k=k)
+
 def run_suggest(question: str, session_id: str):
     return _engine.suggest(question=question, session_id=session_id)
 
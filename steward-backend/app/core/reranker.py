@@ -0,0 +1,220 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from threading import Condition, Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("steward.reranker")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# torch | quantized (dynamic int8 Linear layers) | onnx (needs sentence-transformers[onnx])
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+# ONNX file inside the model repo, e.g. onnx/model_qint8_avx512.onnx for a quantized export
+RERANKER_ONNX_FILE = os.getenv("RERANKER_ONNX_FILE")
+# Intra-op threads for forward passes; bounds how much CPU reranking can take
+RERANK_THREADS = int(os.getenv("RERANK_THREADS", "2"))
+
+# A batch closes at RERANK_MAX_BATCH pairs or RERANK_MAX_WAIT_MS after its
+# first request arrived, whichever comes first
+RERANK_MAX_BATCH = int(os.getenv("RERANK_MAX_BATCH", "64"))
+RERANK_MAX_WAIT_MS = float(os.getenv("RERANK_MAX_WAIT_MS", "5"))
+RERANK_TIMEOUT_S = float(os.getenv("RERANK_TIMEOUT_S", "10"))
+
+LATENCY_WINDOW = 1000
+
+
+# ============================================================
+# Model
+# ============================================================
+
+def load_cross_encoder(model_name: str = RERANKER_MODEL, backend: str = RERANKER_BACKEND):
+    """Builds the CrossEncoder for the configured CPU variant."""
+    # Imported lazily: sentence-transformers pulls in torch
+    from sentence_transformers import CrossEncoder
+
+    if backend == "onnx":
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = RERANK_THREADS
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": options}
+        if RERANKER_ONNX_FILE:
+            model_kwargs["file_name"] = RERANKER_ONNX_FILE
+        return CrossEncoder(model_name, backend="onnx", model_kwargs=model_kwargs)
+
+    model = CrossEncoder(model_name, device="cpu")
+    if backend == "quantized":
+        import torch
+
+        model.model = torch.quantization.quantize_dynamic(model.model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend != "torch":
+        raise ValueError(f"Unknown RERANKER_BACKEND: {backend}")
+    return model
+
+
+# ============================================================
+# Micro-batching scheduler
+# ============================================================
+
+class RerankBatcher:
+    """
+    Dynamic micro-batching in front of a cross-encoder. Concurrent callers
+    enqueue their (question, text) pairs; one scheduler thread collects
+    them for up to RERANK_MAX_WAIT_MS or RERANK_MAX_BATCH pairs, scores
+    the whole batch in one forward pass and routes the scores back.
+
+    The thread is started lazily in the process that first scores, so an
+    instance built before a fork (gunicorn preload) works in every worker.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_batch: int = RERANK_MAX_BATCH,
+        max_wait_ms: float = RERANK_MAX_WAIT_MS,
+        threads: int = RERANK_THREADS,
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.threads = threads
+
+        self._queue: deque = deque()
+        self._cond = Condition()
+        self._pid: Optional[int] = None
+
+        self._lock = Lock()
+        self._started_at = time.monotonic()
+        self._counts = {"requests": 0, "pairs": 0, "batches": 0, "failed_batches": 0}
+        self._busy_s = 0.0
+        self._batch_sizes: Dict[int, int] = {}
+        self._waits = deque(maxlen=LATENCY_WINDOW)
+        self._forwards = deque(maxlen=LATENCY_WINDOW)
+
+    def score(self, pairs: Sequence[Tuple[str, str]], timeout_s: float = RERANK_TIMEOUT_S) -> List[float]:
+        if not pairs:
+            return []
+        self._ensure_thread()
+
+        future: Future = Future()
+        with self._cond:
+            self._queue.append((list(pairs), future, time.monotonic()))
+            self._cond.notify()
+        try:
+            return future.result(timeout=timeout_s)
+        except FutureTimeout:
+            # Still queued: the scheduler skips it. Already running: result is dropped
+            future.cancel()
+            raise
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid != os.getpid():
+                # A queue inherited across fork belongs to callers in the parent
+                self._queue.clear()
+                threading.Thread(target=self._run, name="steward-rerank", daemon=True).start()
+                self._pid = os.getpid()
+
+    # ------------------
+    # Scheduler
+    # ------------------
+    def _run(self):
+        self._limit_threads()
+        while True:
+            # Claim each future; callers that gave up while queued drop out
+            batch = [item for item in self._next_batch() if item[1].set_running_or_notify_cancel()]
+            if batch:
+                self._forward(batch)
+
+    def _next_batch(self) -> list:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0][2] + self.max_wait_s
+            while sum(len(item[0]) for item in self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Always take at least one request, even if it alone exceeds the cap
+            batch = [self._queue.popleft()]
+            size = len(batch[0][0])
+            while self._queue and size + len(self._queue[0][0]) <= self.max_batch:
+                item = self._queue.popleft()
+                batch.append(item)
+                size += len(item[0])
+            return batch
+
+    def _forward(self, batch: list):
+        pairs = [pair for item in batch for pair in item[0]]
+        started = time.monotonic()
+        try:
+            scores = self.model.predict(pairs, batch_size=max(len(pairs), 1), show_progress_bar=False)
+        except Exception as e:
+            logger.warning("Rerank batch of %d pairs failed: %s", len(pairs), e)
+            with self._lock:
+                self._counts["failed_batches"] += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        elapsed = time.monotonic() - started
+
+        offset = 0
+        for item_pairs, future, _ in batch:
+            future.set_result([float(s) for s in scores[offset:offset + len(item_pairs)]])
+            offset += len(item_pairs)
+
+        bucket = 1 << max(0, len(pairs) - 1).bit_length()
+        with self._lock:
+            self._counts["requests"] += len(batch)
+            self._counts["pairs"] += len(pairs)
+            self._counts["batches"] += 1
+            self._busy_s += elapsed
+            self._batch_sizes[bucket] = self._batch_sizes.get(bucket, 0) + 1
+            self._forwards.append(elapsed)
+            self._waits.extend(started - enqueued for _, _, enqueued in batch)
+
+    def _limit_threads(self):
+        try:
+            import torch
+
+            torch.set_num_threads(self.threads)
+        except Exception as e:
+            logger.debug("Could not limit torch threads: %s", e)
+
+    # ------------------
+    # Metrics
+    # ------------------
+    def metrics(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            waits = sorted(self._waits)
+            forwards = sorted(self._forwards)
+            busy_s = self._busy_s
+            sizes = dict(sorted(self._batch_sizes.items()))
+
+        def pct(values, p):
+            return round(values[max(0, int(len(values) * p) - 1)] * 1000, 2) if values else None
+
+        return {
+            **counts,
+            "max_batch": self.max_batch,
+            "max_wait_ms": round(self.max_wait_s * 1000, 2),
+            "avg_batch_pairs": round(counts["pairs"] / counts["batches"], 2) if counts["batches"] else None,
+            # Keys are upper bounds: {4: n} counts batches of 3-4 pairs
+            "batch_size_histogram": {f"<={size}": n for size, n in sizes.items()},
+            "queue_wait_ms": {"p50": pct(waits, 0.5), "p95": pct(waits, 0.95)},
+            "forward_ms": {"p50": pct(forwards, 0.5), "p95": pct(forwards, 0.95)},
+            "pairs_per_busy_s": round(counts["pairs"] / busy_s, 1) if busy_s else None,
+            "pairs_per_s": round(counts["pairs"] / (time.monotonic() - self._started_at), 2),
+        }
@@ -0,0 +1,339 @@
+import os
+import time
+import random
+import logging
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Optional
+
+from app.core.admission import Overloaded
+
+logger = logging.getLogger("steward.resilience")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+@dataclass(frozen=True)
+class CallPolicy:
+    timeout_s: float
+    max_retries: int
+    hedge: bool
+
+
+CALL_POLICIES = {
+    "llm_fast": CallPolicy(
+        timeout_s=float(os.getenv("FAST_LLM_TIMEOUT", "20")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        hedge=os.getenv("LLM_HEDGE", "false").lower() in {"1", "true", "yes"},
+    ),
+    "llm_strong": CallPolicy(
+        timeout_s=float(os.getenv("STRONG_LLM_TIMEOUT", "90")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+        # Long generations are too expensive to duplicate
+        hedge=False,
+    ),
+    "embed_query": CallPolicy(
+        timeout_s=float(os.getenv("EMBED_QUERY_TIMEOUT", "5")),
+        max_retries=int(os.getenv("EMBED_MAX_RETRIES", "3")),
+        hedge=os.getenv("EMBED_HEDGE", "true").lower() in {"1", "true", "yes"},
+    ),
+    "embed_batch": CallPolicy(
+        timeout_s=float(os.getenv("EMBED_BATCH_TIMEOUT", "60")),
+        max_retries=int(os.getenv("EMBED_MAX_RETRIES", "3")),
+        hedge=False,
+    ),
+}
+
+RETRY_BASE_S = float(os.getenv("RETRY_BASE_S", "0.2"))
+RETRY_MAX_BACKOFF_S = float(os.getenv("RETRY_MAX_BACKOFF_S", "5"))
+# Each call earns this fraction of a retry; caps retries at ~10% of traffic
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "10"))
+
+# Hedge once a call has run longer than the recent p95 (never sooner than the floor)
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY_S = float(os.getenv("HEDGE_MIN_DELAY_S", "0.05"))
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN_S = float(os.getenv("BREAKER_COOLDOWN_S", "30"))
+
+RESILIENCE_MAX_WORKERS = int(os.getenv("RESILIENCE_MAX_WORKERS", "64"))
+LATENCY_WINDOW = 1000
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_NAMES = ("Timeout", "Connection", "RateLimit", "ServiceUnavailable", "InternalServer", "APIError")
+
+# Calls run on this pool so a stuck upstream call only costs a thread,
+# never the request that is waiting on it
+_pool = ThreadPoolExecutor(max_workers=RESILIENCE_MAX_WORKERS, thread_name_prefix="steward-call")
+
+
+class CallTimeout(TimeoutError):
+    pass
+
+
+class CircuitOpen(Overloaded):
+    """Upstream is failing; reject immediately (503) until the cooldown passes."""
+
+    def __init__(self, name: str, retry_after_s: int):
+        super().__init__(name, "circuit_open", retry_after_s)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (CallTimeout, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(name in type(exc).__name__ for name in RETRYABLE_NAMES)
+
+
+# ============================================================
+# Building blocks
+# ============================================================
+
+class RetryBudget:
+    """Token bucket: every call deposits RETRY_BUDGET_RATIO, every retry spends 1."""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, maximum: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.maximum = maximum
+        self._tokens = maximum
+        self._lock = Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.maximum, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Opens after BREAKER_FAILURES consecutive failures, rejects calls for
+    BREAKER_COOLDOWN_S, then lets a single probe through (half-open).
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown_s: float = BREAKER_COOLDOWN_S):
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self.state = "closed"
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown_s:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_after(self) -> int:
+        return max(1, int(self.cooldown_s - (time.monotonic() - self._opened_at)) + 1)
+
+    def release(self):
+        """Frees the probe slot without an outcome, e.g. after a client error."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._consecutive = 0
+                self.state = "closed"
+                return
+            self._consecutive += 1
+            if self.state == "half_open" or self._consecutive >= self.failures:
+                if self.state != "open":
+                    logger.warning("Circuit opened after %d consecutive failures", self._consecutive)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+# ============================================================
+# Resilient caller
+# ============================================================
+
+class ResilientCaller:
+    """
+    Runs one kind of upstream call with a hard timeout, jittered
+    exponential retries (bounded by a shared retry budget), an optional
+    hedged duplicate after the recent p95 latency, and a circuit breaker.
+    """
+
+    def __init__(self, name: str, policy: CallPolicy):
+        self.name = name
+        self.policy = policy
+        self.breaker = CircuitBreaker()
+        self.budget = RetryBudget()
+
+        self._lock = Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {
+            "calls": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "retry_budget_exhausted": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "rejected_open": 0,
+        }
+
+    def call(self, fn: Callable, *args, **kwargs):
+        if not self.breaker.allow():
+            self._count("rejected_open")
+            raise CircuitOpen(self.name, self.breaker.retry_after())
+
+        self._count("calls")
+        self.budget.deposit()
+
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(fn, args, kwargs)
+                self.breaker.record(True)
+                return result
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record(False)
+                else:
+                    # Client errors (bad request, auth) say nothing about
+                    # upstream health: neither close nor count towards opening
+                    self.breaker.release()
+                self._count("failures")
+                if not retryable or attempt >= self.policy.max_retries:
+                    raise
+                if not self.budget.try_spend():
+                    self._count("retry_budget_exhausted")
+                    raise
+                if not self.breaker.allow():
+                    raise CircuitOpen(self.name, self.breaker.retry_after()) from e
+
+                attempt += 1
+                self._count("retries")
+                delay = random.uniform(0, min(RETRY_MAX_BACKOFF_S, RETRY_BASE_S * 2 ** attempt))
+                logger.info("%s attempt %d failed (%s), retrying in %.2fs", self.name, attempt, type(e).__name__, delay)
+                time.sleep(delay)
+
+    def _attempt(self, fn: Callable, args: tuple, kwargs: dict):
+        start = time.monotonic()
+        deadline = start + self.policy.timeout_s
+        futures = {_submit(fn, args, kwargs): "primary"}
+
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is not None and hedge_delay < self.policy.timeout_s:
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                self._count("hedges")
+                futures[_submit(fn, args, kwargs)] = "hedge"
+
+        error: Optional[BaseException] = None
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if futures[future] == "hedge":
+                        self._count("hedge_wins")
+                    self._observe(time.monotonic() - start)
+                    return future.result()
+                error = future.exception()
+
+        if error is not None and not pending:
+            raise error
+
+        for future in pending:
+            future.cancel()
+        self._count("timeouts")
+        raise CallTimeout(f"{self.name} timed out after {self.policy.timeout_s}s")
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.policy.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return max(HEDGE_MIN_DELAY_S, ordered[int(len(ordered) * 0.95) - 1])
+
+    def _observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            return {
+                **self._counts,
+                "breaker": self.breaker.state,
+                "timeout_s": self.policy.timeout_s,
+                "p50_s": round(ordered[len(ordered) // 2], 3) if ordered else None,
+                "p95_s": round(ordered[max(0, int(len(ordered) * 0.95) - 1)], 3) if ordered else None,
+            }
+
+
+def _submit(fn: Callable, args: tuple, kwargs: dict):
+    # Each attempt gets its own context copy so tracing spans still land
+    ctx = contextvars.copy_context()
+    return _pool.submit(ctx.run, fn, *args, **kwargs)
+
+
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = Lock()
+
+
+def get_caller(name: str) -> ResilientCaller:
+    """Shared per call type so budgets, breakers and latency windows are global."""
+    with _callers_lock:
+        if name not in _callers:
+            _callers[name] = ResilientCaller(name, CALL_POLICIES[name])
+        return _callers[name]
+
+
+def resilience_metrics() -> dict:
+    with _callers_lock:
+        return {name: caller.metrics() for name, caller in _callers.items()}
+
+
+# ============================================================
+# Embeddings adapter
+# ============================================================
+
+class ResilientEmbeddings:
+    """Wraps an embeddings client (embed_query / embed_documents) with the call layer."""
+
+    def __init__(self, embeddings):
+        self.inner = embeddings
+
+    def embed_query(self, text: str) -> list:
+        return get_caller("embed_query").call(self.inner.embed_query, text)
+
+    def embed_documents(self, texts: list) -> list:
+        return get_caller("embed_batch").call(self.inner.embed_documents, texts)
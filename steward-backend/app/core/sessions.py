@@ -0,0 +1,497 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.core.index_version import (
+    CHROMA_PERSIST_DIR,
+    SESSION_META_DIR,
+    bump_generation,
+    discard_version,
+    gc_versions,
+    get_generation,
+    publish_version,
+    remove_versions,
+    session_meta_dir,
+    stage_version,
+    store_path,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+logger = logging.getLogger("steward.sessions")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+# Sessions unused for longer than this are evicted (0 disables TTL eviction)
+SESSION_TTL_DAYS = float(os.getenv("SESSION_TTL_DAYS", "0"))
+# Least-recently-used sessions are evicted while the total exceeds this (0 disables)
+SESSION_DISK_QUOTA_MB = float(os.getenv("SESSION_DISK_QUOTA_MB", "0"))
+# Never evict a session used this recently, whatever the quota says
+SESSION_EVICT_GRACE_S = float(os.getenv("SESSION_EVICT_GRACE_S", "600"))
+# Background eviction period (0 disables the background job)
+SESSION_GC_INTERVAL_S = float(os.getenv("SESSION_GC_INTERVAL_S", "3600"))
+# last_queried_at is persisted at most this often per session
+SESSION_TOUCH_INTERVAL_S = float(os.getenv("SESSION_TOUCH_INTERVAL_S", "60"))
+
+SESSION_FILE = "session.json"
+LIVE_IDS_FILE = "live_ids.json"
+LAST_QUERIED_FILE = "last_queried"
+COMPACT_SUFFIX = ".compacting"
+IMPORT_SUFFIX = ".importing"
+RETIRED_SUFFIX = ".retired"
+GC_LOCK_FILE = ".gc.lock"
+LOCKS_DIR = ".locks"
+
+_locks: Dict[str, Lock] = {}
+_locks_guard = Lock()
+_last_touch: Dict[str, float] = {}
+
+
+@contextmanager
+def session_lock(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR):
+    """
+    Serializes writers (ingest, compaction, purge, import) of one session:
+    a thread lock in this process plus a file lock shared by all workers.
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(session_id, Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+
+        # Lock files live apart from the session's metadata, which purge deletes
+        lock_dir = os.path.join(persist_dir, SESSION_META_DIR, LOCKS_DIR)
+        os.makedirs(lock_dir, exist_ok=True)
+        with open(os.path.join(lock_dir, f"{session_id}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ============================================================
+# Metadata
+# ============================================================
+
+def read_session(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> Dict:
+    """
+    Returns the session's metadata. Sessions ingested before metadata
+    existed get a best-effort record derived from the store directory.
+    """
+    path = os.path.join(session_meta_dir(session_id, persist_dir), SESSION_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (FileNotFoundError, ValueError):
+        store_dir = os.path.join(persist_dir, session_id)
+        created = os.path.getmtime(store_dir) if os.path.isdir(store_dir) else None
+        info = {
+            "session_id": session_id,
+            "created_at": created,
+            "last_ingested_at": created,
+            "last_queried_at": None,
+            "size_bytes": dir_size(store_dir) if created else 0,
+            "chunk_count": None,
+            "backend": None,
+        }
+    # Reads are recorded apart from the ingest metadata (see touch)
+    try:
+        queried = os.path.getmtime(os.path.join(session_meta_dir(session_id, persist_dir), LAST_QUERIED_FILE))
+        info["last_queried_at"] = max(info.get("last_queried_at") or 0, queried)
+    except FileNotFoundError:
+        pass
+    info["generation"] = get_generation(session_id, persist_dir)
+    return info
+
+
+def _write_session(session_id: str, info: Dict, persist_dir: str):
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    os.makedirs(meta_dir, exist_ok=True)
+    tmp = os.path.join(meta_dir, f".{SESSION_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in info.items() if k != "generation"}, f, indent=2)
+    os.replace(tmp, os.path.join(meta_dir, SESSION_FILE))
+
+
+def record_ingest(
+    session_id: str,
+    chunk_ids: Iterable[str],
+    replace: bool,
+    chunk_count: int,
+    backend: str,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+):
+    """
+    Updates metadata after a write. `replace` marks a full ingest: its
+    chunk ids become the live set and anything else in the store is
+    stale (dropped by compaction). Partial writes extend the live set.
+    """
+    now = time.time()
+    info = read_session(session_id, persist_dir)
+    info.update(
+        session_id=session_id,
+        created_at=info.get("created_at") or now,
+        last_ingested_at=now,
+        size_bytes=dir_size(os.path.join(persist_dir, session_id)),
+        chunk_count=chunk_count,
+        backend=backend,
+    )
+    _write_session(session_id, info, persist_dir)
+
+    live = set(chunk_ids)
+    if not replace:
+        previous = read_live_ids(session_id, persist_dir)
+        if previous is None:
+            # Unknown history: keep compaction from dropping anything
+            return
+        live |= previous
+    _write_live_ids(session_id, live, persist_dir)
+
+
+def touch(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR):
+    """
+    Records a read as the mtime of its own marker file, at most once per
+    interval. Never rewrites session.json, so it can't race a writer.
+    """
+    now = time.time()
+    if now - _last_touch.get(session_id, 0.0) < SESSION_TOUCH_INTERVAL_S:
+        return
+    _last_touch[session_id] = now
+
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    path = os.path.join(meta_dir, LAST_QUERIED_FILE)
+    try:
+        os.makedirs(meta_dir, exist_ok=True)
+        with open(path, "a"):
+            pass
+        os.utime(path, (now, now))
+    except OSError as e:
+        logger.warning("Could not record access for session=%s: %s", session_id, e)
+
+
+def read_live_ids(session_id: str, persist_dir: str) -> Optional[set]:
+    path = os.path.join(session_meta_dir(session_id, persist_dir), LIVE_IDS_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_live_ids(session_id: str, ids: set, persist_dir: str):
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    os.makedirs(meta_dir, exist_ok=True)
+    tmp = os.path.join(meta_dir, f".{LIVE_IDS_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sorted(ids), f)
+    os.replace(tmp, os.path.join(meta_dir, LIVE_IDS_FILE))
+
+
+def _is_session_name(name: str) -> bool:
+    # Dot-names are shared state (.sessions, .versions, lock files); the
+    # suffixes mark leftovers of interrupted writes
+    return bool(name) and not name.startswith(".") and not name.endswith((COMPACT_SUFFIX, IMPORT_SUFFIX, RETIRED_SUFFIX))
+
+
+def validate_session_id(session_id: str) -> str:
+    """Rejects ids that would resolve outside the session's own store path."""
+    if (
+        not isinstance(session_id, str)
+        or not _is_session_name(session_id)
+        or os.path.basename(session_id) != session_id
+        or any(c in session_id for c in ("/", "\\", "\0"))
+    ):
+        raise ValueError(f"Invalid session_id: {session_id!r}")
+    return session_id
+
+
+def require_session(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> str:
+    """Validates the id and returns the store path of an existing session."""
+    validate_session_id(session_id)
+    if session_id not in {s["session_id"] for s in list_sessions(persist_dir)}:
+        raise RuntimeError(f"No ingestion found for session_id={session_id}")
+    return store_path(session_id, persist_dir)
+
+
+def list_sessions(persist_dir: str = CHROMA_PERSIST_DIR) -> List[Dict]:
+    if not os.path.isdir(persist_dir):
+        return []
+    sessions = []
+    for entry in os.scandir(persist_dir):
+        name = entry.name
+        if not entry.is_dir() or not _is_session_name(name):
+            continue
+        info = read_session(name, persist_dir)
+        info["last_used_at"] = _last_used(info)
+        sessions.append(info)
+    return sorted(sessions, key=lambda s: s["last_used_at"] or 0, reverse=True)
+
+
+def _last_used(info: Dict) -> Optional[float]:
+    stamps = [info.get(k) for k in ("last_queried_at", "last_ingested_at", "created_at")]
+    stamps = [s for s in stamps if s]
+    return max(stamps) if stamps else None
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                pass
+    return total
+
+
+# ============================================================
+# Purge / compaction
+# ============================================================
+
+def purge_session(
+    session_id: str,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    on_release: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Deletes a session's store and metadata. The generation counter is
+    bumped and kept, so a later re-ingest can never be served answers
+    cached for the purged index.
+    """
+    store_dir = require_session(session_id, persist_dir)
+
+    with session_lock(session_id, persist_dir):
+        size = dir_size(store_dir)
+        bump_generation(session_id, persist_dir)
+        if on_release:
+            on_release(session_id)
+        remove_versions(session_id, persist_dir)
+
+        meta_dir = session_meta_dir(session_id, persist_dir)
+        for name in os.listdir(meta_dir):
+            if name != "generation":
+                path = os.path.join(meta_dir, name)
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+    _last_touch.pop(session_id, None)
+    logger.info("Purged session=%s freed_bytes=%d", session_id, size)
+    return {"session_id": session_id, "purged": True, "freed_bytes": size}
+
+
+def compact_session(
+    session_id: str,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    on_release: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Rewrites a session's store keeping only live rows (ids written by the
+    latest full ingest) and one row per (file_path, text) into a new
+    version, publishes it and bumps the generation.
+    """
+    from app.vectorstores.registry import open_store, detect_backend
+    from app.vectorstores.numpy_store import NumpyStore
+    from app.ingestion.summaries import load_summaries, save_summaries
+
+    store_dir = require_session(session_id, persist_dir)
+    backend = detect_backend(store_dir)
+    if backend is None:
+        raise RuntimeError(f"No ingestion found for session_id={session_id}")
+
+    with session_lock(session_id, persist_dir):
+        started = time.perf_counter()
+        size_before = dir_size(store_dir)
+
+        # Opened through the link, not the version path, so closing it
+        # can't stop a pooled reader's client on the same version
+        store = open_store(store_dir)
+        try:
+            ids, texts, embeddings, metadatas = store.dump()
+            dtype = getattr(store, "dtype", None)
+            embedding_model = getattr(store, "embedding_model", None)
+        finally:
+            store.close()
+
+        live = read_live_ids(session_id, persist_dir)
+        keep: Dict[tuple, int] = {}
+        for i, (chunk_id, text, meta) in enumerate(zip(ids, texts, metadatas)):
+            if live is not None and chunk_id not in live:
+                continue
+            # Last write wins for duplicated content (e.g. legacy random ids)
+            keep[(meta.get("file_path"), text)] = i
+        rows = sorted(keep.values())
+
+        version = stage_version(session_id, persist_dir)
+        try:
+            if backend == "numpy":
+                compacted = NumpyStore(version, dtype=dtype, embedding_model=embedding_model)
+            else:
+                compacted = open_store(version, backend=backend)
+            try:
+                if rows:
+                    compacted.add(
+                        ids=[ids[i] for i in rows],
+                        texts=[texts[i] for i in rows],
+                        embeddings=[embeddings[i] for i in rows],
+                        metadatas=[metadatas[i] for i in rows],
+                    )
+                    compacted.persist()
+                chunk_count = compacted.count()
+            finally:
+                compacted.close()
+        except Exception:
+            discard_version(version)
+            raise
+
+        previous = get_generation(session_id, persist_dir)
+        publish_version(session_id, version, persist_dir)
+        generation = bump_generation(session_id, persist_dir)
+        if on_release:
+            on_release(session_id)
+        gc_versions(session_id, persist_dir)
+
+        # Only stale rows were dropped, so current summaries still describe the index
+        summaries = load_summaries(session_id, persist_dir)
+        if summaries is not None and summaries.get("generation") == previous:
+            summaries["generation"] = generation
+            save_summaries(session_id, summaries, persist_dir)
+
+        info = read_session(session_id, persist_dir)
+        info.update(size_bytes=dir_size(store_dir), chunk_count=chunk_count, backend=backend, compacted_at=time.time())
+        _write_session(session_id, info, persist_dir)
+
+    result = {
+        "session_id": session_id,
+        "generation": generation,
+        "rows_before": len(ids),
+        "rows_after": chunk_count,
+        "bytes_before": size_before,
+        "bytes_after": info["size_bytes"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Compacted session=%s %s", session_id, result)
+    return result
+
+
+# ============================================================
+# Eviction
+# ============================================================
+
+def evict_sessions(
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    dry_run: bool = False,
+    on_release: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Evicts sessions idle for longer than SESSION_TTL_DAYS, then the least
+    recently used ones while the total exceeds SESSION_DISK_QUOTA_MB.
+    Sessions used within SESSION_EVICT_GRACE_S are never evicted.
+    """
+    now = time.time()
+    sessions = list_sessions(persist_dir)
+    for s in sessions:
+        s["size_bytes"] = dir_size(os.path.join(persist_dir, s["session_id"]))
+
+    evictable = [
+        s for s in sessions
+        if not s["last_used_at"] or now - s["last_used_at"] > SESSION_EVICT_GRACE_S
+    ]
+    victims: Dict[str, str] = {}
+
+    if SESSION_TTL_DAYS > 0:
+        for s in evictable:
+            if not s["last_used_at"] or now - s["last_used_at"] > SESSION_TTL_DAYS * 86400:
+                victims[s["session_id"]] = "ttl"
+
+    total = sum(s["size_bytes"] for s in sessions if s["session_id"] not in victims)
+    quota = SESSION_DISK_QUOTA_MB * 1024 * 1024
+    if quota > 0:
+        # Oldest first
+        for s in sorted(evictable, key=lambda s: s["last_used_at"] or 0):
+            if total <= quota:
+                break
+            if s["session_id"] in victims:
+                continue
+            victims[s["session_id"]] = "quota"
+            total -= s["size_bytes"]
+
+    freed = 0
+    versions_removed = 0
+    if not dry_run:
+        for session_id in victims:
+            try:
+                freed += purge_session(session_id, persist_dir, on_release)["freed_bytes"]
+            except (RuntimeError, OSError) as e:
+                logger.warning("Eviction of session=%s failed: %s", session_id, e)
+        # Index versions retired by re-ingests whose readers have drained
+        for s in sessions:
+            if s["session_id"] not in victims:
+                versions_removed += gc_versions(s["session_id"], persist_dir)
+
+    return {
+        "dry_run": dry_run,
+        "evicted": [{"session_id": sid, "reason": reason} for sid, reason in victims.items()],
+        "freed_bytes": freed,
+        "versions_removed": versions_removed,
+        "total_bytes_after": total,
+        "quota_bytes": int(quota) or None,
+    }
+
+
+def start_eviction_loop(on_release: Optional[Callable[[str], None]] = None, persist_dir: str = CHROMA_PERSIST_DIR):
+    """Runs evict_sessions every SESSION_GC_INTERVAL_S in a daemon thread, if any limit is set."""
+    if SESSION_GC_INTERVAL_S <= 0 or (SESSION_TTL_DAYS <= 0 and SESSION_DISK_QUOTA_MB <= 0):
+        return None
+
+    def _loop():
+        while True:
+            time.sleep(SESSION_GC_INTERVAL_S)
+            try:
+                with _gc_lock(persist_dir) as acquired:
+                    if not acquired:
+                        continue
+                    result = evict_sessions(persist_dir, on_release=on_release)
+                if result["evicted"]:
+                    logger.info("Session eviction: %s", result)
+            except Exception:
+                logger.exception("Session eviction failed")
+
+    thread = threading.Thread(target=_loop, name="steward-session-gc", daemon=True)
+    thread.start()
+    return thread
+
+
+@contextmanager
+def _gc_lock(persist_dir: str):
+    """
+    Non-blocking, host-wide lock so that with several worker processes
+    only one of them runs each eviction pass; yields whether it was taken.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    meta_root = os.path.join(persist_dir, SESSION_META_DIR)
+    os.makedirs(meta_root, exist_ok=True)
+    with open(os.path.join(meta_root, GC_LOCK_FILE), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
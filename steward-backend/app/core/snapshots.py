@@ -0,0 +1,365 @@
+"""
+Portable session snapshots: ingest once (e.g. in CI), load anywhere.
+
+A snapshot is a tar archive (gzip if the name ends in .gz/.tgz):
+  snapshot.json        format, session, embedding model, dim, count,
+                       dtype and a sha256 for every other member
+  store/manifest.json  a complete NumpyStore, loaded memory-mapped
+  store/vectors.npy    on import without re-embedding anything
+  store/scales.npy     (int8 only)
+  store/metadata.json  ids, texts and metadata columns (the chunk manifest)
+  meta/live_ids.json   live chunk ids, if the session tracked them
+  meta/summaries.json  file/package summaries for docs, if built
+  meta/graph.json      import/call graph for retrieval expansion, if built
+
+Run from steward-backend/:
+    python -m app.core.snapshots export my-repo snapshots/my-repo.tar
+    python -m app.core.snapshots import snapshots/my-repo.tar [--session-id other] [--force]
+"""
+import os
+import io
+import json
+import time
+import shutil
+import hashlib
+import tarfile
+import argparse
+import tempfile
+from typing import Callable, Dict, Optional
+
+from app.core.index_version import (
+    CHROMA_PERSIST_DIR,
+    bump_generation,
+    discard_version,
+    gc_versions,
+    get_generation,
+    publish_version,
+    stage_version,
+)
+from app.core.sessions import (
+    LIVE_IDS_FILE,
+    read_live_ids,
+    record_ingest,
+    require_session,
+    session_lock,
+    validate_session_id,
+)
+from app.ingestion.summaries import SUMMARIES_FILE, load_summaries, save_summaries
+from app.ingestion.graph import GRAPH_FILE, load_graph, save_graph
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+
+SNAPSHOT_FORMAT = "steward-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = "snapshot.json"
+STORE_PREFIX = "store/"
+META_PREFIX = "meta/"
+HASH_CHUNK = 1024 * 1024
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _tar_mode(path: str, write: bool) -> str:
+    if write:
+        return "w:gz" if path.endswith((".gz", ".tgz")) else "w"
+    return "r:*"
+
+
+# ============================================================
+# Export
+# ============================================================
+
+def export_snapshot(
+    session_id: str,
+    out_path: str,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    dtype: Optional[str] = None,
+) -> Dict:
+    """
+    Writes a checksummed snapshot of a session. Numpy stores are copied
+    as-is (unless a different dtype is requested); other backends are
+    converted to a NumpyStore from their stored embeddings.
+    """
+    from app.vectorstores.registry import open_store
+    from app.vectorstores.numpy_store import NumpyStore, NUMPY_STORE_DTYPE
+
+    store_dir = require_session(session_id, persist_dir)
+
+    started = time.perf_counter()
+    workdir = tempfile.mkdtemp(prefix="steward-snapshot-")
+    try:
+        with session_lock(session_id, persist_dir):
+            # Through the link, so closing it can't stop a pooled reader's client
+            store = open_store(store_dir)
+            try:
+                if store.backend == "numpy" and dtype in (None, store.dtype):
+                    staged = os.path.join(workdir, "store")
+                    shutil.copytree(store_dir, staged)
+                else:
+                    ids, texts, embeddings, metadatas = store.dump()
+                    staged = os.path.join(workdir, "store")
+                    converted = NumpyStore(
+                        staged,
+                        dtype=dtype or NUMPY_STORE_DTYPE,
+                        embedding_model=getattr(store, "embedding_model", None) or EMBEDDING_MODEL,
+                    )
+                    converted.add(ids=ids, texts=texts, embeddings=embeddings, metadatas=metadatas)
+                    converted.persist()
+            finally:
+                store.close()
+            live_ids = read_live_ids(session_id, persist_dir)
+            summaries = load_summaries(session_id, persist_dir)
+            graph = load_graph(session_id, persist_dir)
+            generation = get_generation(session_id, persist_dir)
+
+        members = {}
+        for name in sorted(os.listdir(staged)):
+            if name.startswith("."):
+                continue
+            members[STORE_PREFIX + name] = os.path.join(staged, name)
+        if live_ids is not None:
+            live_path = os.path.join(workdir, LIVE_IDS_FILE)
+            with open(live_path, "w", encoding="utf-8") as f:
+                json.dump(sorted(live_ids), f)
+            members[META_PREFIX + LIVE_IDS_FILE] = live_path
+        # Only summaries of the exported index are worth shipping
+        if summaries is not None and summaries.get("generation") == generation:
+            summaries_path = os.path.join(workdir, SUMMARIES_FILE)
+            with open(summaries_path, "w", encoding="utf-8") as f:
+                json.dump(summaries, f)
+            members[META_PREFIX + SUMMARIES_FILE] = summaries_path
+        # Graph nodes are content-addressed chunk ids, valid across generations
+        if graph is not None:
+            graph_path = os.path.join(workdir, GRAPH_FILE)
+            with open(graph_path, "w", encoding="utf-8") as f:
+                json.dump(graph, f)
+            members[META_PREFIX + GRAPH_FILE] = graph_path
+
+        with open(os.path.join(staged, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "format_version": SNAPSHOT_VERSION,
+            "session_id": session_id,
+            "source_generation": generation,
+            "created_at": time.time(),
+            "embedding_model": manifest.get("embedding_model") or EMBEDDING_MODEL,
+            "dtype": manifest["dtype"],
+            "dim": manifest["dim"],
+            "count": manifest["count"],
+            "files": {
+                name: {"sha256": _sha256(path), "bytes": os.path.getsize(path)}
+                for name, path in members.items()
+            },
+        }
+
+        os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+        tmp_out = f"{out_path}.tmp"
+        with tarfile.open(tmp_out, _tar_mode(out_path, write=True)) as tar:
+            # snapshot.json first so readers can validate before extracting
+            payload = json.dumps(snapshot, indent=2).encode("utf-8")
+            info = tarfile.TarInfo(SNAPSHOT_FILE)
+            info.size = len(payload)
+            info.mtime = int(snapshot["created_at"])
+            tar.addfile(info, io.BytesIO(payload))
+            for name, path in members.items():
+                tar.add(path, arcname=name, recursive=False)
+        os.replace(tmp_out, out_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "session_id": session_id,
+        "path": out_path,
+        "sha256": _sha256(out_path),
+        "bytes": os.path.getsize(out_path),
+        "count": snapshot["count"],
+        "dim": snapshot["dim"],
+        "dtype": snapshot["dtype"],
+        "embedding_model": snapshot["embedding_model"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+# ============================================================
+# Import
+# ============================================================
+
+def read_snapshot_info(path: str) -> Dict:
+    with tarfile.open(path, _tar_mode(path, write=False)) as tar:
+        return _read_info(tar)
+
+
+def _read_info(tar: tarfile.TarFile) -> Dict:
+    try:
+        member = tar.getmember(SNAPSHOT_FILE)
+    except KeyError:
+        raise ValueError("Not a Steward snapshot: missing snapshot.json")
+    info = json.load(tar.extractfile(member))
+    if info.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("Not a Steward snapshot: unknown format")
+    if info.get("format_version", 0) > SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {info.get('format_version')}")
+    return info
+
+
+def import_snapshot(
+    path: str,
+    session_id: Optional[str] = None,
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    force: bool = False,
+    on_release: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Verifies and installs a snapshot as a session's index (replacing any
+    existing one) and bumps its generation. No embedding calls are made;
+    the vectors are memory-mapped on first query.
+
+    Refuses snapshots built with a different embedding model than this
+    server queries with, unless `force` is set.
+    """
+    from app.vectorstores.numpy_store import NumpyStore
+
+    started = time.perf_counter()
+    with tarfile.open(path, _tar_mode(path, write=False)) as tar:
+        info = _read_info(tar)
+        session_id = session_id or info["session_id"]
+        validate_session_id(session_id)
+        if not force and info["embedding_model"] != EMBEDDING_MODEL:
+            raise ValueError(
+                f"Snapshot embedding model {info['embedding_model']!r} does not match "
+                f"EMBEDDING_MODEL {EMBEDDING_MODEL!r}"
+            )
+
+        # Held from staging through publish: a version staged before a
+        # concurrent ingest's would otherwise be published over it
+        with session_lock(session_id, persist_dir):
+            staging = stage_version(session_id, persist_dir)
+
+            try:
+                live_ids = None
+                summaries = None
+                graph = None
+                expected = info["files"]
+                seen = set()
+                for member in tar.getmembers():
+                    if member.name == SNAPSHOT_FILE:
+                        continue
+                    # Only regular files listed in snapshot.json; never trust archive paths
+                    if member.name not in expected or not member.isfile():
+                        raise ValueError(f"Unexpected snapshot member: {member.name}")
+
+                    digest = hashlib.sha256()
+                    source = tar.extractfile(member)
+                    if member.name.startswith(STORE_PREFIX):
+                        target_path = os.path.join(staging, os.path.basename(member.name))
+                        with open(target_path, "wb") as out:
+                            for block in iter(lambda: source.read(HASH_CHUNK), b""):
+                                digest.update(block)
+                                out.write(block)
+                    else:
+                        data = source.read()
+                        digest.update(data)
+                        if member.name == META_PREFIX + LIVE_IDS_FILE:
+                            live_ids = json.loads(data)
+                        elif member.name == META_PREFIX + SUMMARIES_FILE:
+                            summaries = json.loads(data)
+                        elif member.name == META_PREFIX + GRAPH_FILE:
+                            graph = json.loads(data)
+
+                    if digest.hexdigest() != expected[member.name]["sha256"]:
+                        raise ValueError(f"Checksum mismatch for {member.name}")
+                    seen.add(member.name)
+
+                missing = set(expected) - seen
+                if missing:
+                    raise ValueError(f"Snapshot is missing members: {sorted(missing)}")
+
+                store = NumpyStore(staging)
+                if store.count() != info["count"]:
+                    raise ValueError("Snapshot row count does not match its manifest")
+                ids = store.ids()
+                del store
+            except Exception:
+                discard_version(staging)
+                raise
+
+            publish_version(session_id, staging, persist_dir)
+            generation = bump_generation(session_id, persist_dir)
+            if on_release:
+                on_release(session_id)
+            gc_versions(session_id, persist_dir)
+
+            record_ingest(
+                session_id,
+                live_ids if live_ids is not None else ids,
+                replace=True,
+                chunk_count=len(ids),
+                backend="numpy",
+                persist_dir=persist_dir,
+            )
+            if summaries is not None:
+                summaries.update(session_id=session_id, generation=generation)
+                save_summaries(session_id, summaries, persist_dir)
+            if graph is not None:
+                graph.update(session_id=session_id, generation=generation)
+                save_graph(session_id, graph, persist_dir)
+
+    return {
+        "session_id": session_id,
+        "generation": generation,
+        "count": info["count"],
+        "dim": info["dim"],
+        "dtype": info["dtype"],
+        "embedding_model": info["embedding_model"],
+        "source_session_id": info["session_id"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def snapshot_path(session_id: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{session_id}.tar")
+
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--persist-dir", default=CHROMA_PERSIST_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="write a session snapshot")
+    export.add_argument("session_id")
+    export.add_argument("out", nargs="?", help=f"default: {SNAPSHOT_DIR}/<session_id>.tar")
+    export.add_argument("--dtype", choices=["float16", "int8"])
+
+    load = sub.add_parser("import", help="install a snapshot as a session")
+    load.add_argument("path")
+    load.add_argument("--session-id")
+    load.add_argument("--force", action="store_true", help="ignore an embedding model mismatch")
+
+    info = sub.add_parser("info", help="print a snapshot's header")
+    info.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        result = export_snapshot(args.session_id, args.out or snapshot_path(args.session_id), args.persist_dir, args.dtype)
+    elif args.command == "import":
+        result = import_snapshot(args.path, args.session_id, args.persist_dir, args.force)
+    else:
+        result = read_snapshot_info(args.path)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
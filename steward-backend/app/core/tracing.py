@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from threading import Lock
+from typing import Dict, Optional
+
+# ============================================================
+# Configuration
+# ============================================================
+
+# Requests slower than this are written to the slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "2000"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# ============================================================
+# Per-request trace
+# ============================================================
+
+class Trace:
+    """
+    Collects named stage durations and attributes for one request.
+    Spans with the same name are summed (e.g. several searches).
+    """
+
+    def __init__(self, request_id: str, path: str):
+        self.request_id = request_id
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.attrs: Dict = {}
+        self._lock = Lock()
+
+    def add_span(self, name: str, ms: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + ms
+
+    def annotate(self, **attrs):
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self) -> str:
+        with self._lock:
+            parts = [f"{name};dur={ms:.1f}" for name, ms in self.spans.items()]
+        parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "request_id": self.request_id,
+                "path": self.path,
+                "spans_ms": {name: round(ms, 3) for name, ms in self.spans.items()},
+                "total_ms": round(self.elapsed_ms(), 3),
+                **self.attrs,
+            }
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("steward_trace", default=None)
+
+
+def start_trace(request_id: str, path: str):
+    trace = Trace(request_id, path)
+    return trace, _current.set(trace)
+
+
+def end_trace(token):
+    _current.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def record(name: str, ms: float):
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span(name, ms)
+
+
+def annotate(**attrs):
+    trace = _current.get()
+    if trace is not None:
+        trace.annotate(**attrs)
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(question.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def with_debug(result: dict, enabled: bool) -> dict:
+    """Returns a copy of result with the trace attached (never mutates cached results)."""
+    trace = _current.get()
+    if not enabled or trace is None:
+        return result
+    return {**result, "debug": trace.to_dict()}
+
+
+# ============================================================
+# Slow-query log
+# ============================================================
+
+_slow_logger: Optional[logging.Logger] = None
+_slow_lock = Lock()
+
+
+def _get_slow_logger() -> logging.Logger:
+    global _slow_logger
+    with _slow_lock:
+        if _slow_logger is None:
+            log_dir = os.path.dirname(SLOW_QUERY_LOG)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG,
+                maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("steward.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _slow_logger = logger
+    return _slow_logger
+
+
+def log_if_slow(trace: Trace, status_code: int):
+    total_ms = trace.elapsed_ms()
+    if total_ms < SLOW_QUERY_MS:
+        return
+    entry = trace.to_dict()
+    entry.update(ts=time.time(), status=status_code)
+    _get_slow_logger().info(json.dumps(entry, default=str))
@@ -1,30 +1,32 @@
-import os
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
+from app.core.index_version import CHROMA_PERSIST_DIR
+from app.ingestion.pipeline import (
+    IngestContext,
+    IngestionPipeline,
+    DedupeStage,
+    EmbedStage,
+    WriteStage,
+)
 
 
 def persist_chunks(
     session_id: str,
     chunks: list,
-    persist_dir: str = "data/chroma",
+    persist_dir: str = CHROMA_PERSIST_DIR,
+    backend: str | None = None,
 ):
+    """
+    Embeds and writes already-chunked content into a session's store.
+    Returns the session's new index generation.
+    """
     if not chunks:
         raise RuntimeError("No chunks to persist")
 
-    texts = [c["text"] for c in chunks]
-
-    metadatas = [
-        {k: v for k, v in c["metadata"].items() if v is not None}
-        for c in chunks
-    ]
-
-    path = os.path.join(persist_dir, session_id)
-    os.makedirs(path, exist_ok=True)
-
-    vectordb = Chroma(
-        persist_directory=path,
-        embedding_function=OpenAIEmbeddings(),
+    ctx = IngestContext(
+        session_id=session_id,
+        repo=session_id,
+        persist_dir=persist_dir,
+        backend=backend,
+        chunks=list(chunks),
     )
-
-    vectordb.add_texts(texts=texts, metadatas=metadatas)
-    vectordb.persist()
+    IngestionPipeline([DedupeStage(), EmbedStage(), WriteStage()]).run(ctx)
+    return ctx.generation
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 
 
 @dataclass
@@ -11,10 +11,17 @@ class CodeChunk:
     start_line: int
     end_line: int
     language: str
+    # Code graph hints: names this symbol calls and its enclosing class
+    calls: List[str] = field(default_factory=list)
+    parent: Optional[str] = None
 
 
 class CodeChunker(ABC):
 
     @abstractmethod
     def chunk(self, code: str) -> List[CodeChunk]:
-        pass
\ No newline at end of file
+        pass
+
+    def analyze(self, code: str) -> Tuple[List[CodeChunk], List[str]]:
+        """Chunks plus the modules the file imports (for the code graph)."""
+        return self.chunk(code), []
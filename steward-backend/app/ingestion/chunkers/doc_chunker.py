@@ -1,19 +1,276 @@
-from typing import List, Dict
+import os
+import re
+from typing import List, Dict, Optional
 
 
-def chunk_docs(text: str) -> List[Dict]:
+# Approximate tokens per chunk; sections are packed up to this size
+DOC_CHUNK_TARGET_TOKENS = int(os.getenv("DOC_CHUNK_TARGET_TOKENS", "400"))
+
+_MD_ATX = re.compile(r"^ {0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_MD_SETEXT = re.compile(r"^ {0,3}(=+|-+)\s*$")
+_MD_FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_RST_ADORNMENT = re.compile(r"^([=\-`:'\"~^_*+#<>.])\1{2,}\s*$")
+_RST_CODE_DIRECTIVE = re.compile(r"^\.\.\s+(code-block|code|sourcecode)::")
+
+
+def chunk_docs(text: str, fmt: str = "markdown", target_tokens: int = DOC_CHUNK_TARGET_TOKENS) -> List[Dict]:
     """
-    Minimal markdown/doc chunker.
-    Splits by double newline.
-    Later replace with heading-aware logic.
+    Heading-aware markdown / reStructuredText chunker.
+
+    Tracks the heading hierarchy, keeps code fences and literal blocks
+    whole, and packs consecutive paragraphs (and small subsections) into
+    chunks of roughly `target_tokens`. Each chunk carries its heading path
+    ("Guide > Install") and 1-based line range.
     """
-    chunks = []
-    parts = [p.strip() for p in text.split("\n\n") if p.strip()]
+    lines = text.splitlines()
+    blocks = _parse_rst(lines) if fmt == "rst" else _parse_markdown(lines)
+    return _pack(blocks, target_tokens)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _block(kind: str, lines: List[str], start: int, level: int = 0, title: str = "") -> Dict:
+    return {
+        "kind": kind,
+        "lines": lines,
+        "start": start,
+        "end": start + len(lines) - 1,
+        "level": level,
+        "title": title,
+    }
+
+
+# -------------------------
+# Parsers
+# -------------------------
+
+def _parse_markdown(lines: List[str]) -> List[Dict]:
+    blocks: List[Dict] = []
+    para: List[str] = []
+    para_start = 0
+    i = 0
+
+    def flush_para():
+        if para:
+            blocks.append(_block("text", list(para), para_start))
+            para.clear()
+
+    while i < len(lines):
+        line = lines[i]
+
+        fence = _MD_FENCE.match(line)
+        if fence:
+            flush_para()
+            marker = fence.group(1)
+            start = i
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(marker):
+                i += 1
+            end = min(i, len(lines) - 1)
+            blocks.append(_block("code", lines[start:end + 1], start))
+            i = end + 1
+            continue
+
+        atx = _MD_ATX.match(line)
+        if atx:
+            flush_para()
+            blocks.append(_block("heading", [line], i, level=len(atx.group(1)), title=atx.group(2)))
+            i += 1
+            continue
+
+        if len(para) == 1 and _MD_SETEXT.match(line):
+            level = 1 if line.strip()[0] == "=" else 2
+            blocks.append(_block("heading", [para[0], line], para_start, level=level, title=para[0].strip()))
+            para.clear()
+            i += 1
+            continue
+
+        if not line.strip():
+            flush_para()
+        else:
+            if not para:
+                para_start = i
+            para.append(line)
+        i += 1
+
+    flush_para()
+    return blocks
+
+
+def _parse_rst(lines: List[str]) -> List[Dict]:
+    blocks: List[Dict] = []
+    styles: List[tuple] = []   # heading adornment styles in order of first use
+    para: List[str] = []
+    para_start = 0
+    i = 0
+
+    def flush_para():
+        if para:
+            blocks.append(_block("text", list(para), para_start))
+            para.clear()
+
+    def level_for(style) -> int:
+        if style not in styles:
+            styles.append(style)
+        return styles.index(style) + 1
 
-    for i, part in enumerate(parts):
-        chunks.append({
-            "text": part,
-            "symbol": f"section_{i+1}",
-        })
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
 
+        # Title with overline and underline
+        if (
+            not para
+            and _RST_ADORNMENT.match(line)
+            and i + 2 < len(lines)
+            and lines[i + 1].strip()
+            and _RST_ADORNMENT.match(lines[i + 2])
+            and lines[i + 2].strip()[0] == stripped[0]
+        ):
+            level = level_for((stripped[0], True))
+            blocks.append(_block("heading", lines[i:i + 3], i, level=level, title=lines[i + 1].strip()))
+            i += 3
+            continue
+
+        # Title with underline only
+        if (
+            not para
+            and stripped
+            and not line[0].isspace()
+            and i + 1 < len(lines)
+            and _RST_ADORNMENT.match(lines[i + 1])
+            and len(lines[i + 1].strip()) >= len(stripped)
+        ):
+            level = level_for((lines[i + 1].strip()[0], False))
+            blocks.append(_block("heading", lines[i:i + 2], i, level=level, title=stripped))
+            i += 2
+            continue
+
+        # Indented literal block following "::" or a code directive
+        if not para and stripped and line[0].isspace() and blocks and _introduces_literal(blocks[-1]):
+            start = blocks[-1]["end"] + 1
+            while i < len(lines) and (not lines[i].strip() or lines[i][0].isspace()):
+                i += 1
+            end = i - 1
+            while end > start and not lines[end].strip():
+                end -= 1
+            prev = blocks[-1]
+            prev["lines"] = prev["lines"] + lines[start:end + 1]
+            prev["end"] = end
+            prev["kind"] = "code"
+            continue
+
+        if not stripped:
+            flush_para()
+        else:
+            if not para:
+                para_start = i
+            para.append(line)
+        i += 1
+
+    flush_para()
+    return blocks
+
+
+def _introduces_literal(block: Dict) -> bool:
+    if block["kind"] != "text":
+        return False
+    return block["lines"][-1].rstrip().endswith("::") or bool(_RST_CODE_DIRECTIVE.match(block["lines"][0]))
+
+
+# -------------------------
+# Packing
+# -------------------------
+
+def _pack(blocks: List[Dict], target_tokens: int) -> List[Dict]:
+    chunks: List[Dict] = []
+    min_tokens = target_tokens // 4
+
+    path: List[tuple] = []
+    current: Dict = {"lines": [], "start": None, "end": None, "tokens": 0, "paths": [], "has_body": False}
+
+    def flush():
+        if not current["lines"]:
+            return
+        text = "\n".join(current["lines"]).strip()
+        if text:
+            heading_path = " > ".join(_common_prefix(current["paths"]))
+            chunks.append({
+                "text": text,
+                "symbol": heading_path or f"section_{len(chunks) + 1}",
+                "heading_path": heading_path or None,
+                "start_line": current["start"] + 1,
+                "end_line": current["end"] + 1,
+            })
+        current.update(lines=[], start=None, end=None, tokens=0, paths=[], has_body=False)
+
+    def add(lines: List[str], start: int, end: int, tokens: int, body: bool = True):
+        if current["lines"]:
+            current["lines"].append("")
+        else:
+            current["start"] = start
+        current["lines"].extend(lines)
+        current["end"] = end
+        current["tokens"] += tokens
+        current["has_body"] = current["has_body"] or body
+        current["paths"].append([title for _, title in path])
+
+    for block in blocks:
+        text = "\n".join(block["lines"])
+        tokens = _estimate_tokens(text)
+
+        if block["kind"] == "heading":
+            # Small sections are merged into the next one instead of
+            # becoming a chunk of their own
+            if current["has_body"] and current["tokens"] >= min_tokens:
+                flush()
+            path = [p for p in path if p[0] < block["level"]] + [(block["level"], block["title"])]
+            add(block["lines"], block["start"], block["end"], tokens, body=False)
+            continue
+
+        # Never emit a chunk that is only headings
+        if current["has_body"] and current["tokens"] + tokens > target_tokens:
+            flush()
+
+        if block["kind"] == "text" and tokens > target_tokens:
+            # Oversized paragraph: split on line boundaries
+            for piece_start, piece in _split_lines(block["lines"], block["start"], target_tokens):
+                if current["has_body"]:
+                    flush()
+                add(piece, piece_start, piece_start + len(piece) - 1, _estimate_tokens("\n".join(piece)))
+            continue
+
+        # Code blocks are kept whole even when larger than the target
+        add(block["lines"], block["start"], block["end"], tokens)
+
+    flush()
     return chunks
+
+
+def _split_lines(lines: List[str], start: int, target_tokens: int):
+    piece: List[str] = []
+    piece_start = start
+    tokens = 0
+    for offset, line in enumerate(lines):
+        line_tokens = _estimate_tokens(line)
+        if piece and tokens + line_tokens > target_tokens:
+            yield piece_start, piece
+            piece, tokens, piece_start = [], 0, start + offset
+        piece.append(line)
+        tokens += line_tokens
+    if piece:
+        yield piece_start, piece
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    if not paths:
+        return []
+    prefix: Optional[List[str]] = paths[0]
+    for p in paths[1:]:
+        n = 0
+        while n < min(len(prefix), len(p)) and prefix[n] == p[n]:
+            n += 1
+        prefix = prefix[:n]
+    return prefix
@@ -1,5 +1,5 @@
 import ast
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.ingestion.chunkers.base import CodeChunk, CodeChunker
 
@@ -10,14 +10,21 @@ HTTP_METHODS = {"get", "post", "put", "delete", "patch", "options"}
 class PythonChunker(CodeChunker):
 
     def chunk(self, code: str) -> List[CodeChunk]:
+        return self.analyze(code)[0]
+
+    def analyze(self, code: str) -> Tuple[List[CodeChunk], List[str]]:
         tree = ast.parse(code)
         self._attach_parents(tree)
 
         lines = code.splitlines()
         chunks: List[CodeChunk] = []
+        imports: List[str] = []
 
         for node in ast.walk(tree):
 
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                imports.extend(self._imported_modules(node))
+
             if isinstance(node, ast.ClassDef):
                 chunks.append(
                     self._build_chunk(
@@ -45,7 +52,11 @@ class PythonChunker(CodeChunker):
                         )
                     )
 
-        return chunks
+                chunks[-1].calls = self._called_names(node)
+                if self._is_method(node):
+                    chunks[-1].parent = node.parent.name
+
+        return chunks, list(dict.fromkeys(imports))
 
     # -------------------------
     # Chunk builders
@@ -114,6 +125,37 @@ class PythonChunker(CodeChunker):
 
         return None
 
+    # -------------------------
+    # Code graph
+    # -------------------------
+
+    def _imported_modules(self, node) -> List[str]:
+        if isinstance(node, ast.Import):
+            return [alias.name for alias in node.names]
+
+        # Relative imports keep their leading dots; `from pkg import name`
+        # may import a submodule, so both candidates are recorded
+        base = "." * node.level + (node.module or "")
+        modules = [base] if node.module else []
+        for alias in node.names:
+            if alias.name != "*":
+                modules.append(f"{base}.{alias.name}" if node.module else base + alias.name)
+        return modules
+
+    def _called_names(self, node: ast.FunctionDef) -> List[str]:
+        names = []
+        # Body only: decorator calls (router.get, ...) are not callees
+        body = ast.Module(body=node.body, type_ignores=[])
+        for child in ast.walk(body):
+            if not isinstance(child, ast.Call):
+                continue
+            func = child.func
+            if isinstance(func, ast.Name):
+                names.append(func.id)
+            elif isinstance(func, ast.Attribute):
+                names.append(func.attr)
+        return list(dict.fromkeys(names))
+
     # -------------------------
     # Utilities
     # -------------------------
@@ -0,0 +1,151 @@
+import os
+import json
+import logging
+from typing import Dict, List, Optional
+
+from app.core.index_version import CHROMA_PERSIST_DIR, session_meta_dir
+
+logger = logging.getLogger("steward.graph")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+# Build the import/call graph during ingestion
+CODE_GRAPH = os.getenv("CODE_GRAPH", "true").lower() in {"1", "true", "yes"}
+# A called name defined in more places than this is too ambiguous to link
+GRAPH_MAX_FANOUT = int(os.getenv("GRAPH_MAX_FANOUT", "3"))
+GRAPH_MAX_NEIGHBORS = int(os.getenv("GRAPH_MAX_NEIGHBORS", "16"))
+
+GRAPH_FILE = "graph.json"
+
+
+# ============================================================
+# Build
+# ============================================================
+#
+# Nodes are chunk ids. Each node keeps a short, precomputed neighbor
+# list (callees, then callers, then class <-> method links), so
+# expanding retrieval hits is a dict lookup rather than another search.
+# Calls are resolved by name, preferring definitions in the same file,
+# then in the files it imports, then anywhere if the name is unambiguous.
+
+def _module_name(rel_path: str) -> str:
+    parts = os.path.splitext(rel_path.replace(os.sep, "/"))[0].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def _resolve_import(name: str, rel_path: str) -> str:
+    if not name.startswith("."):
+        return name
+    level = len(name) - len(name.lstrip("."))
+    package = _module_name(rel_path).split(".")
+    if not rel_path.endswith("__init__.py"):
+        package = package[:-1]
+    base = package[:len(package) - (level - 1)] if level > 1 else package
+    rest = name[level:]
+    return ".".join(base + ([rest] if rest else []))
+
+
+def _bare_name(symbol: str) -> str:
+    # API chunks encode "name [METHODS route]" into the symbol
+    return symbol.split(" [", 1)[0]
+
+
+def build_graph(
+    session_id: str,
+    chunks: List[Dict],
+    imports: Dict[str, List[str]],
+    generation: Optional[int] = None,
+) -> Dict:
+    """
+    Builds the code graph from chunk dicts (id, metadata and the chunker's
+    calls/parent hints) and each file's imported module names.
+    """
+    code = [c for c in chunks if c["metadata"].get("doc_type") == "code"]
+
+    # Module name suffixes let "app.core.x" match "backend/app/core/x.py"
+    by_suffix: Dict[str, List[str]] = {}
+    for path in {c["metadata"]["file_path"] for c in code}:
+        parts = _module_name(path).split(".")
+        for i in range(len(parts)):
+            by_suffix.setdefault(".".join(parts[i:]), []).append(path)
+
+    modules: Dict[str, List[str]] = {}
+    for path, names in imports.items():
+        targets = []
+        for name in names:
+            found = by_suffix.get(_resolve_import(name, path), [])
+            if 0 < len(found) <= GRAPH_MAX_FANOUT:
+                targets.extend(f for f in found if f != path)
+        if targets:
+            modules[path] = sorted(set(targets))
+
+    definitions: Dict[str, List[Dict]] = {}
+    classes: Dict[tuple, str] = {}
+    for c in code:
+        meta = c["metadata"]
+        definitions.setdefault(_bare_name(meta["symbol"]), []).append(c)
+        if meta["symbol_type"] == "class":
+            classes[(meta["file_path"], meta["symbol"])] = c["id"]
+
+    callees: Dict[str, List[str]] = {}
+    callers: Dict[str, List[str]] = {}
+    members: Dict[str, List[str]] = {}
+    for c in code:
+        path = c["metadata"]["file_path"]
+        imported = set(modules.get(path, ()))
+        for name in c.get("calls", ()):
+            candidates = [d for d in definitions.get(name, ()) if d["id"] != c["id"]]
+            local = [d for d in candidates if d["metadata"]["file_path"] == path]
+            linked = [d for d in candidates if d["metadata"]["file_path"] in imported]
+            chosen = local or linked or candidates
+            if not chosen or len(chosen) > GRAPH_MAX_FANOUT:
+                continue
+            for d in chosen:
+                callees.setdefault(c["id"], []).append(d["id"])
+                callers.setdefault(d["id"], []).append(c["id"])
+
+        owner = classes.get((path, c.get("parent")))
+        if owner:
+            members.setdefault(owner, []).append(c["id"])
+            members.setdefault(c["id"], []).append(owner)
+
+    neighbors: Dict[str, List[str]] = {}
+    edges = 0
+    for c in code:
+        cid = c["id"]
+        ordered = list(dict.fromkeys(callees.get(cid, []) + callers.get(cid, []) + members.get(cid, [])))
+        if ordered:
+            neighbors[cid] = ordered[:GRAPH_MAX_NEIGHBORS]
+            edges += len(neighbors[cid])
+
+    stats = {"nodes": len(code), "linked_nodes": len(neighbors), "edges": edges, "module_links": sum(len(v) for v in modules.values())}
+    logger.info("Code graph for session=%s: %s", session_id, stats)
+    return {
+        "session_id": session_id,
+        "generation": generation,
+        "modules": modules,
+        "neighbors": neighbors,
+        "stats": stats,
+    }
+
+
+def save_graph(session_id: str, data: Dict, persist_dir: str = CHROMA_PERSIST_DIR):
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    os.makedirs(meta_dir, exist_ok=True)
+    tmp = os.path.join(meta_dir, f".{GRAPH_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, os.path.join(meta_dir, GRAPH_FILE))
+
+
+def load_graph(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> Optional[Dict]:
+    path = os.path.join(session_meta_dir(session_id, persist_dir), GRAPH_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
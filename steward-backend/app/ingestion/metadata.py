@@ -10,6 +10,9 @@ def build_metadata(
     language,
     doc_type,
     chunk_id: str | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    heading_path: str | None = None,
 ):
     meta = {
         "repo": repo,
@@ -18,6 +21,9 @@ def build_metadata(
         "symbol_type": symbol_type,
         "language": language,
         "doc_type": doc_type,
+        "start_line": start_line,
+        "end_line": end_line,
+        "heading_path": heading_path,
     }
     if chunk_id:
         meta["chunk_id"] = chunk_id
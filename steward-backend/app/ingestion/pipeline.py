@@ -0,0 +1,459 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.admission import embed_admission
+from app.core.resilience import ResilientEmbeddings, CALL_POLICIES
+from app.core.index_version import (
+    CHROMA_PERSIST_DIR,
+    bump_generation,
+    discard_version,
+    gc_versions,
+    get_generation,
+    publish_version,
+    session_meta_dir,
+    stage_version,
+    store_path,
+)
+from app.core.sessions import dir_size, record_ingest, session_lock
+from app.ingestion.chunkers.registry import CODE_CHUNKER_REGISTRY
+from app.ingestion.chunkers.doc_chunker import chunk_docs
+from app.ingestion.metadata import build_metadata
+from app.ingestion.graph import CODE_GRAPH, build_graph, save_graph
+from app.ingestion.summaries import DOCS_SUMMARIES, build_summaries
+
+logger = logging.getLogger("steward.ingestion")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+
+SUPPORTED_DOC_EXT = {".md", ".rst"}
+
+EXCLUDE_DIRS = {
+    ".git",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "node_modules",
+    "dist",
+    "build",
+}
+
+PROFILE_FILE = "ingest_profile.json"
+SLOWEST_FILES = 10
+
+
+# ============================================================
+# Context
+# ============================================================
+
+@dataclass
+class IngestContext:
+    session_id: str
+    repo: str
+    root_path: Optional[str] = None
+    persist_dir: str = CHROMA_PERSIST_DIR
+    backend: Optional[str] = None
+
+    files: List[str] = field(default_factory=list)
+    documents: List[Dict] = field(default_factory=list)
+    chunks: List[Dict] = field(default_factory=list)
+    embeddings: List[List[float]] = field(default_factory=list)
+    # rel_path -> imported module names (code files only)
+    imports: Dict[str, List[str]] = field(default_factory=dict)
+    # Built by GraphStage, saved by WriteStage before it publishes
+    graph: Optional[Dict] = None
+
+    skipped: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    errors: List[Dict] = field(default_factory=list)
+    file_seconds: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    file_bytes: Dict[str, int] = field(default_factory=dict)
+    generation: Optional[int] = None
+
+
+# ============================================================
+# Stages
+# ============================================================
+
+class Stage(ABC):
+    name: str = ""
+
+    @abstractmethod
+    def run(self, ctx: IngestContext) -> Tuple[int, int]:
+        """Runs the stage in place on ctx. Returns (items, bytes) processed."""
+        pass
+
+
+class DiscoverStage(Stage):
+    name = "discover"
+
+    def run(self, ctx):
+        total = 0
+        for root, dirs, files in os.walk(ctx.root_path):
+            dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS)
+            for filename in sorted(files):
+                ext = os.path.splitext(filename)[1]
+                if ext in CODE_CHUNKER_REGISTRY or ext in SUPPORTED_DOC_EXT:
+                    path = os.path.join(root, filename)
+                    ctx.files.append(path)
+                    total += os.path.getsize(path)
+                else:
+                    ctx.skipped[ext or "no_ext"] += 1
+        return len(ctx.files), total
+
+
+class ReadStage(Stage):
+    name = "read"
+
+    def run(self, ctx):
+        total = 0
+        for path in ctx.files:
+            rel_path = os.path.relpath(path, ctx.root_path)
+            start = time.perf_counter()
+            try:
+                with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                    text = f.read()
+            except OSError as e:
+                ctx.errors.append({"file": rel_path, "stage": self.name, "error": str(e)})
+                continue
+            finally:
+                ctx.file_seconds[rel_path] += time.perf_counter() - start
+
+            size = len(text.encode("utf-8"))
+            ctx.file_bytes[rel_path] = size
+            total += size
+            ctx.documents.append({
+                "rel_path": rel_path,
+                "ext": os.path.splitext(path)[1],
+                "text": text,
+            })
+        return len(ctx.documents), total
+
+
+class ChunkStage(Stage):
+    name = "chunk"
+
+    def run(self, ctx):
+        total = 0
+        for doc in ctx.documents:
+            start = time.perf_counter()
+            try:
+                if doc["ext"] in CODE_CHUNKER_REGISTRY:
+                    chunks = self._code_chunks(ctx, doc)
+                else:
+                    chunks = self._doc_chunks(ctx, doc)
+            except Exception as e:
+                # Fail soft: ingestion must not die on one bad file
+                ctx.errors.append({"file": doc["rel_path"], "stage": self.name, "error": str(e)})
+                continue
+            finally:
+                ctx.file_seconds[doc["rel_path"]] += time.perf_counter() - start
+
+            ctx.chunks.extend(chunks)
+            total += sum(len(c["text"].encode("utf-8")) for c in chunks)
+        return len(ctx.chunks), total
+
+    def _code_chunks(self, ctx, doc) -> List[Dict]:
+        chunker = CODE_CHUNKER_REGISTRY[doc["ext"]]
+        code_chunks, imports = chunker.analyze(doc["text"])
+        ctx.imports[doc["rel_path"]] = imports
+        chunks = []
+        for chunk in code_chunks:
+            chunk_id = make_chunk_id(doc["rel_path"], chunk.text)
+            chunks.append({
+                "id": chunk_id,
+                "text": chunk.text,
+                "metadata": build_metadata(
+                    repo=ctx.repo,
+                    file_path=doc["rel_path"],
+                    symbol=chunk.symbol_name,
+                    symbol_type=chunk.symbol_type,
+                    language=chunk.language,
+                    doc_type="code",
+                    chunk_id=chunk_id,
+                    start_line=chunk.start_line,
+                    end_line=chunk.end_line,
+                ),
+                # Graph hints; not persisted with the chunk
+                "calls": chunk.calls,
+                "parent": chunk.parent,
+            })
+        return chunks
+
+    def _doc_chunks(self, ctx, doc) -> List[Dict]:
+        fmt = "rst" if doc["ext"] == ".rst" else "markdown"
+        chunks = []
+        for chunk in chunk_docs(doc["text"], fmt=fmt):
+            chunk_id = make_chunk_id(doc["rel_path"], chunk["text"])
+            chunks.append({
+                "id": chunk_id,
+                "text": chunk["text"],
+                "metadata": build_metadata(
+                    repo=ctx.repo,
+                    file_path=doc["rel_path"],
+                    symbol=chunk["symbol"],
+                    symbol_type="section",
+                    language=fmt,
+                    doc_type="doc",
+                    chunk_id=chunk_id,
+                    start_line=chunk["start_line"],
+                    end_line=chunk["end_line"],
+                    heading_path=chunk["heading_path"],
+                ),
+            })
+        return chunks
+
+
+class DedupeStage(Stage):
+    name = "dedupe"
+
+    def run(self, ctx):
+        seen = set()
+        unique = []
+        for chunk in ctx.chunks:
+            chunk.setdefault("id", make_chunk_id(chunk["metadata"].get("file_path"), chunk["text"]))
+            if chunk["id"] in seen:
+                continue
+            seen.add(chunk["id"])
+            unique.append(chunk)
+        ctx.chunks = unique
+        return len(unique), sum(len(c["text"].encode("utf-8")) for c in unique)
+
+
+class EmbedStage(Stage):
+    name = "embed"
+
+    def __init__(self, embedder=None, batch_size: int = EMBED_BATCH_SIZE):
+        self._embedder = embedder
+        self.batch_size = batch_size
+
+    def run(self, ctx):
+        if self._embedder is None:
+            # Imported lazily to keep API startup fast
+            from langchain_community.embeddings import OpenAIEmbeddings
+
+            self._embedder = ResilientEmbeddings(
+                OpenAIEmbeddings(
+                    model=EMBEDDING_MODEL,
+                    request_timeout=CALL_POLICIES["embed_batch"].timeout_s,
+                    max_retries=0,
+                )
+            )
+
+        texts = [c["text"] for c in ctx.chunks]
+        ctx.embeddings = []
+        for i in range(0, len(texts), self.batch_size):
+            with embed_admission.slot(ctx.session_id, kind="ingest"):
+                ctx.embeddings.extend(self._embedder.embed_documents(texts[i:i + self.batch_size]))
+        return len(texts), sum(len(t.encode("utf-8")) for t in texts)
+
+
+class GraphStage(Stage):
+    """
+    Builds the per-session import/call graph that retrieval uses to add
+    neighbors of its top hits. Only a full ingest sees every file, so
+    incremental writes keep the previous graph. Runs before WriteStage,
+    which saves it together with the index it describes.
+    """
+    name = "graph"
+
+    def __init__(self, enabled: bool = CODE_GRAPH):
+        self.enabled = enabled
+
+    def run(self, ctx):
+        if not self.enabled or ctx.root_path is None:
+            return 0, 0
+
+        ctx.graph = build_graph(ctx.session_id, ctx.chunks, ctx.imports)
+        return ctx.graph["stats"]["edges"], 0
+
+
+class WriteStage(Stage):
+    """
+    Builds the session's next index version next to the live one and
+    publishes it atomically, so queries never see a half-written store.
+    A full ingest (from a source tree) starts from an empty version;
+    incremental writes extend a copy of the live one.
+    """
+    name = "write"
+
+    def run(self, ctx):
+        if not ctx.chunks:
+            raise RuntimeError("No chunks to persist")
+
+        from app.vectorstores.registry import detect_backend, open_store
+
+        metadatas = [
+            {k: v for k, v in c["metadata"].items() if v is not None}
+            for c in ctx.chunks
+        ]
+        ids = [c["id"] for c in ctx.chunks]
+        full = ctx.root_path is not None
+        with session_lock(ctx.session_id, ctx.persist_dir):
+            # Existing sessions keep the backend they were written with
+            backend = ctx.backend or detect_backend(store_path(ctx.session_id, ctx.persist_dir))
+            version = stage_version(ctx.session_id, ctx.persist_dir, copy_current=not full)
+            try:
+                store = open_store(version, backend=backend, embedding_model=EMBEDDING_MODEL)
+                try:
+                    store.add(
+                        ids=ids,
+                        texts=[c["text"] for c in ctx.chunks],
+                        embeddings=ctx.embeddings,
+                        metadatas=metadatas,
+                    )
+                    store.persist()
+                    chunk_count, backend = store.count(), store.backend
+                finally:
+                    # Before publishing: readers open the version with their own client
+                    store.close()
+            except Exception:
+                discard_version(version)
+                raise
+
+            # Measured before publishing: the rename fallback moves the directory
+            size = dir_size(version)
+            if ctx.graph is not None:
+                # Saved before publishing: a query that sees the new
+                # generation must not load (and cache) the previous graph
+                ctx.graph["generation"] = get_generation(ctx.session_id, ctx.persist_dir) + 1
+                save_graph(ctx.session_id, ctx.graph, ctx.persist_dir)
+            publish_version(ctx.session_id, version, ctx.persist_dir)
+            # Invalidate every cached answer derived from the previous index
+            ctx.generation = bump_generation(ctx.session_id, ctx.persist_dir)
+            # A full ingest (from a source tree) defines the live rows for compaction
+            record_ingest(
+                ctx.session_id,
+                ids,
+                replace=full,
+                chunk_count=chunk_count,
+                backend=backend,
+                persist_dir=ctx.persist_dir,
+            )
+        gc_versions(ctx.session_id, ctx.persist_dir)
+        return len(ctx.chunks), size
+
+
+class SummarizeStage(Stage):
+    """
+    Optional (DOCS_SUMMARIES): builds the per-file and per-package summaries
+    that docs generation reduces over. Runs after the write so queries are
+    served while summaries are still being built.
+    """
+    name = "summarize"
+
+    def __init__(self, summarize=None, enabled: bool = DOCS_SUMMARIES):
+        self._summarize = summarize
+        self.enabled = enabled
+
+    def run(self, ctx):
+        if not self.enabled or not ctx.documents:
+            return 0, 0
+
+        summarize = self._summarize or self._default_summarizer(ctx.session_id)
+        data = build_summaries(ctx.session_id, ctx.documents, ctx.generation, summarize, ctx.persist_dir)
+        return len(data["files"]) + len(data["packages"]), 0
+
+    def _default_summarizer(self, session_id: str):
+        # Imported lazily: the engine is only needed when summaries are on
+        from app.core.admission import background
+        from app.core.rag_engine import _engine
+
+        def summarize(prompt: str) -> str:
+            # Runs on worker threads; queue behind interactive traffic
+            with background("ingest"):
+                return _engine.llm.predict(prompt, endpoint="summary", session_id=session_id)
+
+        return summarize
+
+
+DEFAULT_STAGES = [DiscoverStage, ReadStage, ChunkStage, DedupeStage, EmbedStage, GraphStage, WriteStage, SummarizeStage]
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+
+class IngestionPipeline:
+    def __init__(self, stages: Optional[List[Stage]] = None):
+        self.stages = stages if stages is not None else [cls() for cls in DEFAULT_STAGES]
+
+    def run(self, ctx: IngestContext) -> Dict:
+        """
+        Runs every stage in order and returns a machine-readable profile:
+        per-stage time, item count and bytes, plus the slowest files.
+        """
+        started = time.perf_counter()
+        stages = []
+
+        for stage in self.stages:
+            start = time.perf_counter()
+            items, size = stage.run(ctx)
+            seconds = time.perf_counter() - start
+            stages.append({
+                "stage": stage.name,
+                "seconds": round(seconds, 4),
+                "items": items,
+                "bytes": size,
+            })
+            logger.info("[INGEST %s] %s: %d items, %d bytes in %.3fs", ctx.session_id, stage.name, items, size, seconds)
+
+        slowest = sorted(ctx.file_seconds.items(), key=lambda kv: kv[1], reverse=True)[:SLOWEST_FILES]
+
+        return {
+            "session_id": ctx.session_id,
+            "generation": ctx.generation,
+            "total_seconds": round(time.perf_counter() - started, 4),
+            "stages": stages,
+            "slowest_files": [
+                {"file": f, "seconds": round(s, 4), "bytes": ctx.file_bytes.get(f)}
+                for f, s in slowest
+            ],
+            "errors": ctx.errors,
+        }
+
+
+def run_ingestion(root_path: str, session_id: str, repo: Optional[str] = None, persist_dir: str = CHROMA_PERSIST_DIR) -> Dict:
+    """
+    Ingests a directory into a session's index with the default stages.
+    The profile is also written next to the session's metadata.
+    """
+    ctx = IngestContext(
+        session_id=session_id,
+        repo=repo or session_id,
+        root_path=root_path,
+        persist_dir=persist_dir,
+    )
+    profile = IngestionPipeline().run(ctx)
+    write_profile(profile, session_id, persist_dir)
+
+    return {
+        "session_id": session_id,
+        "generation": ctx.generation,
+        "files_ingested": len({d["rel_path"] for d in ctx.documents}),
+        "chunks_created": len(ctx.chunks),
+        "files_skipped": dict(ctx.skipped),
+        "persist_dir": os.path.join(persist_dir, session_id),
+        "duration_s": round(profile["total_seconds"], 2),
+        "profile": profile,
+    }
+
+
+def write_profile(profile: Dict, session_id: str, persist_dir: str = CHROMA_PERSIST_DIR):
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    os.makedirs(meta_dir, exist_ok=True)
+    with open(os.path.join(meta_dir, PROFILE_FILE), "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+
+
+def make_chunk_id(file_path: str, text: str) -> str:
+    h = hashlib.sha1(f"{file_path}:{text}".encode("utf-8")).hexdigest()
+    return h[:10]
+
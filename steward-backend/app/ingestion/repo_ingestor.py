@@ -2,58 +2,30 @@ import os
 import zipfile
 import tempfile
 import shutil
-import hashlib
 
-from collections import defaultdict
-from typing import Dict, List
+from typing import Dict
 
-from app.ingestion.chunkers.registry import CODE_CHUNKER_REGISTRY
-from app.ingestion.chunkers.doc_chunker import chunk_docs
-from app.ingestion.metadata import build_metadata
-from app.ingestion.chroma_writer import persist_chunks
-
-
-SUPPORTED_DOC_EXT = {".md", ".rst"}
+from app.ingestion.pipeline import run_ingestion
 
 
 def ingest_repository(job_id: str, request) -> Dict:
     repo_path = _prepare_repo(request)
 
-    chunks: List[CodeChunk] = []
-    skipped = defaultdict(int)
-
-    for root, _, files in os.walk(repo_path):
-        for filename in files:
-            file_path = os.path.join(root, filename)
-            ext = os.path.splitext(filename)[1]
-
-            if ext in CODE_CHUNKER_REGISTRY:
-                chunker = CODE_CHUNKER_REGISTRY[ext]
-                chunks.extend(
-                    _process_code(file_path, request, chunker)
-                )
-
-            elif ext in SUPPORTED_DOC_EXT:
-                chunks.extend(
-                    _process_docs(file_path, request)
-                )
-
-            else:
-                skipped[ext or "no_ext"] += 1
-
-    
-    persist_chunks(
+    result = run_ingestion(
+        root_path=repo_path,
         session_id=request.repo_name,   # MUST MATCH query session_id
-        chunks=chunks
+        repo=request.repo_name,
     )
 
-    print(f"[INGESTION COMPLETE] repo={request.repo_name}, chunks={len(chunks)}")
+    print(f"[INGESTION COMPLETE] repo={request.repo_name}, chunks={result['chunks_created']}")
 
     return {
         "job_id": job_id,
         "repo": request.repo_name,
-        "chunks_created": len(chunks),
-        "files_skipped": dict(skipped),
+        "generation": result["generation"],
+        "chunks_created": result["chunks_created"],
+        "files_skipped": result["files_skipped"],
+        "profile": result["profile"],
     }
 
 
@@ -87,57 +59,3 @@ def _extract_zip(zip_path: str) -> str:
     with zipfile.ZipFile(zip_path, "r") as z:
         z.extractall(temp_dir)
     return temp_dir
-
-
-def _process_code(file_path: str, request, chunker) -> List[Dict]:
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        code = f.read()
-
-    raw_chunks = chunker.chunk(code)
-
-    chunks: List[Dict] = []
-
-    for chunk in raw_chunks:
-        chunk_id = _make_chunk_id(file_path, chunk.text)
-
-        chunks.append({
-            "id": chunk_id,
-            "text": chunk.text,
-            "metadata": build_metadata(
-                repo=request.repo_name,
-                file_path=file_path,
-                symbol=chunk.symbol_name,
-                symbol_type=chunk.symbol_type,
-                language=chunk.language,
-                doc_type="code",
-                chunk_id=chunk_id, 
-            )
-        })
-
-    return chunks
-
-
-def _process_docs(file_path: str, request) -> List[Dict]:
-    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-        doc = f.read()
-
-    raw_chunks = chunk_docs(doc)
-
-    return [
-        {
-            "text": chunk["text"],
-            "metadata": build_metadata(
-                repo=request.repo_name,
-                file_path=file_path,
-                symbol=chunk["symbol"],
-                symbol_type="section",
-                language="markdown",
-                doc_type="doc"
-            )
-        }
-        for chunk in raw_chunks
-    ]
-
-def _make_chunk_id(file_path: str, text: str) -> str:
-    h = hashlib.sha1(f"{file_path}:{text}".encode("utf-8")).hexdigest()
-    return h[:10]
\ No newline at end of file
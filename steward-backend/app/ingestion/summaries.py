@@ -0,0 +1,259 @@
+import os
+import json
+import hashlib
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.index_version import CHROMA_PERSIST_DIR, session_meta_dir
+
+logger = logging.getLogger("steward.summaries")
+
+# ============================================================
+# Configuration
+# ============================================================
+
+# Build per-file and per-package summaries during ingestion
+DOCS_SUMMARIES = os.getenv("DOCS_SUMMARIES", "false").lower() in {"1", "true", "yes"}
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "8"))
+# Longer files are truncated before summarizing (bounds tokens per call)
+SUMMARY_FILE_MAX_CHARS = int(os.getenv("SUMMARY_FILE_MAX_CHARS", "12000"))
+SUMMARY_MAX_FILES = int(os.getenv("SUMMARY_MAX_FILES", "2000"))
+# Upper bound on summary text fed into one package summary or docs prompt
+SUMMARY_PACKAGE_MAX_CHARS = int(os.getenv("SUMMARY_PACKAGE_MAX_CHARS", "16000"))
+DOCS_SUMMARY_CONTEXT_CHARS = int(os.getenv("DOCS_SUMMARY_CONTEXT_CHARS", "24000"))
+
+SUMMARIES_FILE = "summaries.json"
+ROOT_PACKAGE = "."
+
+FILE_SUMMARY_PROMPT = """
+Summarize this source file for a developer who has not seen the repository.
+In at most 120 words cover: its purpose, the main classes/functions it
+defines, what it depends on, and who is likely to call it.
+Only state what the code shows.
+
+File: {path}
+
+{text}
+""".strip()
+
+PACKAGE_SUMMARY_PROMPT = """
+Summarize this package of a software project from the summaries of its
+files and sub-packages. In at most 200 words cover: its responsibility,
+its main entry points, how its parts fit together, and its dependencies.
+Only state what the summaries support.
+
+Package: {path}
+
+{children}
+""".strip()
+
+
+# ============================================================
+# Build
+# ============================================================
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _package_of(rel_path: str) -> str:
+    return posixpath.dirname(rel_path.replace(os.sep, "/")) or ROOT_PACKAGE
+
+
+def _parent(package: str) -> Optional[str]:
+    if package == ROOT_PACKAGE:
+        return None
+    return posixpath.dirname(package) or ROOT_PACKAGE
+
+
+def _depth(package: str) -> int:
+    return 0 if package == ROOT_PACKAGE else package.count("/") + 1
+
+
+def build_summaries(
+    session_id: str,
+    documents: List[Dict],
+    generation: Optional[int],
+    summarize: Callable[[str], str],
+    persist_dir: str = CHROMA_PERSIST_DIR,
+) -> Dict:
+    """
+    Map step, run at ingest: summarizes every file, then every package
+    bottom-up from its files and sub-packages, in parallel per level.
+    Entries whose content hash is unchanged since the previous build are
+    reused, so a re-ingest only pays for what changed.
+    """
+    previous = load_summaries(session_id, persist_dir) or {}
+    old_files = previous.get("files", {})
+    old_packages = previous.get("packages", {})
+
+    documents = sorted(documents, key=lambda d: d["rel_path"])[:SUMMARY_MAX_FILES]
+    files: Dict[str, Dict] = {}
+    todo: List[Tuple[str, str, str]] = []
+    for doc in documents:
+        path = doc["rel_path"].replace(os.sep, "/")
+        digest = _hash(doc["text"])
+        cached = old_files.get(path)
+        if cached and cached["hash"] == digest:
+            files[path] = cached
+        else:
+            todo.append((path, digest, doc["text"][:SUMMARY_FILE_MAX_CHARS]))
+
+    stats = {"files_summarized": len(todo), "files_reused": len(files)}
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="steward-summary") as pool:
+        results = pool.map(lambda item: _summarize(summarize, FILE_SUMMARY_PROMPT.format(path=item[0], text=item[2])), todo)
+        for (path, digest, _), summary in zip(todo, results):
+            if summary:
+                files[path] = {"hash": digest, "summary": summary}
+
+        # Every ancestor of a file is a package; build the tree bottom-up
+        children: Dict[str, Dict[str, List[str]]] = {}
+        for path in files:
+            package = _package_of(path)
+            children.setdefault(package, {"files": [], "packages": []})["files"].append(path)
+            while (parent := _parent(package)) is not None:
+                entry = children.setdefault(parent, {"files": [], "packages": []})
+                if package in entry["packages"]:
+                    break
+                entry["packages"].append(package)
+                package = parent
+
+        packages: Dict[str, Dict] = {}
+        summarized = 0
+        for depth in sorted({_depth(p) for p in children}, reverse=True):
+            level = []
+            for package in sorted(p for p in children if _depth(p) == depth):
+                kids = children[package]
+                parts = [f"[file {f}]\n{files[f]['summary']}" for f in sorted(kids["files"])]
+                parts += [f"[package {p}]\n{packages[p]['summary']}" for p in sorted(kids["packages"]) if p in packages]
+                digest = _hash("\n".join(
+                    [f"{f}:{files[f]['hash']}" for f in sorted(kids["files"])]
+                    + [f"{p}:{packages[p]['hash']}" for p in sorted(kids["packages"]) if p in packages]
+                ))
+                cached = old_packages.get(package)
+                if cached and cached["hash"] == digest:
+                    packages[package] = cached
+                else:
+                    level.append((package, digest, "\n\n".join(parts)[:SUMMARY_PACKAGE_MAX_CHARS]))
+
+            results = pool.map(lambda item: _summarize(summarize, PACKAGE_SUMMARY_PROMPT.format(path=item[0], children=item[2])), level)
+            for (package, digest, _), summary in zip(level, results):
+                if summary:
+                    packages[package] = {"hash": digest, "summary": summary}
+                    summarized += 1
+
+    stats.update(packages_summarized=summarized, packages_reused=len(packages) - summarized)
+    data = {
+        "session_id": session_id,
+        "generation": generation,
+        "files": files,
+        "packages": packages,
+        "stats": stats,
+    }
+    save_summaries(session_id, data, persist_dir)
+    logger.info("Summaries for session=%s: %s", session_id, stats)
+    return data
+
+
+def _summarize(summarize: Callable[[str], str], prompt: str) -> Optional[str]:
+    try:
+        return summarize(prompt).strip()
+    except Exception as e:
+        # A missing summary only narrows the docs context; never fail ingest
+        logger.warning("Summary failed: %s", e)
+        return None
+
+
+def save_summaries(session_id: str, data: Dict, persist_dir: str = CHROMA_PERSIST_DIR):
+    meta_dir = session_meta_dir(session_id, persist_dir)
+    os.makedirs(meta_dir, exist_ok=True)
+    tmp = os.path.join(meta_dir, f".{SUMMARIES_FILE}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, os.path.join(meta_dir, SUMMARIES_FILE))
+
+
+def load_summaries(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> Optional[Dict]:
+    path = os.path.join(session_meta_dir(session_id, persist_dir), SUMMARIES_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+# path -> ((st_ino, st_mtime_ns), generation)
+_generation_memo: Dict[str, Tuple[Tuple[int, int], Optional[int]]] = {}
+
+
+def summaries_generation(session_id: str, persist_dir: str = CHROMA_PERSIST_DIR) -> Optional[int]:
+    """
+    The index generation the saved summaries were built for (None if
+    there are none). Cheap on repeat calls: the file is only re-read when
+    its inode or mtime changes.
+    """
+    path = os.path.join(session_meta_dir(session_id, persist_dir), SUMMARIES_FILE)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    stamp = (st.st_ino, st.st_mtime_ns)
+    cached = _generation_memo.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    generation = (load_summaries(session_id, persist_dir) or {}).get("generation")
+    _generation_memo[path] = (stamp, generation)
+    return generation
+
+
+# ============================================================
+# Reduce
+# ============================================================
+
+def compose_docs_context(summaries: Dict, focus_files: List[str], budget: int = DOCS_SUMMARY_CONTEXT_CHARS) -> Tuple[str, List[str]]:
+    """
+    Builds the docs prompt context from summaries within a character
+    budget: the package tree down to the deepest level that still fits
+    (higher levels already cover what is below them), then summaries of
+    the files retrieval considers most relevant. Returns (context, sources),
+    where package sources end in "/".
+    """
+    packages = summaries.get("packages", {})
+    files = summaries.get("files", {})
+
+    by_depth: Dict[int, List[str]] = {}
+    for package in packages:
+        by_depth.setdefault(_depth(package), []).append(package)
+
+    parts: List[str] = []
+    sources: List[str] = []
+    used = 0
+    for depth in sorted(by_depth):
+        level = sorted(by_depth[depth])
+        texts = [f"[package {p}]\n{packages[p]['summary']}" for p in level]
+        size = sum(len(t) + 2 for t in texts)
+        if parts and used + size > budget:
+            break
+        parts.extend(texts)
+        sources.extend(f"{p}/" for p in level)
+        used += size
+
+    for path in focus_files:
+        entry = files.get(path)
+        if not entry or path in sources:
+            continue
+        part = f"[file {path}]\n{entry['summary']}"
+        if used + len(part) > budget:
+            break
+        parts.append(part)
+        used += len(part) + 2
+        sources.append(path)
+
+    # Trim a single oversized level rather than exceed the budget
+    context = "\n\n".join(parts)[:budget]
+    return context, sources
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Literal
 
 class QueryFilters(BaseModel):
@@ -8,19 +8,69 @@ class QueryFilters(BaseModel):
     language: Optional[str] = None       # python (future-proof)
 
 class QueryRequest(BaseModel):
-    session_id: str = Field(..., min_length=1)
+    session_id: Optional[str] = None
+    session_ids: Optional[List[str]] = None   # federated query across sessions
     question: str = Field(..., min_length=1)
     filters: Optional[QueryFilters] = None    
+    debug: bool = False                       # include the per-stage trace in the response
+
+    @model_validator(mode="after")
+    def _require_session(self):
+        if not self.session_id and not self.session_ids:
+            raise ValueError("session_id or session_ids is required")
+        return self
+
+class BatchQueryRequest(BaseModel):
+    session_id: str = Field(..., min_length=1)
+    questions: List[str] = Field(..., min_length=1, max_length=500)
+    filters: Optional[QueryFilters] = None
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+class RetrieveRequest(BaseModel):
+    session_id: str = Field(..., min_length=1)
+    question: str = Field(..., min_length=1)
+    filters: Optional[QueryFilters] = None
+    k: Optional[int] = Field(None, ge=1, le=50)
+    debug: bool = False
+
+class RetrievedChunk(BaseModel):
+    chunk_id: Optional[str] = None
+    text: str
+    file_path: Optional[str] = None
+    symbol: Optional[str] = None
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    score: float
+    relevance: float
+    # Cross-encoder score, when reranking is enabled
+    rerank_score: Optional[float] = None
+    # Set when the chunk was added as a code-graph neighbor of this hit
+    expanded_from: Optional[str] = None
+    meta: dict
+
+class RetrieveResponse(BaseModel):
+    session_id: str
+    chunks: List[RetrievedChunk]
+    cached: bool
+    timings: dict
+    debug: Optional[dict] = None
 
 class SuggestRequest(BaseModel):
     session_id: str = Field(..., min_length=1)
     question: str = Field(..., min_length=1)
+    debug: bool = False
 
 class DocsGenerateRequest(BaseModel):
     session_id: str = Field(..., min_length=1)
     doc_type: Literal["overview", "architecture", "api", "onboarding"]
     audience: Literal["engineer", "pm", "stakeholder"] = "engineer"
     business_context: Optional[str] = None
+    debug: bool = False
+
+
+class DocsPrewarmRequest(BaseModel):
+    session_id: str = Field(..., min_length=1)
+    variants: Optional[List[str]] = None    # "doc_type:audience"
 
 
 class DocsGenerateResponse(BaseModel):
@@ -29,6 +79,7 @@ class DocsGenerateResponse(BaseModel):
     content: str
     sources: List[str]
     warning: str
+    debug: Optional[dict] = None
 
 class RepoIngestRequest(BaseModel):
     source_type: Literal["zip", "github", "file"]
@@ -0,0 +1,63 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class VectorStore(ABC):
+    """
+    Minimal interface shared by all vector backends.
+
+    Search results are plain dicts shaped like the RAG engine's docs:
+    {"chunk_id", "text", "meta", "score"}, where score is a distance
+    (lower is better) on Chroma's squared-L2 scale, i.e. 2 - 2*cos for
+    unit-length embeddings.
+    """
+
+    backend: str = ""
+
+    @abstractmethod
+    def add(
+        self,
+        ids: List[str],
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        vectors: List[List[float]],
+        k: int,
+        filters: Optional[Dict] = None,
+    ) -> List[List[Dict]]:
+        """
+        One result list per query vector. `filters` is a flat
+        {metadata_field: value} equality filter.
+        """
+        pass
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def persist(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """Releases open files or maps; the handle is not used afterwards."""
+        pass
+
+    def get(self, ids: List[str]) -> List[Dict]:
+        """
+        Fetches rows by chunk id as {"chunk_id", "text", "meta"} dicts, in
+        the order requested; unknown ids are skipped.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support get()")
+
+    def dump(self) -> Tuple[List[str], List[str], Sequence, List[Dict]]:
+        """
+        Returns every stored row as (ids, texts, embeddings, metadatas),
+        in insertion order; embeddings may be an (N, D) array.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support dump()")
@@ -0,0 +1,110 @@
+import logging
+from typing import Dict, List, Optional
+
+from app.vectorstores.base import VectorStore
+
+# langchain's Chroma wrapper writes into this collection by default, so
+# stores created before the backend abstraction remain readable.
+CHROMA_COLLECTION = "langchain"
+CHROMA_ADD_BATCH = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class ChromaStore(VectorStore):
+    backend = "chroma"
+
+    def __init__(self, path: str, collection_name: str = CHROMA_COLLECTION):
+        # Imported lazily: chromadb is heavy and not needed by other backends
+        import chromadb
+
+        self.path = path
+        self._client = chromadb.PersistentClient(path=path)
+        self._collection = self._client.get_or_create_collection(
+            collection_name,
+            embedding_function=None,
+        )
+
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        for i in range(0, len(ids), CHROMA_ADD_BATCH):
+            end = i + CHROMA_ADD_BATCH
+            self._collection.upsert(
+                ids=ids[i:end],
+                documents=texts[i:end],
+                embeddings=embeddings[i:end],
+                metadatas=metadatas[i:end],
+            )
+
+    def search(self, vectors, k, filters: Optional[Dict] = None) -> List[List[Dict]]:
+        res = self._collection.query(
+            query_embeddings=vectors,
+            n_results=k,
+            where=self._where(filters),
+            include=["documents", "metadatas", "distances"],
+        )
+
+        return [
+            [
+                {
+                "chunk_id": (meta or {}).get("chunk_id"),
+                "text": text,
+                "meta": meta or {},
+                "score": float(dist),
+                }
+                for text, meta, dist in zip(texts, metas, dists)
+            ]
+            for texts, metas, dists in zip(res["documents"], res["metadatas"], res["distances"])
+        ]
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def get(self, ids: List[str]) -> List[Dict]:
+        if not ids:
+            return []
+        res = self._collection.get(ids=list(ids), include=["documents", "metadatas"])
+        rows = {
+            row_id: {"chunk_id": (meta or {}).get("chunk_id"), "text": text, "meta": meta or {}}
+            for row_id, text, meta in zip(res["ids"], res["documents"], res["metadatas"])
+        }
+        return [rows[i] for i in ids if i in rows]
+
+    def dump(self):
+        ids, texts, embeddings, metadatas = [], [], [], []
+        for offset in range(0, self.count(), CHROMA_ADD_BATCH):
+            res = self._collection.get(
+                limit=CHROMA_ADD_BATCH,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            ids.extend(res["ids"])
+            texts.extend(res["documents"])
+            embeddings.extend(list(e) for e in res["embeddings"])
+            metadatas.extend(m or {} for m in res["metadatas"])
+        return ids, texts, embeddings, metadatas
+
+    def close(self) -> None:
+        # chromadb caches one System (sqlite connections, HNSW segments)
+        # per path for the life of the process, and every index version
+        # has its own path; drop this one's so retired versions don't leak.
+        # There is no public API for this: the internals below are those of
+        # chromadb 1.1.x (pinned in requirements.txt). If they move, leak
+        # the System rather than fail; client.reset() is no substitute, it
+        # wipes the data (or raises unless allow_reset is set)
+        try:
+            from chromadb.api.shared_system_client import SharedSystemClient
+
+            system = SharedSystemClient._identifier_to_system.pop(self._client._identifier, None)
+        except (ImportError, AttributeError) as e:
+            logger.warning("Cannot release chroma system for %s: %s", self.path, e)
+            return
+        if system is not None:
+            system.stop()
+
+    def _where(self, filters: Optional[Dict]) -> Optional[Dict]:
+        # Chroma requires an explicit $and once more than one field is set
+        if not filters:
+            return None
+        if len(filters) == 1:
+            return dict(filters)
+        return {"$and": [{k: v} for k, v in sorted(filters.items())]}
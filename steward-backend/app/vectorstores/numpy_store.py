@@ -0,0 +1,292 @@
+import os
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.vectorstores.base import VectorStore
+
+# float16 | int8 (int8 stores a per-row float32 scale alongside)
+NUMPY_STORE_DTYPE = os.getenv("NUMPY_STORE_DTYPE", "float16")
+
+VECTORS_FILE = "vectors.npy"
+SCALES_FILE = "scales.npy"
+METADATA_FILE = "metadata.json"
+MANIFEST_FILE = "manifest.json"
+FORMAT_VERSION = 1
+
+# Rows scanned per matrix multiply; bounds the float32 working set
+SCAN_BLOCK_ROWS = 65536
+
+
+class NumpyStore(VectorStore):
+    """
+    Exact, deterministic vector store over a memory-mapped embedding matrix.
+
+    Layout of a session directory:
+      manifest.json   backend, dtype, dim, count, embedding model
+      vectors.npy     (N, D) unit-normalized embeddings, float16 or int8
+      scales.npy      (N,) float32 per-row scales (int8 only)
+      metadata.json   ids, texts and one column per metadata field
+
+    Search is a blocked dot product against the mmap, with equality
+    filters applied as boolean masks over the metadata columns.
+    Writes are buffered until persist(), which rewrites the files
+    atomically; ids behave like an upsert (last write wins).
+    """
+
+    backend = "numpy"
+
+    def __init__(self, path: str, dtype: str = NUMPY_STORE_DTYPE, embedding_model: Optional[str] = None):
+        if dtype not in ("float16", "int8"):
+            raise ValueError(f"Unsupported numpy store dtype: {dtype}")
+
+        self.path = path
+        self.dtype = dtype
+        self.embedding_model = embedding_model
+        self._pending: Dict[str, list] = {"ids": [], "texts": [], "embeddings": [], "metadatas": []}
+        self._load()
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+    # ------------------
+    # Loading
+    # ------------------
+    def _load(self):
+        self.manifest: Optional[Dict] = None
+        self._vectors = None
+        self._scales = None
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._columns: Dict[str, list] = {}
+        self._column_arrays: Dict[str, np.ndarray] = {}
+        self._positions: Optional[Dict[str, int]] = None
+
+        if not self.exists(self.path):
+            return
+
+        with open(os.path.join(self.path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(self.path, METADATA_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.dtype = self.manifest["dtype"]
+        self.embedding_model = self.embedding_model or self.manifest.get("embedding_model")
+        self._vectors = np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode="r")
+        if self.dtype == "int8":
+            self._scales = np.load(os.path.join(self.path, SCALES_FILE), mmap_mode="r")
+
+        self._ids = meta["ids"]
+        self._texts = meta["texts"]
+        self._columns = meta["columns"]
+
+    def _column(self, name: str) -> np.ndarray:
+        arr = self._column_arrays.get(name)
+        if arr is None:
+            values = self._columns.get(name) or [None] * len(self._ids)
+            arr = np.empty(len(values), dtype=object)
+            arr[:] = values
+            self._column_arrays[name] = arr
+        return arr
+
+    # ------------------
+    # Search
+    # ------------------
+    def search(self, vectors, k, filters: Optional[Dict] = None) -> List[List[Dict]]:
+        if self._vectors is None or not self._ids:
+            return [[] for _ in vectors]
+
+        rows = self._filter_rows(filters)
+        if rows is not None and rows.size == 0:
+            return [[] for _ in vectors]
+
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+
+        sims = self._similarities(queries, rows)
+        k = min(k, sims.shape[1])
+
+        results = []
+        for row_sims in sims:
+            if k < row_sims.size:
+                top = np.argpartition(-row_sims, k - 1)[:k]
+            else:
+                top = np.arange(row_sims.size)
+            # Deterministic order: best score first, ties by position
+            top = top[np.lexsort((top, -row_sims[top]))]
+            idx = rows[top] if rows is not None else top
+            results.append([
+                self._hit(int(j), float(row_sims[t]))
+                for j, t in zip(idx, top)
+            ])
+        return results
+
+    def _filter_rows(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, value in filters.items():
+            mask &= self._column(field) == value
+        return np.nonzero(mask)[0]
+
+    def _similarities(self, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        n = rows.size if rows is not None else len(self._ids)
+        out = np.empty((queries.shape[0], n), dtype=np.float32)
+
+        for start in range(0, n, SCAN_BLOCK_ROWS):
+            end = min(n, start + SCAN_BLOCK_ROWS)
+            sel = rows[start:end] if rows is not None else slice(start, end)
+
+            block = np.asarray(self._vectors[sel], dtype=np.float32)
+            sims = block @ queries.T
+            if self._scales is not None:
+                sims *= np.asarray(self._scales[sel], dtype=np.float32)[:, None]
+            out[:, start:end] = sims.T
+
+        return out
+
+    def _meta(self, j: int) -> Dict:
+        return {
+            name: values[j]
+            for name, values in self._columns.items()
+            if values[j] is not None
+        }
+
+    def _hit(self, j: int, sim: float) -> Dict:
+        meta = self._meta(j)
+        return {
+            "chunk_id": meta.get("chunk_id"),
+            "text": self._texts[j],
+            "meta": meta,
+            # Same scale as Chroma's squared L2 on unit vectors
+            "score": 2.0 - 2.0 * sim,
+        }
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def get(self, ids: List[str]) -> List[Dict]:
+        if self._positions is None:
+            self._positions = {row_id: j for j, row_id in enumerate(self._ids)}
+        rows = []
+        for row_id in ids:
+            j = self._positions.get(row_id)
+            if j is not None:
+                meta = self._meta(j)
+                rows.append({"chunk_id": meta.get("chunk_id"), "text": self._texts[j], "meta": meta})
+        return rows
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    def close(self) -> None:
+        # Drop the maps so a retired version's files can be freed
+        self._vectors = None
+        self._scales = None
+
+    def dump(self):
+        if self._vectors is None:
+            return [], [], np.empty((0, 0), dtype=np.float32), []
+        vectors = np.asarray(self._vectors, dtype=np.float32)
+        if self._scales is not None:
+            vectors = vectors * np.asarray(self._scales, dtype=np.float32)[:, None]
+        metadatas = [self._meta(j) for j in range(len(self._ids))]
+        return list(self._ids), list(self._texts), vectors, metadatas
+
+    # ------------------
+    # Writing
+    # ------------------
+    def add(self, ids, texts, embeddings, metadatas) -> None:
+        self._pending["ids"].extend(ids)
+        self._pending["texts"].extend(texts)
+        self._pending["embeddings"].extend(embeddings)
+        self._pending["metadatas"].extend(metadatas)
+
+    def persist(self) -> None:
+        if not self._pending["ids"]:
+            return
+
+        new = np.asarray(self._pending["embeddings"], dtype=np.float32)
+        new /= np.linalg.norm(new, axis=1, keepdims=True) + 1e-12
+        new_vectors, new_scales = self._encode(new)
+
+        new_columns: Dict[str, list] = {}
+        for meta in self._pending["metadatas"]:
+            for name in meta:
+                new_columns.setdefault(name, [])
+        for name in new_columns:
+            new_columns[name] = [m.get(name) for m in self._pending["metadatas"]]
+
+        ids = list(self._ids) + self._pending["ids"]
+        texts = list(self._texts) + self._pending["texts"]
+        columns = {}
+        for name in set(self._columns) | set(new_columns):
+            columns[name] = (
+                list(self._columns.get(name) or [None] * len(self._ids))
+                + (new_columns.get(name) or [None] * len(new))
+            )
+
+        if self._vectors is not None and len(self._ids):
+            vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+            scales = np.concatenate([np.asarray(self._scales), new_scales]) if new_scales is not None else None
+        else:
+            vectors, scales = new_vectors, new_scales
+
+        # Upsert semantics: the last occurrence of an id wins
+        keep = sorted({chunk_id: i for i, chunk_id in enumerate(ids)}.values())
+        if len(keep) != len(ids):
+            vectors = vectors[keep]
+            scales = scales[keep] if scales is not None else None
+            ids = [ids[i] for i in keep]
+            texts = [texts[i] for i in keep]
+            columns = {name: [values[i] for i in keep] for name, values in columns.items()}
+
+        self.write(self.path, vectors, scales, ids, texts, columns, self.dtype, self.embedding_model)
+        self._pending = {"ids": [], "texts": [], "embeddings": [], "metadatas": []}
+        self._load()
+
+    def _encode(self, unit_vectors: np.ndarray):
+        if self.dtype == "float16":
+            return unit_vectors.astype(np.float16), None
+
+        scales = np.abs(unit_vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.round(unit_vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    @staticmethod
+    def write(path, vectors, scales, ids, texts, columns, dtype, embedding_model=None) -> None:
+        """
+        Writes a complete store. The manifest is replaced last, so readers
+        that open the store mid-write still see the previous manifest.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        def _replace(name, writer, mode="wb"):
+            tmp = os.path.join(path, f".{name}.tmp")
+            with open(tmp, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+                writer(f)
+            os.replace(tmp, os.path.join(path, name))
+
+        _replace(VECTORS_FILE, lambda f: np.save(f, vectors))
+        if scales is not None:
+            _replace(SCALES_FILE, lambda f: np.save(f, scales))
+        _replace(METADATA_FILE, lambda f: json.dump({"ids": ids, "texts": texts, "columns": columns}, f), mode="w")
+        _replace(
+            MANIFEST_FILE,
+            lambda f: json.dump(
+                {
+                    "backend": "numpy",
+                    "format_version": FORMAT_VERSION,
+                    "dtype": dtype,
+                    "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+                    "count": len(ids),
+                    "embedding_model": embedding_model,
+                },
+                f,
+                indent=2,
+            ),
+            mode="w",
+        )
@@ -0,0 +1,36 @@
+import os
+from typing import Optional
+
+from app.vectorstores.base import VectorStore
+from app.vectorstores.chroma_store import ChromaStore
+from app.vectorstores.numpy_store import NumpyStore
+
+# Backend used for sessions that do not have a store yet
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+VECTOR_STORE_REGISTRY = {
+    "chroma": ChromaStore,
+    "numpy": NumpyStore,
+}
+
+
+def detect_backend(path: str) -> Optional[str]:
+    if NumpyStore.exists(path):
+        return "numpy"
+    if os.path.isfile(os.path.join(path, "chroma.sqlite3")):
+        return "chroma"
+    return None
+
+
+def open_store(path: str, backend: Optional[str] = None, embedding_model: Optional[str] = None) -> VectorStore:
+    """
+    Opens the store at `path`. Existing stores keep the backend they were
+    written with; new ones use `backend` or VECTOR_BACKEND.
+    """
+    backend = detect_backend(path) or backend or VECTOR_BACKEND
+    if backend not in VECTOR_STORE_REGISTRY:
+        raise ValueError(f"Unknown vector backend: {backend}")
+
+    if backend == "numpy":
+        return NumpyStore(path, embedding_model=embedding_model)
+    return VECTOR_STORE_REGISTRY[backend](path)
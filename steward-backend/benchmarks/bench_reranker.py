@@ -0,0 +1,120 @@
+"""
+Cross-encoder reranking throughput: one forward pass per request vs the
+micro-batching scheduler (app/core/reranker.py).
+
+Simulates C concurrent requests, each scoring one question against P
+chunks, for every requested model variant, and reports pairs/s, request
+latency percentiles and (batched) the batch-size distribution.
+
+Run from steward-backend/:
+    python benchmarks/bench_reranker.py --concurrency 16 --pairs 20
+    python benchmarks/bench_reranker.py --backends torch,quantized,onnx --max-wait-ms 2,5,10
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.reranker import RERANK_THREADS, RerankBatcher, load_cross_encoder  # noqa: E402
+
+QUESTION = "How does ingestion persist chunks into the vector store?"
+
+
+def make_requests(count: int, pairs: int) -> list:
+    here = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(here, "loadtest.py"), "r", encoding="utf-8") as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    chunk = 12
+    texts = ["\n".join(lines[i:i + chunk]) for i in range(0, len(lines), chunk)]
+    return [
+        [(f"{QUESTION} ({r})", texts[(r * pairs + j) % len(texts)]) for j in range(pairs)]
+        for r in range(count)
+    ]
+
+
+def drive(score, requests: list, concurrency: int) -> dict:
+    latencies = []
+    lock = Lock()
+
+    def one(pairs):
+        start = time.perf_counter()
+        score(pairs)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, requests))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pairs = sum(len(r) for r in requests)
+    return {
+        "pairs_per_s": round(pairs / elapsed, 1),
+        "latency_ms": {
+            "p50": round(statistics.median(latencies) * 1000, 1),
+            "p95": round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch", help="comma-separated: torch,quantized,onnx")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=20, help="chunks reranked per request")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", default="5", help="comma-separated values to compare")
+    args = parser.parse_args()
+
+    import torch
+
+    torch.set_num_threads(RERANK_THREADS)
+    requests = make_requests(args.requests, args.pairs)
+    results = []
+
+    for backend in args.backends.split(","):
+        try:
+            model = load_cross_encoder(backend=backend)
+        except Exception as e:
+            results.append({"backend": backend, "skipped": str(e)})
+            continue
+        model.predict(requests[0], batch_size=args.pairs, show_progress_bar=False)   # warm
+
+        # Every request runs its own forward pass, as without the scheduler
+        unbatched = drive(lambda pairs: model.predict(pairs, batch_size=len(pairs), show_progress_bar=False), requests, args.concurrency)
+        results.append({"backend": backend, "mode": "unbatched", **unbatched})
+
+        for wait_ms in (float(w) for w in args.max_wait_ms.split(",")):
+            batcher = RerankBatcher(model, max_batch=args.max_batch, max_wait_ms=wait_ms)
+            batched = drive(batcher.score, requests, args.concurrency)
+            metrics = batcher.metrics()
+            results.append({
+                "backend": backend,
+                "mode": "batched",
+                "max_wait_ms": wait_ms,
+                **batched,
+                "avg_batch_pairs": metrics["avg_batch_pairs"],
+                "batch_size_histogram": metrics["batch_size_histogram"],
+                "queue_wait_ms": metrics["queue_wait_ms"],
+            })
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "pairs_per_request": args.pairs,
+        "max_batch": args.max_batch,
+        "threads": RERANK_THREADS,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Startup benchmarks for the Steward API.
+
+Measures:
+  - import time of `main` (the app module) in a fresh interpreter
+  - time from process spawn until /api/health/ready returns 200
+  - per-component load time during an explicit warm-up
+
+Run from steward-backend/:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --warmup      # readiness gated on warm-up
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import(runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.check_output(
+            [
+                sys.executable,
+                "-c",
+                "import time; t=time.perf_counter(); import main; print(time.perf_counter()-t)",
+            ],
+            cwd=BACKEND_DIR,
+        )
+        samples.append(float(out.decode().strip().splitlines()[-1]))
+    return _summary(samples)
+
+
+def measure_ready(runs: int, warmup: bool, timeout_s: float = 120.0) -> dict:
+    samples = []
+    env = dict(os.environ, RAG_WARMUP="true" if warmup else "false")
+
+    for _ in range(runs):
+        port = _free_port()
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            url = f"http://127.0.0.1:{port}/api/health/ready"
+            while time.perf_counter() - start < timeout_s:
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as resp:
+                        if resp.status == 200:
+                            samples.append(time.perf_counter() - start)
+                            break
+                except Exception:
+                    time.sleep(0.05)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    return _summary(samples)
+
+
+def measure_warmup() -> dict:
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    from app.core.rag_engine import RAGEngine
+
+    engine = RAGEngine()
+    start = time.perf_counter()
+    engine.warm_up()
+    status = engine.readiness()
+    status["total_s"] = round(time.perf_counter() - start, 3)
+    return status
+
+
+def _summary(samples: list) -> dict:
+    if not samples:
+        return {"runs": 0}
+    return {
+        "runs": len(samples),
+        "median_s": round(statistics.median(samples), 3),
+        "min_s": round(min(samples), 3),
+        "max_s": round(max(samples), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="enable RAG_WARMUP for the readiness runs")
+    args = parser.parse_args()
+
+    report = {
+        "import_main": measure_import(args.runs),
+        "time_to_ready": measure_ready(args.runs, args.warmup),
+        "warmup": measure_warmup(),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Recall and latency of the vector backends on synthetic embeddings.
+
+Builds the same corpus in the NumPy backend (float16 and int8) and, when
+chromadb is installed, in Chroma, then compares each backend's top-k with
+the exact float32 top-k and reports per-query latency.
+
+Run from steward-backend/:
+    python benchmarks/bench_vector_backends.py --rows 50000 --dim 1536
+    python benchmarks/bench_vector_backends.py --rows 200000 --filtered
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.vectorstores.numpy_store import NumpyStore  # noqa: E402
+
+
+def make_corpus(rows: int, dim: int, clusters: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    ids = [f"c{i}" for i in range(rows)]
+    texts = [f"chunk {i}" for i in range(rows)]
+    metadatas = [
+        {
+            "chunk_id": ids[i],
+            "file_path": f"pkg/module_{labels[i] % 50}.py",
+            "doc_type": "code" if i % 4 else "doc",
+        }
+        for i in range(rows)
+    ]
+    return vectors, ids, texts, metadatas
+
+
+def exact_topk(vectors, queries, k, mask=None):
+    sims = queries @ vectors.T
+    if mask is not None:
+        sims[:, ~mask] = -np.inf
+    return [set(np.argsort(-row)[:k].tolist()) for row in sims]
+
+
+def run_backend(name, store, queries, truth, k, filters, id_to_row):
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = store.search([q.tolist()], k=k, filters=filters)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        got = {id_to_row[h["chunk_id"]] for h in hits}
+        recalls.append(len(got & expected) / max(1, len(expected)))
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "recall_at_k": round(statistics.mean(recalls), 4),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--filtered", action="store_true", help="restrict search to doc_type=doc")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    vectors, ids, texts, metadatas = make_corpus(args.rows, args.dim, args.clusters, args.seed)
+    id_to_row = {chunk_id: i for i, chunk_id in enumerate(ids)}
+
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, args.rows, size=args.queries)]
+    queries = queries + 0.3 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    filters = {"doc_type": "doc"} if args.filtered else None
+    mask = np.array([m["doc_type"] == "doc" for m in metadatas]) if args.filtered else None
+    truth = exact_topk(vectors, queries, args.k, mask)
+
+    workdir = tempfile.mkdtemp(prefix="steward-bench-")
+    results = []
+    try:
+        for dtype in ("float16", "int8"):
+            path = os.path.join(workdir, f"numpy-{dtype}")
+            start = time.perf_counter()
+            store = NumpyStore(path, dtype=dtype)
+            store.add(ids, texts, vectors, metadatas)
+            store.persist()
+            build_s = time.perf_counter() - start
+
+            result = run_backend(f"numpy-{dtype}", NumpyStore(path), queries, truth, args.k, filters, id_to_row)
+            result["build_s"] = round(build_s, 2)
+            result["disk_mb"] = round(_dir_size(path) / 1e6, 1)
+            results.append(result)
+
+        try:
+            from app.vectorstores.chroma_store import ChromaStore
+
+            path = os.path.join(workdir, "chroma")
+            start = time.perf_counter()
+            store = ChromaStore(path)
+            store.add(ids, texts, vectors.tolist(), metadatas)
+            build_s = time.perf_counter() - start
+
+            result = run_backend("chroma", store, queries, truth, args.k, filters, id_to_row)
+            result["build_s"] = round(build_s, 2)
+            result["disk_mb"] = round(_dir_size(path) / 1e6, 1)
+            results.append(result)
+        except ImportError:
+            results.append({"backend": "chroma", "skipped": "chromadb not installed"})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps({"rows": args.rows, "dim": args.dim, "k": args.k, "filtered": args.filtered, "results": results}, indent=2))
+
+
+def _dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Memory and cache hit rate of the API as the worker count grows.
+
+For every worker count and configuration, starts gunicorn
+(gunicorn.conf.py) against the stub OpenAI server, ingests a corpus,
+asks a fixed set of questions several times each through /api/query
+and reports:
+  - total RSS and PSS of the master plus its workers (PSS splits shared
+    copy-on-write pages between processes, so it is the honest total)
+  - the query cache hit rate, read from each response's debug trace
+
+Configurations:
+  baseline  per-process TTLCache, models loaded separately in each worker
+  shared    models preloaded in the master before fork, SQLite cache
+            shared by all workers (the defaults of gunicorn.conf.py)
+
+Linux only (reads /proc). Run from steward-backend/:
+    python benchmarks/bench_workers.py --workers 1,2,4,8
+    python benchmarks/bench_workers.py --configs shared --rounds 10 --json-out workers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_openai  # noqa: E402
+from loadtest import QUESTIONS, SESSION_ID, _free_port, _wait_http, ingest_corpus, start_stub  # noqa: E402
+
+CONFIGS = {
+    "baseline": {"PRELOAD_MODELS": "false", "cache": False},
+    "shared": {"PRELOAD_MODELS": "true", "cache": True},
+}
+
+
+# ============================================================
+# Process memory (/proc)
+# ============================================================
+
+def _children(pid: int) -> list:
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                # Field 4 is the parent pid; the name (field 2) may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def _kib(path: str, field: str) -> int:
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_memory(master_pid: int) -> dict:
+    pids = [master_pid] + _children(master_pid)
+    rss = [_kib(f"/proc/{pid}/status", "VmRSS") for pid in pids]
+    pss = [_kib(f"/proc/{pid}/smaps_rollup", "Pss") for pid in pids]
+    return {
+        "processes": len(pids),
+        "rss_mb": round(sum(rss) / 1024, 1),
+        "pss_mb": round(sum(pss) / 1024, 1),
+        "worker_rss_mb": [round(r / 1024, 1) for r in rss[1:]],
+    }
+
+
+# ============================================================
+# Runs
+# ============================================================
+
+def start_server(workers: int, config: str, stub_url: str, persist_dir: str, workdir: str) -> tuple:
+    port = _free_port()
+    settings = CONFIGS[config]
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=stub_url,
+        OPENAI_API_BASE=stub_url,
+        CHROMA_PERSIST_DIR=persist_dir,
+        BIND=f"127.0.0.1:{port}",
+        WEB_CONCURRENCY=str(workers),
+        PRELOAD_MODELS=settings["PRELOAD_MODELS"],
+        # An empty path selects the per-process TTLCache
+        RAG_CACHE_PATH=os.path.join(workdir, "rag_cache.sqlite") if settings["cache"] else "",
+    )
+    env.pop("REDIS_URL", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "warning", "main:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    _wait_http(f"{base}/")
+    return proc, base
+
+
+async def ask_all(base: str, rounds: int, concurrency: int, timeout_s: float) -> dict:
+    questions = [q for q in QUESTIONS for _ in range(rounds)]
+    random.shuffle(questions)
+    queue: asyncio.Queue = asyncio.Queue()
+    for q in questions:
+        queue.put_nowait(q)
+
+    outcomes = {"hits": 0, "misses": 0, "errors": 0}
+    async with httpx.AsyncClient(base_url=base, timeout=timeout_s) as client:
+
+        async def worker():
+            while not queue.empty():
+                question = queue.get_nowait()
+                try:
+                    resp = await client.post("/api/query/", json={"session_id": SESSION_ID, "question": question, "debug": True})
+                    resp.raise_for_status()
+                    hit = resp.json().get("debug", {}).get("cache_hit")
+                    outcomes["hits" if hit else "misses"] += 1
+                except httpx.HTTPError:
+                    outcomes["errors"] += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    answered = outcomes["hits"] + outcomes["misses"]
+    return {
+        **outcomes,
+        "requests": len(questions),
+        "hit_rate": round(outcomes["hits"] / answered, 4) if answered else None,
+        # A perfectly shared cache misses each distinct question once
+        "ideal_hit_rate": round(1 - len(QUESTIONS) / len(questions), 4),
+    }
+
+
+def run_one(args, workers: int, config: str, stub_url: str) -> dict:
+    workdir = tempfile.mkdtemp(prefix="steward-workers-")
+    persist_dir = os.path.join(workdir, "chroma")
+    proc = None
+    try:
+        started = time.perf_counter()
+        proc, base = start_server(workers, config, stub_url, persist_dir, workdir)
+        ready_s = round(time.perf_counter() - started, 2)
+
+        ingest_corpus(base, args.corpus, persist_dir, workdir)
+        cache = asyncio.run(ask_all(base, args.rounds, args.concurrency, args.timeout))
+        memory = process_memory(proc.pid)
+        return {"workers": workers, "config": config, "ready_s": ready_s, "memory": memory, "cache": cache}
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--configs", default="baseline,shared", help=f"comma-separated, from {sorted(CONFIGS)}")
+    parser.add_argument("--rounds", type=int, default=5, help="times each question is asked")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout")
+    parser.add_argument("--corpus", default=os.path.join(BACKEND_DIR, "app"), help="directory to ingest")
+    parser.add_argument("--json-out", help="also write the results to this file")
+    stub_openai.add_arguments(parser)
+    args = parser.parse_args()
+
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    configs = [c.strip() for c in args.configs.split(",")]
+    for config in configs:
+        if config not in CONFIGS:
+            parser.error(f"Unknown config: {config}")
+
+    stub_proc, stub_url = start_stub(args)
+    results = []
+    try:
+        for config in configs:
+            for workers in worker_counts:
+                result = run_one(args, workers, config, stub_url)
+                results.append(result)
+                print(
+                    f"{config:<9} workers={workers:<3} rss={result['memory']['rss_mb']:>8} MB "
+                    f"pss={result['memory']['pss_mb']:>8} MB hit_rate={result['cache']['hit_rate']} "
+                    f"(ideal {result['cache']['ideal_hit_rate']})",
+                    file=sys.stderr,
+                )
+    finally:
+        stub_proc.terminate()
+        stub_proc.wait()
+
+    print(json.dumps(results, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+End-to-end HTTP load test for one Steward worker, without real OpenAI.
+
+Starts the stub OpenAI server (benchmarks/stub_openai.py) and the FastAPI
+app from main.py pointed at it, ingests a corpus into a fresh session,
+then drives mixed /api/query, /api/suggest and /api/docs/generate traffic
+at a fixed concurrency and reports throughput, latency percentiles and
+error rates per endpoint.
+
+Run from steward-backend/:
+    python benchmarks/loadtest.py --concurrency 32 --duration 60
+    python benchmarks/loadtest.py --mix query=80,suggest=10,docs=10 --chat-latency-ms 800 --bust-cache
+    python benchmarks/loadtest.py --workers 4 --json-out loadtest.json
+    python benchmarks/loadtest.py --error-rate 0.05 --stall-rate 0.01 --stall-ms 30000   # fault drill
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_openai  # noqa: E402
+
+SESSION_ID = "loadtest"
+
+QUESTIONS = [
+    "Where is the query endpoint defined?",
+    "How does ingestion persist chunks?",
+    "Which chunkers are registered?",
+    "How are cache keys built?",
+    "What does the health check do?",
+    "How are documents generated?",
+    "Where is the vector store opened?",
+    "How is chunk metadata built?",
+]
+DOC_TYPES = ["overview", "architecture", "api", "onboarding"]
+AUDIENCES = ["engineer", "pm", "stakeholder"]
+
+
+# ============================================================
+# Process management
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_http(url: str, timeout_s: float = 120.0):
+    start = time.time()
+    while time.time() - start < timeout_s:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def start_stub(args) -> tuple:
+    port = _free_port()
+    cmd = [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_openai.py"), "--port", str(port)]
+    for key in stub_openai.CONFIG:
+        cmd += ["--" + key.replace("_", "-"), str(getattr(args, key))]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR)
+    _wait_http(f"http://127.0.0.1:{port}/v1/models")
+    return proc, f"http://127.0.0.1:{port}/v1"
+
+
+def start_app(args, stub_url: str, persist_dir: str) -> tuple:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="stub",
+        OPENAI_BASE_URL=stub_url,
+        OPENAI_API_BASE=stub_url,
+        CHROMA_PERSIST_DIR=persist_dir,
+    )
+    cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--port", str(port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+    ]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, env=env)
+    base = f"http://127.0.0.1:{port}"
+    _wait_http(f"{base}/")
+    return proc, base
+
+
+def ingest_corpus(base: str, corpus: str, persist_dir: str, workdir: str, timeout_s: float = 600.0):
+    zip_path = os.path.join(workdir, "corpus.zip")
+    with zipfile.ZipFile(zip_path, "w") as z:
+        for root, dirs, files in os.walk(corpus):
+            dirs[:] = [d for d in dirs if d not in {".git", "__pycache__", ".venv", "venv", "node_modules"}]
+            for f in files:
+                path = os.path.join(root, f)
+                z.write(path, os.path.relpath(path, corpus))
+
+    resp = httpx.post(
+        f"{base}/api/ingest/ingest",
+        json={"source_type": "zip", "repo_name": SESSION_ID, "source": zip_path},
+        timeout=30,
+    )
+    resp.raise_for_status()
+
+    generation_file = os.path.join(persist_dir, ".sessions", SESSION_ID, "generation")
+    start = time.time()
+    while not os.path.isfile(generation_file):
+        if time.time() - start > timeout_s:
+            raise RuntimeError("Ingestion did not finish in time")
+        time.sleep(0.2)
+    return round(time.time() - start, 2)
+
+
+# ============================================================
+# Traffic
+# ============================================================
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in {"query", "suggest", "docs"}:
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def build_request(endpoint: str, bust_cache: bool) -> tuple:
+    question = random.choice(QUESTIONS)
+    if bust_cache:
+        question = f"{question} (#{random.getrandbits(48):x})"
+
+    if endpoint == "query":
+        return "/api/query/", {"session_id": SESSION_ID, "question": question}
+    if endpoint == "suggest":
+        return "/api/suggest/", {"session_id": SESSION_ID, "question": question}
+    return "/api/docs/generate", {
+        "session_id": SESSION_ID,
+        "doc_type": random.choice(DOC_TYPES),
+        "audience": random.choice(AUDIENCES),
+        "business_context": f"run {random.getrandbits(32):x}" if bust_cache else None,
+    }
+
+
+async def drive(base: str, mix: dict, concurrency: int, duration_s: float, timeout_s: float, bust_cache: bool) -> dict:
+    samples = {name: [] for name in mix}
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration_s
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=timeout_s, limits=limits) as client:
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                endpoint = random.choices(names, weights)[0]
+                path, body = build_request(endpoint, bust_cache)
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(path, json=body)
+                    status = resp.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                samples[endpoint].append((time.perf_counter() - start, status))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"elapsed_s": elapsed, "samples": samples}
+
+
+def summarize(run: dict) -> dict:
+    elapsed = run["elapsed_s"]
+    report = {}
+    all_samples = []
+
+    for endpoint, samples in run["samples"].items():
+        all_samples.extend(samples)
+        report[endpoint] = _stats(samples, elapsed)
+    report["all"] = _stats(all_samples, elapsed)
+    return report
+
+
+def _stats(samples: list, elapsed: float) -> dict:
+    if not samples:
+        return {"requests": 0}
+
+    latencies = sorted(s[0] for s in samples)
+    statuses: dict = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "error_rate": round(errors / len(samples), 4),
+        "status": statuses,
+        "latency_ms": {
+            "p50": pct(0.50),
+            "p90": pct(0.90),
+            "p95": pct(0.95),
+            "p99": pct(0.99),
+            "max": round(latencies[-1] * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic")
+    parser.add_argument("--mix", default="query=70,suggest=20,docs=10")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request client timeout")
+    parser.add_argument("--bust-cache", action="store_true", help="make every request unique")
+    parser.add_argument("--corpus", default=os.path.join(BACKEND_DIR, "app"), help="directory to ingest")
+    parser.add_argument("--json-out", help="also write the report to this file")
+    stub_openai.add_arguments(parser)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    workdir = tempfile.mkdtemp(prefix="steward-loadtest-")
+    persist_dir = os.path.join(workdir, "chroma")
+    procs = []
+    try:
+        stub_proc, stub_url = start_stub(args)
+        procs.append(stub_proc)
+        app_proc, base = start_app(args, stub_url, persist_dir)
+        procs.append(app_proc)
+
+        ingest_s = ingest_corpus(base, args.corpus, persist_dir, workdir)
+        run = asyncio.run(drive(base, mix, args.concurrency, args.duration, args.timeout, args.bust_cache))
+
+        report = {
+            "config": {
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "workers": args.workers,
+                "mix": mix,
+                "bust_cache": args.bust_cache,
+                "stub": {k: getattr(args, k) for k in stub_openai.CONFIG},
+            },
+            "ingest_s": ingest_s,
+            "endpoints": summarize(run),
+            "server_metrics": httpx.get(f"{base}/metrics/", timeout=10).json(),
+            "stub_faults": httpx.get(stub_url.rsplit("/v1", 1)[0] + "/stub/faults", timeout=10).json()["injected"],
+        }
+        print(json.dumps(report, indent=2))
+        if args.json_out:
+            with open(args.json_out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
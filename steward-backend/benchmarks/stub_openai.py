@@ -0,0 +1,184 @@
+"""
+Local stand-in for the OpenAI API, for load tests and fault drills.
+
+Implements the endpoints Steward uses:
+  POST /v1/chat/completions   sleeps base latency + completion_tokens / token rate,
+                              answers with a bullet citing the first CHUNK in the prompt
+  POST /v1/embeddings         deterministic hash-seeded unit vectors
+  GET  /v1/models
+
+Fault injection (chat and embeddings) for exercising timeouts, retries,
+hedging and the circuit breaker:
+  --error-rate      fraction of calls answered with HTTP 500
+  --rate-limit-rate fraction of calls answered with HTTP 429
+  --stall-rate      fraction of calls that stall for --stall-ms first
+
+Run standalone:
+    python benchmarks/stub_openai.py --port 9100 --chat-latency-ms 400 --tokens-per-s 80
+    python benchmarks/stub_openai.py --port 9100 --error-rate 0.05 --stall-rate 0.02 --stall-ms 30000
+
+Then point Steward at it:
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:9100/v1 OPENAI_API_BASE=http://127.0.0.1:9100/v1
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CONFIG = {
+    "chat_latency_ms": 300.0,
+    "tokens_per_s": 80.0,
+    "completion_tokens": 60,
+    "embed_latency_ms": 40.0,
+    "embed_dim": 1536,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "stall_rate": 0.0,
+    "stall_ms": 30000.0,
+}
+
+FAULTS = {"injected_500": 0, "injected_429": 0, "stalled": 0}
+
+_CHUNK_ID = re.compile(r"\[CHUNK (\w+)")
+
+app = FastAPI(title="Stub OpenAI")
+
+
+@app.get("/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+
+@app.get("/stub/faults")
+async def faults():
+    return {"config": CONFIG, "injected": FAULTS}
+
+
+async def _inject_fault():
+    """Returns an error response to send instead, or None to proceed (maybe after a stall)."""
+    roll = random.random()
+    if roll < CONFIG["error_rate"]:
+        FAULTS["injected_500"] += 1
+        return JSONResponse(status_code=500, content={"error": {"message": "injected fault", "type": "server_error"}})
+    roll -= CONFIG["error_rate"]
+    if roll < CONFIG["rate_limit_rate"]:
+        FAULTS["injected_429"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "injected rate limit", "type": "rate_limit_error"}},
+            headers={"Retry-After": "1"},
+        )
+    if random.random() < CONFIG["stall_rate"]:
+        FAULTS["stalled"] += 1
+        await asyncio.sleep(CONFIG["stall_ms"] / 1000)
+    return None
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    fault = await _inject_fault()
+    if fault is not None:
+        return fault
+    prompt = "\n".join(
+        m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+        for m in body.get("messages", [])
+    )
+
+    tokens = min(CONFIG["completion_tokens"], body.get("max_tokens") or CONFIG["completion_tokens"])
+    await asyncio.sleep(CONFIG["chat_latency_ms"] / 1000 + tokens / CONFIG["tokens_per_s"])
+
+    match = _CHUNK_ID.search(prompt)
+    if match:
+        content = f"- The requested code is defined in the provided context. [source: {match.group(1)}]"
+    else:
+        content = "# Stub documentation\n\nGenerated by the stub OpenAI server."
+
+    return {
+        "id": f"chatcmpl-stub-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub-model"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": tokens,
+            "total_tokens": len(prompt) // 4 + tokens,
+        },
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body.get("input")
+    if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+
+    fault = await _inject_fault()
+    if fault is not None:
+        return fault
+
+    await asyncio.sleep(CONFIG["embed_latency_ms"] / 1000)
+
+    return {
+        "object": "list",
+        "model": body.get("model", "stub-embedding"),
+        "data": [
+            {"object": "embedding", "index": i, "embedding": _vector(item)}
+            for i, item in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _vector(item) -> list:
+    seed = int.from_bytes(hashlib.sha256(json.dumps(item).encode("utf-8")).digest()[:8], "little")
+    v = np.random.default_rng(seed).normal(size=CONFIG["embed_dim"]).astype(np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--chat-latency-ms", type=float, default=CONFIG["chat_latency_ms"])
+    parser.add_argument("--tokens-per-s", type=float, default=CONFIG["tokens_per_s"])
+    parser.add_argument("--completion-tokens", type=int, default=CONFIG["completion_tokens"])
+    parser.add_argument("--embed-latency-ms", type=float, default=CONFIG["embed_latency_ms"])
+    parser.add_argument("--embed-dim", type=int, default=CONFIG["embed_dim"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"])
+    parser.add_argument("--rate-limit-rate", type=float, default=CONFIG["rate_limit_rate"])
+    parser.add_argument("--stall-rate", type=float, default=CONFIG["stall_rate"])
+    parser.add_argument("--stall-ms", type=float, default=CONFIG["stall_ms"])
+
+
+def configure(args: argparse.Namespace):
+    for key in CONFIG:
+        CONFIG[key] = getattr(args, key)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure(args)
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Multi-worker serving: gunicorn managing uvicorn workers.
+
+Run from steward-backend/:
+    gunicorn -c gunicorn.conf.py main:app
+    WEB_CONCURRENCY=8 gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload) and, with
+PRELOAD_MODELS=true, the reranker and API clients are built there too,
+so forked workers share those pages copy-on-write instead of loading
+one copy each. Workers share the response cache through SQLite
+(RAG_CACHE_PATH) unless REDIS_URL is set.
+See docs/how-to/multi-worker.md.
+"""
+import gc
+import os
+import logging
+
+logger = logging.getLogger("steward.gunicorn")
+
+# ============================================================
+# Server
+# ============================================================
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "180"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+preload_app = os.getenv("PRELOAD_APP", "true").lower() in {"1", "true", "yes"}
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() in {"1", "true", "yes"}
+
+# A per-process TTLCache gives each worker 1/N of the hits; share one on disk.
+# Read when the app is imported, which happens after this file is loaded.
+os.environ.setdefault("RAG_CACHE_PATH", "data/cache/rag_cache.sqlite")
+
+
+# ============================================================
+# Hooks
+# ============================================================
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded and before any fork."""
+    if not (preload_app and PRELOAD_MODELS):
+        return
+
+    from app.core.rag_engine import _engine
+
+    _engine.warm_up()
+    logger.info("Preloaded engine components in the master: %s", _engine.readiness()["components"])
+    # Move everything loaded so far out of the collector's reach, so GC
+    # passes in the workers don't touch (and copy) the shared pages
+    gc.freeze()
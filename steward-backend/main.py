@@ -1,4 +1,9 @@
-from fastapi import FastAPI
+import uuid
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.query import router as query_router
@@ -6,9 +11,31 @@ from app.api.health import router as health_router
 from app.api.ingest import router as ingest_router
 from app.api.suggest import router as suggest_router
 from app.api.docs import router as docs_router
+from app.api.retrieve import router as retrieve_router
+from app.api.admin import ADMIN_TOKEN, router as admin_router
 from app.api import metrics
+from app.core.rag_engine import _engine, WARMUP_ON_STARTUP
+from app.core import tracing
+from app.core.admission import Overloaded, LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE
+from app.core.sessions import start_eviction_loop
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints may park a thread while queued for an LLM slot; make
+    # sure the threadpool is large enough that admission control, not the
+    # pool, decides who waits and who is shed.
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE + 16)
+    # Bind immediately; models and clients load in the background (or lazily)
+    if WARMUP_ON_STARTUP:
+        _engine.start_warmup()
+    # TTL / disk-quota eviction of cold sessions, if configured
+    start_eviction_loop(on_release=_engine.release_session)
+    yield
 
-app = FastAPI(title="Steward API (Mock Mode)")
+
+app = FastAPI(title="Steward API (Mock Mode)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,14 +43,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing"],
 )
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Tags every request with an id (honouring an incoming X-Request-ID),
+    collects per-stage spans from the engine, returns them as a
+    Server-Timing header and logs slow requests.
+    """
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    trace, token = tracing.start_trace(request_id, request.url.path)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        tracing.end_trace(token)
+        tracing.log_if_slow(trace, status_code)
+
+    response.headers["X-Request-ID"] = request_id
+    response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # Shed load fast instead of letting requests pile up behind the provider
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
 # === Routers ===
 app.include_router(ingest_router, prefix="/api/ingest", tags=["Ingestion"])
 app.include_router(query_router, prefix="/api/query", tags=["Query"])
+app.include_router(retrieve_router, prefix="/api/retrieve", tags=["Retrieve"])
 app.include_router(suggest_router, prefix="/api/suggest", tags=["Suggest"])
 app.include_router(docs_router, prefix="/api/docs", tags=["Docs"])
 app.include_router(health_router, prefix="/api/health", tags=["Health"])
+# Admin routes purge and overwrite sessions; never serve them unauthenticated
+if ADMIN_TOKEN:
+    app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 app.include_router(metrics.router)
 # ========================
 
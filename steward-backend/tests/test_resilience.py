@@ -0,0 +1,270 @@
+"""
+ResilientCaller against a fault-injecting fake upstream: retry budget,
+circuit breaker (including the half-open probe), hedged requests and
+the hard call timeout.
+
+Run from steward-backend/:
+    python -m pytest -q tests
+"""
+import threading
+import time
+
+import pytest
+
+from app.core import resilience
+from app.core.resilience import (
+    CallPolicy,
+    CallTimeout,
+    CircuitBreaker,
+    CircuitOpen,
+    ResilientCaller,
+    RetryBudget,
+)
+
+
+class FakeUpstream:
+    """
+    Callable that plays a script of outcomes, one per call: an exception
+    instance is raised, "stall" blocks until released (or the test ends),
+    anything else is returned. The last entry repeats.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            outcome = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == "stall":
+            self.release.wait(5)
+            return "late"
+        return outcome
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_BASE_S", 0.0)
+
+
+@pytest.fixture
+def upstreams():
+    # Unblock stalled pool threads so they don't outlive the test
+    created = []
+    yield created
+    for upstream in created:
+        upstream.release.set()
+
+
+def make_caller(timeout_s=1.0, max_retries=3, hedge=False, failures=100, cooldown_s=30.0, budget=None):
+    caller = ResilientCaller("test", CallPolicy(timeout_s=timeout_s, max_retries=max_retries, hedge=hedge))
+    caller.breaker = CircuitBreaker(failures=failures, cooldown_s=cooldown_s)
+    caller.budget = budget or RetryBudget(ratio=0.0, maximum=10)
+    return caller
+
+
+# ============================================================
+# Retries and budget
+# ============================================================
+
+def test_retryable_errors_are_retried_until_success():
+    upstream = FakeUpstream(ConnectionError("reset"), TimeoutError("slow"), "ok")
+    caller = make_caller()
+
+    assert caller.call(upstream) == "ok"
+    assert upstream.calls == 3
+    assert caller.metrics()["retries"] == 2
+
+
+def test_client_errors_are_not_retried_and_keep_the_breaker_closed():
+    upstream = FakeUpstream(ValueError("bad request"))
+    caller = make_caller(failures=1)
+
+    with pytest.raises(ValueError):
+        caller.call(upstream)
+    assert upstream.calls == 1
+    assert caller.breaker.state == "closed"
+
+
+def test_retry_budget_exhaustion_stops_retrying():
+    upstream = FakeUpstream(ConnectionError("reset"))
+    caller = make_caller(max_retries=5, budget=RetryBudget(ratio=0.0, maximum=1))
+
+    with pytest.raises(ConnectionError):
+        caller.call(upstream)
+    metrics = caller.metrics()
+    # One retry paid for by the single token, then the budget is empty
+    assert upstream.calls == 2
+    assert metrics["retries"] == 1
+    assert metrics["retry_budget_exhausted"] == 1
+
+
+def test_budget_refills_per_call_up_to_its_maximum():
+    budget = RetryBudget(ratio=0.5, maximum=1)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.deposit()
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+
+# ============================================================
+# Circuit breaker
+# ============================================================
+
+def test_breaker_opens_and_rejects_without_calling_upstream():
+    upstream = FakeUpstream(ConnectionError("down"))
+    caller = make_caller(max_retries=0, failures=2)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            caller.call(upstream)
+    assert caller.breaker.state == "open"
+
+    with pytest.raises(CircuitOpen) as excinfo:
+        caller.call(upstream)
+    assert excinfo.value.reason == "circuit_open"
+    assert upstream.calls == 2
+    assert caller.metrics()["rejected_open"] == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failures=1, cooldown_s=0.05)
+    breaker.record(False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Concurrent calls wait for the probe's outcome
+    assert not breaker.allow()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes():
+    upstream = FakeUpstream(ConnectionError("down"), ConnectionError("still down"), "ok")
+    caller = make_caller(max_retries=0, failures=1, cooldown_s=0.05)
+
+    with pytest.raises(ConnectionError):
+        caller.call(upstream)
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        caller.call(upstream)
+    assert caller.breaker.state == "open"
+
+    time.sleep(0.06)
+    assert caller.call(upstream) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+def test_client_error_during_half_open_leaves_the_breaker_half_open():
+    class BadRequest(Exception):
+        status_code = 400
+
+    upstream = FakeUpstream(ConnectionError("down"), BadRequest("bad request"), "ok")
+    caller = make_caller(max_retries=0, failures=1, cooldown_s=0.05)
+
+    with pytest.raises(ConnectionError):
+        caller.call(upstream)
+    time.sleep(0.06)
+    with pytest.raises(BadRequest):
+        caller.call(upstream)
+    assert caller.breaker.state == "half_open"
+
+    # The probe slot is free again for the next caller
+    assert caller.call(upstream) == "ok"
+    assert caller.breaker.state == "closed"
+
+
+# ============================================================
+# Hedging
+# ============================================================
+
+def prime_latencies(caller, count=resilience.HEDGE_MIN_SAMPLES):
+    fast = FakeUpstream("ok")
+    for _ in range(count):
+        caller.call(fast)
+
+
+def test_no_hedge_until_enough_latency_samples(upstreams):
+    upstream = FakeUpstream("stall")
+    upstreams.append(upstream)
+    caller = make_caller(timeout_s=0.2, max_retries=0, hedge=True)
+
+    with pytest.raises(CallTimeout):
+        caller.call(upstream)
+    assert upstream.calls == 1
+    assert caller.metrics()["hedges"] == 0
+
+
+def test_hedge_wins_when_the_primary_stalls(upstreams):
+    caller = make_caller(timeout_s=2.0, max_retries=0, hedge=True)
+    prime_latencies(caller)
+
+    upstream = FakeUpstream("stall", "hedged")
+    upstreams.append(upstream)
+    started = time.monotonic()
+    assert caller.call(upstream) == "hedged"
+    assert time.monotonic() - started < 1.0
+
+    metrics = caller.metrics()
+    assert upstream.calls == 2
+    assert metrics["hedges"] == 1
+    assert metrics["hedge_wins"] == 1
+
+
+def test_fast_primary_is_not_hedged():
+    caller = make_caller(timeout_s=2.0, max_retries=0, hedge=True)
+    prime_latencies(caller)
+
+    upstream = FakeUpstream("ok")
+    assert caller.call(upstream) == "ok"
+    assert upstream.calls == 1
+    assert caller.metrics()["hedges"] == 0
+
+
+def test_failed_hedge_does_not_mask_a_late_primary(upstreams, monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_MIN_DELAY_S", 0.05)
+    caller = make_caller(timeout_s=2.0, max_retries=0, hedge=True)
+    prime_latencies(caller)
+
+    upstream = FakeUpstream("stall", ConnectionError("hedge failed"))
+    upstreams.append(upstream)
+    threading.Timer(0.2, upstream.release.set).start()
+
+    assert caller.call(upstream) == "late"
+    assert caller.metrics()["hedge_wins"] == 0
+
+
+# ============================================================
+# Timeouts
+# ============================================================
+
+def test_stalled_call_raises_call_timeout(upstreams):
+    upstream = FakeUpstream("stall")
+    upstreams.append(upstream)
+    caller = make_caller(timeout_s=0.1, max_retries=0)
+
+    started = time.monotonic()
+    with pytest.raises(CallTimeout):
+        caller.call(upstream)
+    assert time.monotonic() - started < 1.0
+    assert caller.metrics()["timeouts"] == 1
+
+
+def test_timeouts_are_retried(upstreams):
+    upstream = FakeUpstream("stall", "ok")
+    upstreams.append(upstream)
+    caller = make_caller(timeout_s=0.1, max_retries=1)
+
+    assert caller.call(upstream) == "ok"
+    metrics = caller.metrics()
+    assert metrics["timeouts"] == 1
+    assert metrics["retries"] == 1